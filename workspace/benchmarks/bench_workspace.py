@@ -0,0 +1,148 @@
+# benchmarks/bench_workspace.py
+"""
+Offline benchmarks for pose computation and payload building at scale.
+
+    python benchmarks/bench_workspace.py --sizes tiny small medium --out bench.json
+    python benchmarks/bench_workspace.py --compare bench.json     # flag regressions
+
+Each stage is timed separately (ops/sec, p50/p99 latency) and its peak Python
+memory is measured in a separate tracemalloc pass, so tracing does not skew timings.
+"""
+import argparse, json, platform, subprocess, sys, tempfile, time, tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from workspace import wire
+from benchmarks.synthetic import SIZES, make_config, make_workspace
+
+
+def measure(fn, iters, setup=None, warmup=10):
+    """Time fn() `iters` times (setup() runs untimed before each call)."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    lat = np.empty(iters)
+    for i in range(iters):
+        if setup:
+            setup()
+        t0 = time.perf_counter_ns()
+        fn()
+        lat[i] = time.perf_counter_ns() - t0
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(min(iters, 10)):
+        if setup:
+            setup()
+        fn()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        "ops_per_s": 1e9 / lat.mean(),
+        "p50_us": float(np.percentile(lat, 50)) / 1e3,
+        "p99_us": float(np.percentile(lat, 99)) / 1e3,
+        "peak_kb": peak / 1024,
+    }
+
+
+def bench_size(size, iters, instanced):
+    cores, adapters, plates = SIZES[size]
+    with tempfile.TemporaryDirectory() as tmp:
+        ws = make_workspace(make_config(cores, adapters, plates, instanced), Path(tmp) / "config.yaml")
+    display = ws.display
+    core_comps = [c for c in ws.components.values() if c.type == "core"]
+
+    def next_joints():
+        for c in core_comps:
+            c.joint_feed.poll()
+
+    poses = ws.compute_world_poses()
+    frame = {k: {"pose": p, "visible": True} for k, p in poses.items()}
+    snapshot = display._build_snapshot()
+    full = np.array(list(poses.values()), dtype=float)
+    display.keyframe_s = float("inf")  # measure deltas, not keyframes
+
+    stages = [
+        ("update_pose", lambda: [c.update_pose() for c in core_comps], next_joints),
+        ("compute_world_poses", ws.compute_world_poses, next_joints),
+        ("compute_world_poses_idle", ws.compute_world_poses, None),
+        ("build_pose_frame", display._build_pose_frame, next_joints),
+        ("build_snapshot", display._build_snapshot, None),
+        ("json_pose_frame", lambda: json.dumps(frame), None),
+        ("json_snapshot", lambda: json.dumps(snapshot), None),
+        ("binary_pose_frame", lambda: wire.pack_frame(1, full), None),
+    ]
+    results = []
+    for stage, fn, setup in stages:
+        r = measure(fn, iters, setup)
+        r.update({"size": size, "instanced": instanced, "solids": len(poses), "stage": stage})
+        results.append(r)
+        print(f"{size:>7} {len(poses):>6} solids  {stage:<26} {r['ops_per_s']:>10.0f} ops/s"
+              f"  p50 {r['p50_us']:>9.1f} us  p99 {r['p99_us']:>9.1f} us  peak {r['peak_kb']:>8.1f} kB",
+              flush=True)
+    ws.stop()
+    return results
+
+
+def environment():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, cwd=Path(__file__).parent).stdout.strip()
+    except OSError:
+        rev = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Print p50 ratios vs. a previous results file; returns the number of regressions."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    old = {(r["size"], r["instanced"], r["stage"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\ncompared with {baseline_path} ({baseline['env'].get('git_rev', '?')}):")
+    for r in results:
+        prev = old.get((r["size"], r["instanced"], r["stage"]))
+        if prev is None:
+            continue
+        ratio = r["p50_us"] / prev["p50_us"] if prev["p50_us"] else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        regressions += bool(flag)
+        print(f"{r['size']:>7} {r['stage']:<26} p50 {prev['p50_us']:>9.1f} -> {r['p50_us']:>9.1f} us"
+              f"  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", default=["tiny", "small", "medium"], choices=list(SIZES))
+    parser.add_argument("--iters", type=int, default=200)
+    parser.add_argument("--instanced", action="store_true", help="use instanced microtube arrays")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown flagged as regression")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results += bench_size(size, args.iters, args.instanced)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({"env": environment(), "results": results}, indent=2))
+        print(f"\nresults written to {args.out}")
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/synthetic.py
+"""
+Offline fixtures for the benchmarks: a scripted stand-in for dorna2.Dorna and
+synthetic workcell configs from ~20 up to ~10,000 solids.
+"""
+import math
+import yaml
+
+from workspace import Workspace
+from workspace.joint_feed import JointFeed
+
+
+class FakeDorna:
+    """Stand-in for dorna2.Dorna: joint() returns scripted samples (a slow sweep of every joint)."""
+
+    def __init__(self, samples=None, n=1000):
+        if samples is None:
+            samples = []
+            for k in range(n):
+                t = 2 * math.pi * k / n
+                joints = [30.0 * math.sin(t + 0.5 * i) for i in range(6)]
+                samples.append(joints + [100.0 * math.sin(t), 0.0])  # j6: rail, j7: unused
+        self.samples = samples
+        self._i = 0
+
+    def connect(self, ip):
+        pass
+
+    def joint(self):
+        s = self.samples[self._i % len(self.samples)]
+        self._i += 1
+        return list(s)
+
+    def close(self):
+        pass
+
+
+def make_config(cores=1, adapters=2, plates=1, instanced=False):
+    """
+    Config dict with `cores` core500 cells, `adapters` SBS adapters spread over their
+    fixture plates and `plates` full 96-tube microplates sitting on the adapters
+    (extra adapters are added if plates > adapters).
+    """
+    cfg = {}
+    core_names = ["core"] + [f"core_{i}" for i in range(1, cores)]
+    for name in core_names:
+        cfg[name] = {"type": "core", "preset": "core500", "aux_axis": 6,
+                     "rail_offset": 100, "has_toolchanger": True}
+
+    slots = [(core, f"plate_{p}", f"{row}{col}")
+             for core in core_names for p in range(6) for row in "BEH" for col in (3, 9, 15)]
+    n_adapters = max(adapters, plates)
+    for i in range(n_adapters):
+        core, plate, anchor = slots[i % len(slots)]
+        cfg[f"SBS_adapter_{i}"] = {
+            "type": "SBS_adapter",
+            "attach": {"parent_name": core, "parent_solid": plate, "parent_anchor": anchor,
+                       "child_solid": "SBS_adapter", "child_anchor": "hole_0"},
+        }
+    for i in range(plates):
+        cfg[f"microplate_{i}"] = {
+            "type": "microplate", "full": True, "instanced": instanced,
+            "attach": {"parent_name": f"SBS_adapter_{i}", "parent_solid": "SBS_adapter",
+                       "parent_anchor": "center", "child_solid": "microplate", "child_anchor": "center"},
+        }
+    return cfg
+
+
+# name -> (cores, adapters, plates)
+SIZES = {
+    "tiny": (1, 0, 0),        # ~20 solids
+    "small": (1, 2, 1),       # ~120 solids (like config/config.yaml)
+    "medium": (1, 10, 10),    # ~1,000 solids
+    "large": (2, 100, 100),   # ~10,000 solids
+}
+
+
+def make_workspace(cfg, path):
+    """Build a Workspace (no display connection) whose cores are driven by FakeDorna."""
+    path.write_text(yaml.safe_dump(cfg, sort_keys=False))
+    ws = Workspace(config_path=str(path), start_display=False, cache=False)
+    for comp in ws.components.values():
+        if comp.type == "core":
+            comp.robot_api = FakeDorna()
+            comp.joint_feed = JointFeed(comp.robot_api)  # not started: benchmarks poll() explicitly
+    return ws
@@ -0,0 +1,107 @@
+# scripts/make_lods.py
+"""
+Offline LOD generation for the meshes in static/CAD.
+
+For each GLB writes decimated variants to static/CAD/lod/<name>.lod<k>.glb and records
+them in static/lods.json together with the mesh's bounding box:
+
+    {"CAD/microplate.glb": {"bbox": [[xmin, ymin, zmin], [xmax, ymax, zmax]], "triangles": 25736,
+                            "lods": [{"path": "CAD/lod/microplate.lod1.glb", "triangles": 9053,
+                                      "distance": 624.0}, ...]}}
+
+server.py advertises the LODs with each meshUrl and the viewer switches levels by camera
+distance. `distance` is a multiple of the bounding-box diagonal (mesh units, i.e. mm).
+A level is only kept if its bounding box and (sampled) Hausdorff distance to the full mesh
+stay within --max-error of its grid cells; otherwise it is left out (the viewer then keeps
+the previous level). Re-run after changing a mesh:
+
+    python scripts/make_lods.py [--levels 150:4 40:12]
+"""
+import argparse, json, sys
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+from workspace import glb
+
+STATIC_DIR = REPO_ROOT / "static"
+MIN_REDUCTION = 0.75   # skip a level that keeps more than this fraction of the previous level's triangles
+MAX_ERROR = 1.0        # reject a level whose bbox or Hausdorff error exceeds this many of its grid cells
+
+
+def triangle_count(path):
+    gltf, _ = glb.read_glb(path)
+    count = 0
+    for mesh in gltf["meshes"]:
+        for prim in mesh["primitives"]:
+            acc = prim.get("indices", prim["attributes"]["POSITION"])
+            count += gltf["accessors"][acc]["count"] // 3
+    return count
+
+
+def make_lods(src, out_dir, levels, max_error=MAX_ERROR):
+    """Write the LODs of one GLB; returns its manifest entry."""
+    lo, hi = glb.bounds(src)
+    diag = float(np.linalg.norm(hi - lo))
+    tris = glb.triangles(src)
+    prev = triangle_count(src)
+    entry = {"bbox": [lo.round(3).tolist(), hi.round(3).tolist()], "triangles": prev, "lods": []}
+    for old in out_dir.glob(f"{src.stem}.lod*.glb"):
+        old.unlink()
+    for k, (cells, factor) in enumerate(levels, start=1):
+        cell = diag / cells
+        data, count = glb.decimate(src, cell)
+        if count > MIN_REDUCTION * prev:
+            continue
+        # geometric error vs the full mesh, in level cells (bbox first: it's free)
+        lo_k, hi_k = glb.bounds(data)
+        bbox_err = float(max(np.abs(lo_k - lo).max(), np.abs(hi_k - hi).max())) / cell
+        err = bbox_err if bbox_err > max_error else glb.hausdorff(tris, glb.triangles(data), max_error * cell) / cell
+        if err >= max_error:
+            print(f"[make_lods] {src.name}: lod{k} rejected ({count} tris, error >= {err:.2f} cells)", flush=True)
+            continue
+        dst = out_dir / f"{src.stem}.lod{k}.glb"
+        dst.write_bytes(data)
+        entry["lods"].append({
+            "path": dst.relative_to(STATIC_DIR).as_posix(),
+            "triangles": count,
+            "distance": round(factor * diag, 1),
+        })
+        prev = count
+    return entry
+
+
+def parse_level(text):
+    cells, factor = text.split(":")
+    return int(cells), float(factor)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cad", default=str(STATIC_DIR / "CAD"))
+    parser.add_argument("--levels", nargs="+", type=parse_level, default=[(150, 4.0), (40, 12.0)],
+                        help="cells:distance per LOD, as grid cells along the bbox diagonal : "
+                             "switch distance in bbox diagonals")
+    parser.add_argument("--max-error", type=float, default=MAX_ERROR,
+                        help="largest bbox / Hausdorff error of a level, in its grid cells (bbox diagonal / cells)")
+    args = parser.parse_args()
+
+    cad = Path(args.cad)
+    out_dir = cad / "lod"
+    out_dir.mkdir(exist_ok=True)
+    manifest = {}
+    for src in sorted(cad.glob("*.glb")):
+        entry = make_lods(src, out_dir, args.levels, args.max_error)
+        manifest[src.relative_to(STATIC_DIR).as_posix()] = entry
+        sizes = ", ".join(f"{l['triangles']} @ {l['distance']:.0f}" for l in entry["lods"]) or "-"
+        print(f"[make_lods] {src.name:<28} {entry['triangles']:>7} tris -> {sizes}", flush=True)
+
+    lines = [f"  {json.dumps(name)}: {json.dumps(entry)}" for name, entry in manifest.items()]
+    (STATIC_DIR / "lods.json").write_text("{\n" + ",\n".join(lines) + "\n}\n")
+    print(f"[make_lods] wrote {STATIC_DIR / 'lods.json'}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# scripts/replay.py
+"""
+Stream a pose recording (Display.start_recording(), workspace/recording.py) back to server.py,
+as a producer of one cell, so viewers see what happened:
+
+    python scripts/replay.py incident.wsr --start 14:02 --speed 4 [--end 14:05] [--cell default]
+
+--start/--end take seconds from the beginning of the recording or a wall-clock HH:MM[:SS]
+on the recording's first day. Rows are sent as deltas (only names whose pose changed since
+the last frame the server acknowledged), at most --fps frames per second.
+"""
+import argparse, sys, threading, time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import socketio
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+from workspace.recording import Recording
+
+
+class Replayer:
+    def __init__(self, recording, server_url="http://127.0.0.1:5000", cell="default", speed=1.0, fps=60):
+        self.rec = recording
+        self.server_url = server_url
+        self.cell = str(cell)
+        self.speed = float(speed)
+        self._period = 1.0 / max(1, int(fps))
+
+        self._lock = threading.Lock()
+        self._i0, self._t0 = 0, time.perf_counter()
+        self._sent = None          # row the server has (None: send everything)
+        self._inflight = False
+
+        self.sio = socketio.Client(reconnection=True)
+        self.sio.on("connect", self.send_snapshot)
+        self.sio.on("request_snapshot", lambda _data=None: self.send_snapshot())
+
+    def seek(self, i):
+        """Continue from row i."""
+        with self._lock:
+            self._i0, self._t0 = int(i), time.perf_counter()
+
+    def position(self):
+        """Row due now at the replay speed."""
+        with self._lock:
+            wall = self.rec.t[self._i0] + (time.perf_counter() - self._t0) * self.speed
+        return self.rec.index(wall)
+
+    def send_snapshot(self):
+        """Mesh specs + poses of the current row, as Display.send_snapshot() does."""
+        i = self.position()
+        row = self.rec.row(i)
+        snapshot = {}
+        for name, p, ok in zip(self.rec.names, row.tolist(), ~np.isnan(row[:, 0])):
+            spec = self.rec.specs.get(name)
+            if spec is not None and ok:
+                snapshot[name] = dict(spec, pose=p)
+        with self._lock:
+            self._sent = row
+            self._inflight = False   # an ACK lost with a dropped connection
+        self.sio.emit("upstream_update", snapshot)
+
+    def _frame(self, row):
+        """Names whose pose differs from what the server has."""
+        sent = self._sent
+        if sent is None:
+            changed = ~np.isnan(row[:, 0])
+        else:
+            changed = np.any(row != sent, axis=1) & ~np.isnan(row[:, 0])
+        names = self.rec.names
+        return {names[j]: {"pose": row[j].tolist(), "visible": True} for j in np.flatnonzero(changed)}
+
+    def _ack(self, row):
+        def ack(_ok=None):
+            with self._lock:
+                self._sent = row
+                self._inflight = False
+        return ack
+
+    def run(self, end=None):
+        """Stream until row `end` (default: the last row) is sent."""
+        end = len(self.rec) - 1 if end is None else end
+        self.sio.connect(self.server_url, transports=["websocket"], wait_timeout=5,
+                         auth={"role": "producer", "cell": self.cell})
+        try:
+            while True:
+                i = min(self.position(), end)
+                with self._lock:
+                    busy = self._inflight
+                if not busy:
+                    row = self.rec.row(i)
+                    frame = self._frame(row)
+                    if frame:
+                        with self._lock:
+                            self._inflight = True
+                        self.sio.emit("upstream_update", frame, callback=self._ack(row))
+                    elif i >= end:
+                        break
+                time.sleep(self._period)
+        finally:
+            self.sio.disconnect()
+
+
+def parse_time(text, rec):
+    """Seconds from the start, or HH:MM[:SS] on the recording's first day -> row index."""
+    if ":" in text:
+        day = datetime.fromtimestamp(rec.t[0])
+        parts = [int(p) for p in text.split(":")] + [0]
+        wall = day.replace(hour=parts[0], minute=parts[1], second=parts[2], microsecond=0).timestamp()
+    else:
+        wall = rec.t[0] + float(text)
+    return rec.index(wall)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--server", default="http://127.0.0.1:5000")
+    parser.add_argument("--cell", default="default")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--start", default=None, help="seconds from start or HH:MM[:SS]")
+    parser.add_argument("--end", default=None, help="seconds from start or HH:MM[:SS]")
+    parser.add_argument("--fps", type=int, default=60)
+    args = parser.parse_args()
+
+    rec = Recording(args.path)
+    if not len(rec):
+        sys.exit(f"[replay] {args.path}: empty recording")
+    start = parse_time(args.start, rec) if args.start else 0
+    end = parse_time(args.end, rec) if args.end else None
+    print(f"[replay] {len(rec)} rows, {len(rec.names)} solids, {rec.duration:.1f} s from "
+          f"{datetime.fromtimestamp(rec.t[0]):%Y-%m-%d %H:%M:%S}", flush=True)
+
+    replayer = Replayer(rec, args.server, args.cell, args.speed, args.fps)
+    replayer.seek(start)
+    try:
+        replayer.run(end)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
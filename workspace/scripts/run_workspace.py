@@ -1,15 +1,55 @@
 # scripts/run_workspace.py
-import time
+import argparse, re, subprocess, sys, time
 from pathlib import Path
+
+T_START = time.perf_counter()
 from workspace import Workspace
+T_IMPORT = time.perf_counter() - T_START
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 CONFIG_PATH = REPO_ROOT / "config" / "config.yaml"
 
+
+def import_profile(top=15):
+    """
+    Import-time breakdown of `import workspace` (python -X importtime), in a fresh
+    interpreter so nothing is cached. Returns [(cumulative_us, self_us, module)], slowest first.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import workspace"],
+        cwd=str(REPO_ROOT), capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)", line)
+        if m:
+            rows.append((int(m.group(2)), int(m.group(1)), m.group(4)))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def print_profile(ws):
+    print(f"[run_workspace] import workspace: {T_IMPORT * 1e3:8.1f} ms", flush=True)
+    for phase, dt in ws.startup_profile.items():
+        print(f"[run_workspace] {phase:<30} {dt * 1e3:8.1f} ms", flush=True)
+    print("[run_workspace] import time (cold interpreter), cumulative / self:", flush=True)
+    for cum, own, mod in import_profile():
+        print(f"    {cum / 1e3:8.1f} ms {own / 1e3:8.1f} ms  {mod}", flush=True)
+
+
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default=str(CONFIG_PATH))
+    parser.add_argument("--cell", default="default", help="cell ID on a relay shared by several workspaces")
+    parser.add_argument("--cache", action="store_true", help="use the compiled-scene cache (workspace/cache.py)")
+    parser.add_argument("--profile", action="store_true", help="print an import/startup time breakdown")
+    args = parser.parse_args()
+
     # Initialize workspace (starts Display automatically)
-    ws = Workspace(config_path=str(CONFIG_PATH))
+    ws = Workspace(config_path=args.config, cell=args.cell, cache=args.cache)
     print("[run_workspace] workspace initialized, running workflow...", flush=True)
+    if args.profile:
+        print_profile(ws)
 
     try:
         while True:
@@ -1,5 +1,5 @@
 # server.py — Tornado + python-socketio (WS-only) with world-state replay + self-healing snapshots
-import os, asyncio
+import os, asyncio, gzip, hashlib, json, struct, time
 import tornado.web, tornado.ioloop
 import socketio
 
@@ -27,72 +27,928 @@ class HealthHandler(tornado.web.RequestHandler):
     def get(self):
         self.set_status(200)
         self.finish("ok")
-app.add_handlers(r".*$", [(r"/healthz", HealthHandler)])
 
-# ---------- world state ----------
-# Stores the last-known spec per object: { name: {meshUrl/mesh/pose/visible/...}, ... }
-world_state = {}
+# ---------- metrics ----------
+# Relay counters; producers push their own hot-path metrics (Display -> "producer_metrics").
+relay_metrics = {"events": {}, "bytes_in": 0, "bytes_out": 0,
+                 "snapshot_requests": 0, "snapshot_requests_coalesced": 0,
+                 "resyncs_delta": 0, "resyncs_full": 0}
+clients = set()            # connected sids
+producers = set()          # sids that pushed upstream_* events
+producer_stats = {}        # (sid, cell ID) -> Metrics.snapshot() of that producer
+_rate = {"t": time.monotonic(), "events": 0}
 
-def merge_into_state(state, payload):
-    """Shallow-merge each object's spec into world_state."""
-    for name, spec in payload.items():
-        prev = state.get(name, {})
-        if not isinstance(prev, dict):
-            prev = {}
-        if isinstance(spec, dict):
-            prev.update(spec)
-        state[name] = prev
+def _size(data):
+    """Payload bytes of an event argument: binary as is, text as UTF-8, anything else as compact JSON."""
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    if isinstance(data, str):
+        return len(data.encode())
+    if isinstance(data, tuple):
+        return sum(_size(x) for x in data)
+    try:
+        return len(json.dumps(data, separators=(",", ":")).encode())
+    except (TypeError, ValueError):
+        return 0
+
+def _count(event, *args):
+    """Count one received event and its payload (socket.io framing not included)."""
+    ev = relay_metrics["events"]
+    ev[event] = ev.get(event, 0) + 1
+    relay_metrics["bytes_in"] += _size(args)
+
+async def _emit(event, data, to, recipients=1, ack=False):
+    """sio.emit that counts the payload once per recipient; ack=True waits for one viewer's ACK."""
+    relay_metrics["bytes_out"] += _size(data) * recipients
+    if ack:
+        return await sio.call(event, data, to=to, timeout=ACK_TIMEOUT)
+    await sio.emit(event, data, to=to)
+
+def _producer_lines(stats):
+    """
+    Producer metrics ({(sid, cell ID): Metrics.snapshot()}), grouped into one family per
+    metric with its # HELP / # TYPE header once, as the exposition format requires.
+    """
+    families = {}   # name -> (type, help, [samples])
+
+    def add(family, kind, text, *samples):
+        families.setdefault(family, (kind, text, []))[2].extend(samples)
+
+    stage = "workspace_producer_stage_seconds"
+    for (sid, cell_id), snap in sorted(stats.items()):
+        lab = f'producer="{sid}",cell="{cell_id}"'
+        for name, t in snap.get("timers", {}).items():
+            sel = f'{{{lab},stage="{name}"}}'
+            add(stage, "summary", "Time producers spend per stage (frame, serialize, ack_rtt, ...).",
+                f"{stage}_count{sel} {t['count']}", f"{stage}_sum{sel} {t['sum']:.9f}")
+            add(f"{stage}_max", "gauge", "Longest single run of a producer stage.",
+                f"{stage}_max{sel} {t['max']:.9f}")
+        for name, v in snap.get("counters", {}).items():
+            family = f"workspace_producer_{name}_total"
+            add(family, "counter", f"Producer counter {name}.", f"{family}{{{lab}}} {v}")
+        for name, v in snap.get("gauges", {}).items():
+            family = f"workspace_producer_{name}"
+            add(family, "gauge", f"Producer gauge {name}.", f"{family}{{{lab}}} {v}")
+    lines = []
+    for family, (kind, text, samples) in families.items():
+        lines += [f"# HELP {family} {text}", f"# TYPE {family} {kind}", *samples]
+    return lines
+
+def render_metrics():
+    """Prometheus text exposition of relay + producer metrics."""
+    now = time.monotonic()
+    total = sum(relay_metrics["events"].values())
+    dt = now - _rate["t"]
+    rate = (total - _rate["events"]) / dt if dt > 0 else 0.0
+    _rate["t"], _rate["events"] = now, total
+
+    lines = ["# TYPE workspace_relay_events_total counter"]
+    for event, n in sorted(relay_metrics["events"].items()):
+        lines.append(f'workspace_relay_events_total{{event="{event}"}} {n}')
+    lines += [
+        "# TYPE workspace_relay_bytes_in_total counter",
+        f"workspace_relay_bytes_in_total {relay_metrics['bytes_in']}",
+        "# TYPE workspace_relay_bytes_out_total counter",
+        f"workspace_relay_bytes_out_total {relay_metrics['bytes_out']}",
+        "# TYPE workspace_relay_snapshot_requests_total counter",
+        f"workspace_relay_snapshot_requests_total {relay_metrics['snapshot_requests']}",
+        "# TYPE workspace_relay_snapshot_requests_coalesced_total counter",
+        f"workspace_relay_snapshot_requests_coalesced_total {relay_metrics['snapshot_requests_coalesced']}",
+        "# TYPE workspace_relay_resyncs_total counter",
+        f'workspace_relay_resyncs_total{{kind="delta"}} {relay_metrics["resyncs_delta"]}',
+        f'workspace_relay_resyncs_total{{kind="full"}} {relay_metrics["resyncs_full"]}',
+        "# TYPE workspace_relay_events_per_second gauge",
+        f"workspace_relay_events_per_second {rate:.3f}",
+        "# TYPE workspace_relay_connected_viewers gauge",
+        f"workspace_relay_connected_viewers {len(clients - producers)}",
+        "# TYPE workspace_relay_connected_producers gauge",
+        f"workspace_relay_connected_producers {len(producers & clients)}",
+    ]
+    if cells:
+        lines.append("# TYPE workspace_relay_cell_objects gauge")
+        lines += [f'workspace_relay_cell_objects{{cell="{c.id}"}} {len(c.world_state.objects)}' for c in cells.values()]
+        lines.append("# TYPE workspace_relay_cell_viewers gauge")
+        lines += [f'workspace_relay_cell_viewers{{cell="{c.id}"}} {len(c.viewers)}' for c in cells.values()]
+        lines.append("# TYPE workspace_relay_cell_producers gauge")
+        lines += [f'workspace_relay_cell_producers{{cell="{c.id}"}} {len(c.producers)}' for c in cells.values()]
+    queues = [q for c in cells.values() for q in c.viewers.values()]
+    if queues:
+        lines.append("# TYPE workspace_relay_viewer_lag_seconds gauge")
+        lines += [f'workspace_relay_viewer_lag_seconds{{viewer="{q.sid}",cell="{q.cell.id}"}} {max(q.lag, q.backlog):.6f}'
+                  for q in queues]
+        lines.append("# TYPE workspace_relay_viewer_coalesced_total counter")
+        lines += [f'workspace_relay_viewer_coalesced_total{{viewer="{q.sid}",cell="{q.cell.id}"}} {q.coalesced}'
+                  for q in queues]
+    lines += _producer_lines(producer_stats)
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4")
+        self.finish(render_metrics())
+
+app.add_handlers(r".*$", [(r"/healthz", HealthHandler), (r"/metrics", MetricsHandler)])
+
+# ---------- mesh assets ----------
+# GLBs under static/ are hashed and precompressed once at startup and served from
+# /assets/<path>.<hash>.glb with immutable caching; producers' /static/... meshUrls are rewritten
+# to those URLs on the way in, with the LODs listed in static/lods.json. /assets/bundle/<key> concatenates every mesh of a snapshot so a
+# cold viewer makes one (cached) request. Brotli is used when the `brotli` package is installed.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+BUNDLE_MAGIC = b"WSMB"
+MAX_BUNDLES = 16        # built bundles kept in memory (least recently used dropped first)
+MAX_BUNDLE_KEYS = 1024  # bundle URLs that stay valid (their mesh lists)
+
+class Asset:
+    """One file's bytes and precompressed variants, keyed by content encoding."""
+    def __init__(self, data):
+        self.hash = hashlib.sha256(data).hexdigest()[:16]
+        self.variants = {"identity": data, "gzip": gzip.compress(data, 9)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(data)
+
+    def pick(self, accept_encoding):
+        """(encoding, bytes) of the smallest variant the client accepts."""
+        accepted = {e.split(";")[0].strip() for e in (accept_encoding or "").split(",")}
+        options = [(len(b), e) for e, b in self.variants.items() if e == "identity" or e in accepted]
+        _, enc = min(options)
+        return enc, self.variants[enc]
+
+class AssetStore:
+    def __init__(self, root, suffixes=(".glb",)):
+        self.root = root
+        self.assets = {}    # "CAD/x.glb" -> Asset
+        self.bundles = {}   # key -> sorted mesh paths of the bundle, least recently used first
+        self.built = {}     # key -> Asset (concatenated meshes), least recently used first
+        self.lods = {}      # "CAD/x.glb" -> {"bbox", "triangles", "lods"} (scripts/make_lods.py)
+        manifest = os.path.join(root, "lods.json")
+        if os.path.isfile(manifest):
+            with open(manifest) as fh:
+                self.lods = json.load(fh)
+        if os.path.isdir(root):
+            for dirpath, _, files in os.walk(root):
+                for f in files:
+                    if f.endswith(suffixes):
+                        path = os.path.join(dirpath, f)
+                        with open(path, "rb") as fh:
+                            self.assets[os.path.relpath(path, root).replace(os.sep, "/")] = Asset(fh.read())
+
+    def url(self, rel):
+        base, ext = os.path.splitext(rel)
+        return f"/assets/{base}.{self.assets[rel].hash}{ext}"
+
+    def rewrite(self, spec):
+        """
+        Point a spec's /static/... meshUrl at the hashed asset and advertise the mesh's LODs
+        ([{url, distance}], coarser last) and bounding box if make_lods.py generated them.
+        """
+        url = spec.get("meshUrl")
+        if not (isinstance(url, str) and url.startswith("/static/")):
+            return
+        rel = url[len("/static/"):]
+        if rel not in self.assets:
+            return
+        spec["meshUrl"] = self.url(rel)
+        info = self.lods.get(rel)
+        if info:
+            spec["bbox"] = info["bbox"]
+            spec["lods"] = [{"url": self.url(l["path"]), "distance": l["distance"]}
+                            for l in info["lods"] if l["path"] in self.assets]
+
+    def lookup(self, rel, digest):
+        base, ext = os.path.splitext(rel)
+        asset = self.assets.get(base + ext)
+        return asset if asset is not None and asset.hash == digest else None
+
+    def bundle_url(self, urls):
+        """URL of a bundle holding every known asset among `urls` (None if there are none)."""
+        rels = sorted({u[len("/assets/"):] for u in urls if isinstance(u, str) and u.startswith("/assets/")})
+        if not rels:
+            return None
+        key = hashlib.sha256("\n".join(rels).encode()).hexdigest()[:16]
+        self.bundles[key] = self.bundles.pop(key, rels)     # built on first request
+        while len(self.bundles) > MAX_BUNDLE_KEYS:
+            old = next(iter(self.bundles))
+            del self.bundles[old]
+            self.built.pop(old, None)
+        return f"/assets/bundle/{key}"
+
+    def has_bundle(self, url):
+        """False once a URL from bundle_url() has been dropped (Cell.bundle_url() then makes a new one)."""
+        return url.rpartition("/")[2] in self.bundles
+
+    def bundle(self, key):
+        """
+        Bundle layout: b"WSMB", uint32 header length, UTF-8 JSON {url: [offset, length]} header,
+        then the GLBs back to back (offsets are relative to the end of the header).
+        Only the MAX_BUNDLES most recently used are kept built; an evicted one is rebuilt
+        from its mesh list, so a URL handed out to a viewer keeps working.
+        """
+        rels = self.bundles.get(key)
+        if rels is None:
+            return None
+        b = self.built.pop(key, None)
+        if b is None:
+            index, chunks, off = {}, [], 0
+            for rel in rels:
+                path, ext = os.path.splitext(rel)
+                base, _, digest = path.rpartition(".")
+                asset = self.lookup(base + ext, digest)
+                if asset is None:
+                    continue
+                data = asset.variants["identity"]
+                index["/assets/" + rel] = [off, len(data)]
+                chunks.append(data)
+                off += len(data)
+            header = json.dumps(index, separators=(",", ":")).encode()
+            b = Asset(BUNDLE_MAGIC + struct.pack("<I", len(header)) + header + b"".join(chunks))
+        self.built[key] = b
+        while len(self.built) > MAX_BUNDLES:
+            self.built.pop(next(iter(self.built)))
+        return b
+
+    def mesh_urls(self, objects):
+        """Level-0 meshUrls only: LODs are fetched on their own, bundling them would hold up level 0."""
+        return [spec.get("meshUrl") for spec in objects.values() if isinstance(spec, dict)]
+
+class AssetHandler(tornado.web.RequestHandler):
+    def _send(self, asset, content_type):
+        etag = f'"{asset.hash}"'
+        self.set_header("Cache-Control", IMMUTABLE)
+        self.set_header("ETag", etag)
+        self.set_header("Vary", "Accept-Encoding")
+        if self.request.headers.get("If-None-Match") == etag:
+            self.set_status(304)
+            return self.finish()
+        enc, data = asset.pick(self.request.headers.get("Accept-Encoding"))
+        if enc != "identity":
+            self.set_header("Content-Encoding", enc)
+        self.set_header("Content-Type", content_type)
+        self.finish(data)
 
+    def compute_etag(self):
+        return None   # set explicitly per content hash
+
+class MeshAssetHandler(AssetHandler):
+    def get(self, base, digest, ext):
+        asset = assets.lookup(base + ext, digest)
+        if asset is None:
+            raise tornado.web.HTTPError(404)
+        self._send(asset, "model/gltf-binary")
+
+class BundleHandler(AssetHandler):
+    def get(self, key):
+        asset = assets.bundle(key)
+        if asset is None:
+            raise tornado.web.HTTPError(404)
+        self._send(asset, "application/octet-stream")
+
+assets = AssetStore(STATIC_DIR)
+
+app.add_handlers(r".*$", [
+    (r"/assets/bundle/([0-9a-f]+)", BundleHandler),
+    (r"/assets/(.+)\.([0-9a-f]+)(\.[A-Za-z0-9]+)", MeshAssetHandler),
+])
+
+# ---------- world state ----------
 def _has_mesh_info(spec):
     return isinstance(spec, dict) and ("meshUrl" in spec or "mesh" in spec)
 
-def world_has_any_mesh():
-    return any(_has_mesh_info(v) for v in world_state.values())
+_MISSING = object()
+
+class WorldState:
+    """
+    Last-known spec per object: { name: {meshUrl/mesh/pose/visible/...}, ... }.
+
+    `version` is bumped whenever a merge actually changes something and doubles as
+    the sequence number: `changed` records the version of each object's last change
+    (kept in change order) and `deleted` keeps tombstones, so a reconnecting viewer
+    that saw version N gets only changes_since(N). `epoch` is unique per server
+    process, so versions from before a restart are never trusted. Tombstones are
+    compacted every KEYFRAME_S; that raises `floor`, below which only a full
+    snapshot is possible.
+
+    The JSON encoding for joining viewers is cached per version, so a burst of joins
+    costs one encode. `has_mesh` and the set of objects still lacking mesh info are
+    tracked on merge instead of rescanning every object.
+    """
+    KEYFRAME_S = 60.0
+
+    def __init__(self):
+        self.objects = {}
+        self.version = 0
+        self.epoch = os.urandom(4).hex()
+        self.changed = {}    # name -> version of its last change, oldest first
+        self.deleted = {}    # name -> version it was deleted at (tombstones)
+        self.floor = 0
+        self._compacted = time.monotonic()
+        self.has_mesh = False
+        self.missing_mesh = set()
+        self._encoded = None
+        self._encoded_version = -1
+
+    def __contains__(self, name):
+        return name in self.objects
+
+    def __bool__(self):
+        return bool(self.objects)
+
+    def meta(self):
+        return {"epoch": self.epoch, "version": self.version}
+
+    def _touch(self, name):
+        self.changed.pop(name, None)
+        self.changed[name] = self.version + 1
+
+    def merge(self, payload):
+        """
+        Shallow-merge each object's spec into the state; returns True if anything changed.
+        Producers send delta frames (only the objects that moved), so objects missing
+        from a payload keep their last-known spec, and keys missing from a spec
+        (e.g. meshUrl on a pose-only frame) keep their last-known value.
+        A spec with "delete": true removes the object.
+        """
+        changed = False
+        for name, spec in payload.items():
+            if isinstance(spec, dict) and spec.get("delete"):
+                if self.objects.pop(name, None) is not None:
+                    self.changed.pop(name, None)
+                    self.missing_mesh.discard(name)
+                    self.deleted[name] = self.version + 1
+                    changed = True
+                continue
+            prev = self.objects.get(name)
+            if not isinstance(prev, dict):
+                prev = self.objects[name] = {}
+                self.deleted.pop(name, None)
+                self._touch(name)
+                changed = True
+                self.missing_mesh.add(name)
+            if not isinstance(spec, dict):
+                continue
+            touched = False
+            for k, v in spec.items():
+                if prev.get(k, _MISSING) != v:
+                    prev[k] = v
+                    touched = True
+            if touched:
+                self._touch(name)
+                changed = True
+            if _has_mesh_info(spec):
+                self.has_mesh = True
+                self.missing_mesh.discard(name)
+        if changed:
+            self.version += 1
+            if self.deleted and time.monotonic() - self._compacted > self.KEYFRAME_S:
+                self.compact()
+        return changed
+
+    def compact(self):
+        """Drop tombstones; viewers older than this keyframe get a full snapshot instead."""
+        self.deleted.clear()
+        self.floor = self.version
+        self._compacted = time.monotonic()
+
+    def changes_since(self, version):
+        """
+        {name: spec} of every object changed after `version` ({"delete": true} for removed
+        ones), or None if `version` is older than the last keyframe or not from this state.
+        """
+        if not isinstance(version, int) or not self.floor <= version <= self.version:
+            return None
+        out = {}
+        for name in reversed(self.changed):
+            if self.changed[name] <= version:
+                break
+            out[name] = self.objects[name]
+        for name, v in self.deleted.items():
+            if v > version:
+                out[name] = {"delete": True}
+        return out
+
+    @property
+    def complete(self):
+        """True if every known object has mesh info, i.e. the state can serve a full snapshot."""
+        return self.has_mesh and not self.missing_mesh
+
+    def encoded(self):
+        """UTF-8 JSON of all objects, re-encoded only if the state changed since last time."""
+        if self._encoded_version != self.version:
+            self._encoded = json.dumps(self.objects, separators=(",", ":")).encode()
+            self._encoded_version = self.version
+        return self._encoded
+
+# ---------- binary pose frames ----------
+# Layout (see workspace/wire.py): <4sIII header (magic, table version, count, flags),
+# uint32 indices (absent for full frames), float32 poses [count*6], visibility bitmask.
+FRAME_HEADER = struct.Struct("<4sIII")
+FRAME_MAGIC = b"WSPF"
+FLAG_FULL = 1
+POSE_BYTES = 6 * 4
+
+class PoseBuffer:
+    """
+    Latest pose of every entry of the producer's name table, kept as raw bytes.
+    Binary frames are merged by copying byte ranges (no decoding to Python dicts),
+    and a full frame can be rebuilt for joining viewers.
+    """
+    def __init__(self, table, prev=None, specs=None):
+        """
+        A buffer for a new name table. Entries start from the last known poses, not zeros, so a
+        viewer joining before the producer's next full frame sees the scene where it was:
+        `specs` (the cell's world state objects) first, then `prev` (the previous table's
+        buffer, newer for binary producers) for the names it shares.
+        """
+        self.version = int(table["version"])
+        self.names = list(table["names"])
+        self.index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+        if prev is not None and prev.names == self.names:
+            self.poses, self.visible = prev.poses, prev.visible
+            return
+        self.poses = bytearray(n * POSE_BYTES)
+        self.visible = bytearray(b"\xff" * ((n + 7) // 8))
+        if specs:
+            self.merge_specs({name: specs[name] for name in self.names if name in specs})
+        if prev is not None:
+            for name, j in prev.index.items():
+                i = self.index.get(name)
+                if i is None:
+                    continue
+                self.poses[i * POSE_BYTES:(i + 1) * POSE_BYTES] = prev.poses[j * POSE_BYTES:(j + 1) * POSE_BYTES]
+                if prev.visible[j >> 3] >> (j & 7) & 1:
+                    self.visible[i >> 3] |= 1 << (i & 7)
+                else:
+                    self.visible[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def table(self):
+        return {"version": self.version, "names": self.names}
+
+    def merge(self, buf):
+        """Merge a binary frame. Returns False if it is malformed or for another table version."""
+        try:
+            magic, version, count, flags = FRAME_HEADER.unpack_from(buf)
+        except struct.error:
+            return False
+        n = len(self.names)
+        full = flags & FLAG_FULL
+        off = FRAME_HEADER.size
+        size = off + (0 if full else 4 * count) + POSE_BYTES * count + (count + 7) // 8
+        if magic != FRAME_MAGIC or version != self.version or len(buf) != size or (full and count != n):
+            return False
+
+        mv = memoryview(buf)
+        if full:
+            self.poses[:] = mv[off:off + POSE_BYTES * count]
+            self.visible[:] = mv[off + POSE_BYTES * count:]
+            return True
+
+        indices = mv[off:off + 4 * count].cast("I")
+        if any(i >= n for i in indices):
+            return False
+        pose_off = off + 4 * count
+        vis_off = pose_off + POSE_BYTES * count
+        poses, visible = self.poses, self.visible
+        for k, i in enumerate(indices):
+            p = pose_off + k * POSE_BYTES
+            poses[i * POSE_BYTES:(i + 1) * POSE_BYTES] = mv[p:p + POSE_BYTES]
+            if buf[vis_off + (k >> 3)] >> (k & 7) & 1:
+                visible[i >> 3] |= 1 << (i & 7)
+            else:
+                visible[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+        return True
+
+    def merge_specs(self, payload):
+        """Keep the buffer in sync with poses that arrived as JSON."""
+        for name, spec in payload.items():
+            i = self.index.get(name)
+            if i is None or not isinstance(spec, dict):
+                continue
+            pose = spec.get("pose")
+            if isinstance(pose, (list, tuple)) and len(pose) == 6:
+                try:
+                    struct.pack_into("<6f", self.poses, i * POSE_BYTES, *pose)
+                except (struct.error, TypeError):
+                    pass
+            if spec.get("visible") is True:
+                self.visible[i >> 3] |= 1 << (i & 7)
+            elif spec.get("visible") is False:
+                self.visible[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def full_frame(self):
+        n = len(self.names)
+        return FRAME_HEADER.pack(FRAME_MAGIC, self.version, n, FLAG_FULL) + bytes(self.poses) + bytes(self.visible)
+
+# ---------- cells ----------
+# Each producer (one Workspace = one robot cell) registers under a cell ID (auth={"role":
+# "producer", "cell": ...}) and gets its own state, so cells never overwrite each other.
+# A multiplexed producer (many workspaces over one connection, workspace/async_display.py)
+# passes the cell ID as an extra argument of every upstream_* event instead.
+# Viewers subscribe to a set of cells and only receive their traffic; events to viewers carry
+# the cell ID. Socket.io rooms: "cell:<id>" (subscribed viewers), "producers:<id>".
+DEFAULT_CELL = "default"
+
+class Cell:
+    """State, viewers and in-flight snapshot request of one cell."""
+    def __init__(self, cell_id):
+        self.id = cell_id
+        self.world_state = WorldState()
+        self.pose_buffer = None      # set by the producer's upstream_table (binary producers)
+        self.viewers = {}            # sid -> ViewerQueue
+        self.producers = set()
+        self.snapshot_t = None       # monotonic time of the in-flight snapshot request
+        self._bundle = (-1, None)    # (world_state version, bundle URL)
+        self.room = f"cell:{cell_id}"
+        self.producer_room = f"producers:{cell_id}"
+
+    def meta(self):
+        return {**self.world_state.meta(), "cell": self.id}
+
+    def bundle_url(self):
+        """URL of the mesh bundle for the current state (recomputed only when the state changed)."""
+        version = self.world_state.version
+        if self._bundle[0] != version or self._bundle[1] is not None and not assets.has_bundle(self._bundle[1]):
+            self._bundle = (version, assets.bundle_url(assets.mesh_urls(self.world_state.objects)))
+        return self._bundle[1]
+
+    def table(self):
+        return {**self.pose_buffer.table(), "cell": self.id}
+
+cells = {}            # cell ID -> Cell
+producer_cells = {}   # producer sid -> {cell ID: Cell}, its first cell being the default
+subscriptions = {}    # viewer sid -> set of cell IDs, or None for every cell (including later ones)
+
+async def get_cell(cell_id):
+    """
+    The Cell of a producer's cell ID, created on first use. Only producers create cells: viewers
+    asking for a cell that doesn't exist yet keep it in their subscription and join it here.
+    """
+    cell = cells.get(cell_id)
+    if cell is None:
+        cell = cells[cell_id] = Cell(cell_id)
+        for sid, wanted in list(subscriptions.items()):
+            if wanted is None or cell_id in wanted:
+                await join_cell(sid, cell)
+    return cell
+
+# ---------- per-viewer outbound queues ----------
+# Every viewer gets its own latest-wins queue per subscribed cell, drained by its own sender task,
+# so the producer is ACKed as soon as a frame is merged and a slow viewer only ever falls behind
+# by skipping superseded poses. A queue holds at most one spec per object plus one frame, i.e. it
+# is bounded by the scene size, not by how far the viewer lags. The last event of each batch asks
+# the viewer for an ACK, so the next batch is only sent once the viewer has applied this one.
+ACK_TIMEOUT = 5.0
+RETRY_S = 0.1       # pause before resending a batch that wasn't ACKed
+
+class ViewerQueue:
+    """
+    Pending output of one cell for one viewer.
+
+    JSON updates are merged by object and key (latest wins; a delete replaces the spec).
+    Binary frames are deltas against the cell's pose_buffer, so two pending frames collapse
+    into one full frame built from the buffer when it is actually sent. The buffer also takes
+    the poses of JSON updates, so such a full frame is never older than the pending update;
+    a single delta frame is sent before an update that arrived after it.
+    """
+    def __init__(self, sid, cell):
+        self.sid = sid
+        self.cell = cell
+        self.update = {}
+        self.meta = None         # cell version the pending update brings the viewer to
+        self.frame = None
+        self.frame_full = False
+        self.frame_first = False # the pending delta frame is older than the pending update
+        self.since = None        # monotonic time the oldest pending item was queued
+        self.lag = 0.0           # queue + write time of the last batch (s)
+        self.sent = 0
+        self.coalesced = 0
+        self._wake = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+
+    def _pending(self):
+        if self.since is None:
+            self.since = time.monotonic()
+        self._wake.set()
+
+    @staticmethod
+    def _merge(update, payload):
+        """Merge specs into a pending update (latest wins per key); returns how many were coalesced."""
+        coalesced = 0
+        for name, spec in payload.items():
+            prev = update.get(name)
+            if prev is None:
+                update[name] = spec
+                continue
+            coalesced += 1
+            if isinstance(prev, dict) and isinstance(spec, dict) and not spec.get("delete") and not prev.get("delete"):
+                update[name] = {**prev, **spec}
+            else:
+                update[name] = spec
+        return coalesced
+
+    def push_update(self, payload):
+        self.coalesced += self._merge(self.update, payload)
+        self.meta = self.cell.meta()
+        if self.frame is not None:
+            self.frame_first = True
+        self._pending()
+
+    def push_frame(self, data):
+        if self.frame is not None or self.frame_full:
+            self.coalesced += 1
+            self.frame, self.frame_full = None, True
+        else:
+            self.frame = data
+        self.frame_first = False
+        self._pending()
+
+    @property
+    def backlog(self):
+        """Seconds the oldest pending item has been waiting (0 if nothing is pending)."""
+        return 0.0 if self.since is None else time.monotonic() - self.since
+
+    async def _run(self):
+        cell = self.cell
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            update, meta, frame, full, since = self.update, self.meta, self.frame, self.frame_full, self.since
+            frame_first = self.frame_first
+            self.update, self.frame, self.frame_full, self.frame_first, self.since = {}, None, False, False, None
+            if full and cell.pose_buffer is not None:
+                frame = cell.pose_buffer.full_frame()
+            batch = []
+            if update:
+                batch.append(("scene_update", (update, meta)))
+            if frame is not None:
+                batch.insert(0 if frame_first else len(batch), ("scene_frame", (frame, cell.id)))
+            if not batch:
+                continue
+            try:
+                for k, (event, data) in enumerate(batch):
+                    await _emit(event, data, self.sid, ack=k == len(batch) - 1)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # no ACK in time (or a failed write): only poses are superseded by later frames,
+                # so the specs go back in front of whatever arrived meanwhile and the next frame
+                # is a full one
+                self._requeue(update, frame is not None, since)
+                await asyncio.sleep(RETRY_S)
+                continue
+            self.sent += 1
+            if since is not None:
+                self.lag = time.monotonic() - since
+
+    def _requeue(self, update, had_frame, since):
+        """Put back a batch that wasn't delivered, under anything queued since it was taken."""
+        if update:
+            newer, self.update = self.update, dict(update)
+            self._merge(self.update, newer)
+        if had_frame:
+            self.frame, self.frame_full, self.frame_first = None, True, False
+        if update or had_frame:
+            self.since = since if since is not None else self.since
+            self._pending()
+
+    def close(self):
+        self._task.cancel()
+
+# ---------- snapshot requests ----------
+# Only the cell's producers (room "producers:<id>") get request_snapshot, and at most one
+# request per cell is in flight: later asks are coalesced into it until a snapshot arrives
+# or SNAPSHOT_TIMEOUT passes.
+SNAPSHOT_TIMEOUT = 2.0
+
+async def request_producer_snapshot(cell):
+    now = time.monotonic()
+    t = cell.snapshot_t
+    if t is not None and now - t < SNAPSHOT_TIMEOUT:
+        relay_metrics["snapshot_requests_coalesced"] += 1
+        return
+    cell.snapshot_t = now
+    relay_metrics["snapshot_requests"] += 1
+    await _emit("request_snapshot", {"cell": cell.id}, cell.producer_room, len(cell.producers))
+
+async def send_state(sid, cell, since=None):
+    """
+    Replay a cell's stored state to one viewer: only the objects changed after `since` if the
+    viewer is resyncing from a version still covered by the state, else the full state
+    (pre-encoded, shared by every join at this version).
+    """
+    world_state = cell.world_state
+    delta = world_state.changes_since(since) if since is not None else None
+    meta = cell.meta()
+    if delta is not None:
+        relay_metrics["resyncs_delta"] += 1
+        data = json.dumps(delta, separators=(",", ":")).encode()
+    else:
+        relay_metrics["resyncs_full"] += 1
+        data = world_state.encoded()
+        meta["bundle"] = cell.bundle_url()   # every mesh of the snapshot in one fetch
+    await _emit("scene_snapshot", (data, meta), sid)
+    if cell.pose_buffer is not None:
+        # binary producers: world_state poses may be stale, the buffer is not
+        await _emit("pose_table", cell.table(), sid)
+        await _emit("scene_frame", (cell.pose_buffer.full_frame(), cell.id), sid)
+
+async def join_cell(sid, cell, seen=None):
+    """Start streaming a cell to a viewer; `seen` is the {epoch, version} it last saw of it."""
+    if sid in cell.viewers:
+        return
+    cell.viewers[sid] = ViewerQueue(sid, cell)
+    await sio.enter_room(sid, cell.room)
+    world_state = cell.world_state
+    # A reconnecting viewer only gets what changed since the version it last saw
+    since = None
+    if isinstance(seen, dict) and seen.get("epoch") == world_state.epoch:
+        since = seen.get("version")
+    # If we already have mesh-bearing state, replay it to this viewer only
+    if world_state and world_state.has_mesh:
+        await send_state(sid, cell, since)
+    if not world_state.complete and cell.producers:
+        # Either empty state or pose-only objects -> ask producers for a fresh snapshot
+        await request_producer_snapshot(cell)
+
+async def leave_cell(sid, cell):
+    q = cell.viewers.pop(sid, None)
+    if q is not None:
+        q.close()
+        await sio.leave_room(sid, cell.room)
+
+async def subscribe(sid, wanted, seen=None):
+    """
+    Set a viewer's cells: an iterable of cell IDs, or None for every cell. Cells that don't
+    exist yet are joined once a producer registers them (see get_cell()).
+    """
+    if isinstance(wanted, str):
+        wanted = [wanted]
+    wanted = None if wanted is None else {str(c) for c in wanted}
+    seen = seen if isinstance(seen, dict) else {}
+    subscriptions[sid] = wanted
+    for cell in list(cells.values()):
+        if wanted is not None and cell.id not in wanted:
+            await leave_cell(sid, cell)
+    for cell_id in (list(cells) if wanted is None else sorted(wanted)):
+        cell = cells.get(cell_id)
+        if cell is not None:
+            await join_cell(sid, cell, seen.get(cell_id))
+
+async def add_producer(sid, cell_id=None):
+    """
+    Register a producer under a cell; returns the Cell. Without cell_id: the producer's
+    first cell (from its auth, or the first event), DEFAULT_CELL if it has none yet.
+    """
+    own = producer_cells.get(sid)
+    if own is None:
+        own = producer_cells[sid] = {}
+        producers.add(sid)
+        # a producer that connected without auth was taken for a viewer
+        subscriptions.pop(sid, None)
+        for c in cells.values():
+            await leave_cell(sid, c)
+    if cell_id is None:
+        if own:
+            return next(iter(own.values()))
+        cell_id = DEFAULT_CELL
+    cell = own.get(str(cell_id))
+    if cell is None:
+        cell = own[str(cell_id)] = await get_cell(str(cell_id))
+        cell.producers.add(sid)
+        await sio.enter_room(sid, cell.producer_room)
+    return cell
 
 # ---------- socket.io events ----------
 @sio.event
-async def upstream_update(sid, payload):
+async def upstream_update(sid, payload, cell_id=None):
     """
-    Producers push pose frames and (occasionally) full snapshots.
+    Producers push pose frames (full or delta) and (occasionally) full snapshots.
     If we see a brand-new object *without* mesh info, immediately request a snapshot to heal state.
     """
+    _count("upstream_update", payload)
+    cell = await add_producer(sid, cell_id)
+    world_state = cell.world_state
     need_snapshot = False
+    has_mesh = False
 
     # Check if this payload introduces any new objects without meshes
     for name, spec in payload.items():
-        prev = world_state.get(name)
-        if prev is None and not _has_mesh_info(spec):
+        if _has_mesh_info(spec):
+            has_mesh = True
+            if "meshUrl" in spec:
+                assets.rewrite(spec)   # content-hashed, cacheable URL (+ LODs)
+        elif name not in world_state:
             # First time we hear about this object and there's no mesh info -> we need a snapshot
             need_snapshot = True
+    if has_mesh:
+        cell.snapshot_t = None   # snapshot answered
 
-    # Merge then fan out
-    merge_into_state(world_state, payload)
-    await sio.emit("scene_update", payload)
+    # Merge then fan out (queued per viewer; the ACK below does not wait for slow viewers)
+    world_state.merge(payload)
+    if cell.pose_buffer is not None:
+        cell.pose_buffer.merge_specs(payload)
+    for q in cell.viewers.values():
+        q.push_update(payload)
 
     # Ask producers for a full snapshot if needed
     if need_snapshot:
-        await sio.emit("request_snapshot")
+        await request_producer_snapshot(cell)
 
     return "ok"  # ACK for producer timing
 
+@sio.event
+async def upstream_table(sid, table, cell_id=None):
+    """Binary producers send their name table with each snapshot; frames index into it."""
+    _count("upstream_table", table)
+    cell = await add_producer(sid, cell_id)
+    try:
+        cell.pose_buffer = PoseBuffer(table, prev=cell.pose_buffer, specs=cell.world_state.objects)
+    except (KeyError, TypeError, ValueError):
+        return "error"
+    await _emit("pose_table", cell.table(), cell.room, len(cell.viewers))
+    return "ok"
+
+@sio.event
+async def upstream_frame(sid, data, cell_id=None):
+    """
+    Binary pose frames: merged into the cell's pose_buffer as raw bytes and relayed unchanged.
+    Frames for an older table version are dropped; with no table at all we ask for a snapshot.
+    """
+    _count("upstream_frame", data)
+    cell = await add_producer(sid, cell_id)
+    if cell.pose_buffer is None:
+        await request_producer_snapshot(cell)
+        return "ok"
+    if cell.pose_buffer.merge(data):
+        for q in cell.viewers.values():
+            q.push_frame(data)
+    return "ok"  # ACK for producer timing
+
+@sio.event
+async def producer_metrics(sid, snapshot, cell_id=None):
+    """Producers push their hot-path timers/counters (workspace/metrics.py) for /metrics."""
+    _count("producer_metrics", snapshot)
+    cell = await add_producer(sid, cell_id)
+    if isinstance(snapshot, dict):
+        producer_stats[(sid, cell.id)] = snapshot
+
 @sio.event
 async def connect(sid, environ, auth):
     print("connect", sid)
-    # If we already have mesh-bearing state, replay it to this viewer only
-    if world_state and world_has_any_mesh():
-        await sio.emit("scene_update", world_state, room=sid)
-    else:
-        # Either empty state or pose-only state -> ask producers for a fresh snapshot
-        await sio.emit("request_snapshot")
+    _count("connect")
+    clients.add(sid)
+    auth = auth if isinstance(auth, dict) else {}
+    if auth.get("role") == "producer":
+        # producers answer snapshot requests; they don't need the state replayed.
+        # A multiplexed producer lists its cells ({"cells": [...]}), later ones register on first event
+        for cell_id in auth.get("cells") or [auth.get("cell")]:
+            await add_producer(sid, cell_id)
+        return
+    # viewers: auth {"cells": [...], "seen": {cell: {epoch, version}}}; no "cells" = every cell
+    await subscribe(sid, auth.get("cells"), auth.get("seen"))
+
+@sio.event
+async def subscribe_cells(sid, data=None):
+    """Viewer changes its cell subscription at runtime: {"cells": [...] or null, "seen": {...}}."""
+    _count("subscribe_cells", data)
+    data = data if isinstance(data, dict) else {}
+    await subscribe(sid, data.get("cells"), data.get("seen"))
+    wanted = subscriptions.get(sid)
+    return sorted(cells if wanted is None else wanted)
 
 @sio.event
-async def request_snapshot(sid):
-    # Forward viewer's request to all producers
-    await sio.emit("request_snapshot")
+async def request_snapshot(sid, data=None):
+    # Viewer asks for a snapshot of its cells (or {"cell": id}): serve it from the stored state
+    # when that is complete, otherwise forward a (single-flight) request to the cell's producers
+    _count("request_snapshot", data)
+    wanted = [data["cell"]] if isinstance(data, dict) and "cell" in data else None
+    for cell in list(cells.values()):
+        if sid not in cell.viewers or (wanted is not None and cell.id not in wanted):
+            continue
+        if cell.world_state.complete:
+            await send_state(sid, cell)
+        else:
+            await request_producer_snapshot(cell)
 
 @sio.event
 async def disconnect(sid):
     print("disconnect", sid)
+    _count("disconnect")
+    clients.discard(sid)
+    producers.discard(sid)
+    for cell in producer_cells.pop(sid, {}).values():
+        cell.producers.discard(sid)
+        producer_stats.pop((sid, cell.id), None)
+    subscriptions.pop(sid, None)
+    for cell in cells.values():
+        q = cell.viewers.pop(sid, None)
+        if q is not None:
+            q.close()
 
 # ---------- entry ----------
 if __name__ == "__main__":
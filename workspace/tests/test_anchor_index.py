@@ -0,0 +1,53 @@
+# tests/test_anchor_index.py
+import numpy as np
+
+from workspace.anchor_index import AnchorIndex
+from workspace.spatial import PointGrid
+
+
+def _index(xyz, types, cell=25.0):
+    index = AnchorIndex(cell)
+    index.refs = list(range(len(xyz)))
+    index.types = np.array(types, dtype=object)
+    index.xyz = np.asarray(xyz, dtype=float)
+    index.grid = PointGrid(cell)
+    index.grid.update(np.arange(len(xyz)), index.xyz)
+    return index
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(0)
+    xyz = np.r_[rng.uniform(-500, 500, (400, 3)), rng.normal(0, 5, (100, 3))]   # sparse + a cluster
+    types = rng.choice(["a", "b"], len(xyz))
+    index = _index(xyz, types)
+    queries = np.r_[rng.uniform(-700, 700, (50, 3)), [[0, 0, 0], [2000, 0, 0]]]
+    for k, t, max_dist in [(1, None, np.inf), (5, None, np.inf), (3, "b", np.inf), (4, None, 60.0)]:
+        dist, ids = index.nearest(queries, k=k, types=t, max_dist=max_dist)
+        for q, p in enumerate(queries):
+            d = np.linalg.norm(xyz - p, axis=1)
+            ok = (d <= max_dist) & (True if t is None else types == t)
+            ref = np.sort(d[ok])[:k]
+            np.testing.assert_allclose(dist[q, :len(ref)], ref)
+            assert np.all(np.isinf(dist[q, len(ref):])) and np.all(ids[q, len(ref):] == -1)
+            np.testing.assert_allclose(np.linalg.norm(xyz[ids[q, :len(ref)]] - p, axis=1), ref)
+
+
+def test_radius_and_box_match_brute_force():
+    rng = np.random.default_rng(1)
+    xyz = rng.uniform(-300, 300, (500, 3))
+    index = _index(xyz, ["a"] * len(xyz))
+    for p in rng.uniform(-300, 300, (20, 3)):
+        d = np.linalg.norm(xyz - p, axis=1)
+        (got,) = index.radius(p, 40.0)
+        assert sorted(got.tolist()) == np.flatnonzero(d <= 40.0).tolist()
+        lo, hi = p - [50, 20, 80], p + [30, 60, 10]
+        inside = np.flatnonzero(np.all((xyz >= lo) & (xyz <= hi), axis=1))
+        assert sorted(index.box(lo, hi).tolist()) == inside.tolist()
+
+
+def test_point_grid_moves():
+    grid = PointGrid(10.0)
+    grid.update([0, 1], [[1, 1, 1], [100, 100, 100]])
+    grid.update([1], [[2, 2, 2]])
+    assert grid.query_ring([0, 0, 0], 0).tolist() == [0, 1]
+    assert grid.query_box([50, 50, 50], [150, 150, 150]).tolist() == []
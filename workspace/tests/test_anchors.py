@@ -0,0 +1,97 @@
+# tests/test_anchors.py
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from workspace import Workspace
+from workspace.anchors import GridAnchors, anchor_T
+from workspace.scene import xyzabc_to_T_batch
+
+
+def test_name_cell_roundtrip():
+    grid = GridAnchors(8, 12, (9.0, 8.5), (10, 100, 3), extras={"center": [50, 50, 0, 0, 0, 90]})
+    names = list(grid)
+    assert len(names) == len(grid) == 8 * 12 + 1
+    assert names[0] == "A1" and names[8 * 12 - 1] == "H12" and names[-1] == "center"
+    for k, name in enumerate(names[:-1]):
+        r, c = grid.cell(name)
+        assert f"{chr(ord('A') + r)}{c + 1}" == name
+        assert grid.index(name) == k
+        assert grid[name] == [10 + c * 9.0, 100 - r * 8.5, 3.0, 0.0, 0.0, 0.0]
+    assert grid.index("center") == 8 * 12
+
+
+@pytest.mark.parametrize("name", ["I1", "A0", "A13", "A01", "a1", "A", "", "center2"])
+def test_not_in_grid(name):
+    grid = GridAnchors(8, 12, 9.0, (0, 0, 0), extras={"center": [0] * 6})
+    assert name not in grid
+    with pytest.raises(KeyError):
+        grid[name]
+
+
+def test_T_matches_dict_anchors():
+    grid = GridAnchors(3, 4, 9.0, (1, 2, 3), extras={"corner": [5, 6, 7, 10, 20, 30]})
+    plain = dict(grid.items())
+    names = ["C4", "corner", "A1", "B2"]
+    np.testing.assert_allclose(anchor_T([grid] * 4, names), anchor_T([plain] * 4, names))
+    np.testing.assert_allclose(grid.T, xyzabc_to_T_batch([grid[n] for n in grid]))
+
+
+def test_shared():
+    a = GridAnchors.shared(8, 12, 9.0, (0, 0, 0))
+    assert GridAnchors.shared(8, 12, 9.0, [0, 0, 0]) is a
+    assert GridAnchors.shared(8, 12, 4.5, (0, 0, 0)) is not a
+
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
+
+
+@pytest.fixture
+def ws():
+    ws = Workspace(str(CONFIG), start_display=False, cache=False, connect_timeout=0.1)
+    yield ws
+    ws.stop()
+
+
+def _world(ws, comp, solid, anchor):
+    s = ws.components[comp].assembly[solid]
+    scene = ws._scene
+    return scene.world[scene.index[id(s)]] @ anchor_T([s.anchors], [anchor])[0]
+
+
+def test_anchor_refs(ws):
+    T = ws.anchor_world_T([("microplate_1", "microplate", "C7"), "microplate_1.C7",
+                           ["tool_rack_1", "tool_connection"], "core.rail_base.hole_2"])
+    assert T.shape == (4, 4, 4)
+    np.testing.assert_allclose(T[0], _world(ws, "microplate_1", "microplate", "C7"))
+    np.testing.assert_allclose(T[1], T[0])
+    np.testing.assert_allclose(T[2], _world(ws, "tool_rack_1", "tool_rack", "tool_connection"))
+    np.testing.assert_allclose(T[3], _world(ws, "core", "rail_base", "hole_2"))
+    np.testing.assert_allclose(ws.anchor_world_xyzabc(["microplate_1.C7"])[0],
+                               ws._scene.xyzabc(T[:1])[0])
+
+
+def test_ambiguous_anchor_ref(ws):
+    assert ws._parse_anchor_ref("microtube_gripper_1.gripping_point") == \
+        ("microtube_gripper_1", "microtube_gripper", "gripping_point")
+    with pytest.raises(KeyError, match="on 6 solids"):
+        ws.anchor_world_T(["core.A1"])              # every plate of the core has A1
+    with pytest.raises(KeyError, match="on 0 solids"):
+        ws.anchor_world_T(["core.nope"])
+    with pytest.raises(ValueError):
+        ws.anchor_world_T(["a.b.c.d"])
+
+
+def test_anchor_plan_follows_recompile(ws):
+    refs = ["microplate_1.C7", "tool_rack_1.tool_connection"]
+    before = ws.anchor_world_T(refs)
+    key = tuple(refs)
+    old_scene = ws._anchor_plans[key][0]
+    ws.anchor_world_T(refs)
+    assert ws._anchor_plans[key][0] is old_scene     # cached while the scene stands
+
+    ws.invalidate_scene()
+    after = ws.anchor_world_T(refs)
+    assert ws._scene is not old_scene and ws._anchor_plans[key][0] is ws._scene
+    np.testing.assert_allclose(after, before)
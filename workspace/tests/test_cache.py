@@ -0,0 +1,84 @@
+# tests/test_cache.py
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from workspace import Workspace
+from workspace.cache import WorkspaceCache
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
+
+
+def _ws(**kwargs):
+    return Workspace(str(CONFIG), start_display=False, connect_timeout=0.1, **kwargs)
+
+
+def test_store_keeps_most_recently_used(tmp_path):
+    cache = WorkspaceCache(tmp_path, keep=3)
+    for i, key in enumerate("abcd"):
+        assert cache.store(key, {"c": {"type": "core", "n": i}}, {"x": np.arange(i)})
+        os.utime(cache.file(key), (1000 + i, 1000 + i))     # a oldest ... d newest
+    assert sorted(p.stem for p in tmp_path.glob("*.npz")) == ["b", "c", "d"]
+
+    cfgs, arrays = cache.load("b")                           # b becomes the most recent
+    assert cfgs == {"c": {"type": "core", "n": 1}} and arrays["x"].tolist() == [0]
+    cache.store("e", {}, {})
+    assert sorted(p.stem for p in tmp_path.glob("*.npz")) == ["b", "d", "e"]
+    assert cache.load("c") is None
+
+
+def test_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKSPACE_CACHE_DIR", str(tmp_path))
+    ws = _ws()
+    ws.stop()
+    assert ws.cache is None and not list(tmp_path.iterdir())
+
+
+def test_entries_hold_plain_arrays(tmp_path):
+    _ws(cache=True, cache_dir=tmp_path).stop()
+    (entry,) = tmp_path.glob("*.npz")
+    with np.load(entry, allow_pickle=False) as npz:
+        assert all(npz[name].dtype != object for name in npz.files)
+
+
+def test_cache_hit_matches_cold_build(tmp_path):
+    cold = _ws(cache=True, cache_dir=tmp_path)
+    try:
+        assert "cache_store" in cold.startup_profile
+        expected = cold.compute_world_poses()
+    finally:
+        cold.stop()
+    hot = _ws(cache=True, cache_dir=tmp_path)
+    try:
+        assert "config" not in hot.startup_profile and "scene_cached" in hot.startup_profile
+        poses = hot.compute_world_poses()
+        # the adopted scene tracks the new solids like a compiled one
+        plate = hot.components["microplate_2"].assembly["microplate"]
+        plate.attach_to(parent=plate.parent, parent_anchor="center", child_anchor="center", offset=[5, 0, 0, 0, 0, 0])
+        moved = hot.compute_world_poses()["microplate_2_microplate"]
+    finally:
+        hot.stop()
+    assert poses.keys() == expected.keys()
+    for key, pose in expected.items():
+        assert poses[key] == pytest.approx(pose)
+    assert moved != poses["microplate_2_microplate"]
+
+
+def test_cached_transform_that_differs_is_recomputed(tmp_path):
+    _ws(cache=True, cache_dir=tmp_path).stop()
+    (entry,) = tmp_path.glob("*.npz")
+    with np.load(entry, allow_pickle=False) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+    arrays["local"][-1, 0, 3] += 100.0      # stale entry
+    np.savez(entry, **arrays)
+    hot = _ws(cache=True, cache_dir=tmp_path)
+    try:
+        poses = hot.compute_world_poses()
+        hot.invalidate_scene()
+        truth = hot.compute_world_poses()
+    finally:
+        hot.stop()
+    for key, pose in truth.items():
+        assert poses[key] == pytest.approx(pose)
@@ -0,0 +1,88 @@
+# tests/test_clearance.py
+import numpy as np
+from dorna2 import Solid
+
+from workspace.clearance import Clearance
+from workspace.scene import CompiledScene
+from workspace.spatial import BoxGrid
+
+ORIGIN = [0, 0, 0, 0, 0, 0]
+CUBE = (np.full(3, -10.0), np.full(3, 10.0))     # every "cube" mesh: 20 mm
+
+
+class Comp:
+    def __init__(self, assembly, moving=()):
+        self.assembly = assembly
+        self.moving = list(moving)
+
+
+def _cell():
+    """A link on a base (parent/child, overlapping) with a tool 75 mm out, and an obstacle at x=100."""
+    base = Solid(name="base", type="cube", anchors={"o": ORIGIN})
+    link = Solid(name="link", type="cube", anchors={"o": ORIGIN, "tip": [75, 0, 0, 0, 0, 0]})
+    tool = Solid(name="tool", type="cube", anchors={"o": ORIGIN})
+    link.attach_to(parent=base, parent_anchor="o", child_anchor="o")
+    tool.attach_to(parent=link, parent_anchor="tip", child_anchor="o")
+    floor = Solid(name="floor", type="nomesh", anchors={"o": ORIGIN, "spot": [100, 0, 0, 0, 0, 0]})
+    obstacle = Solid(name="obstacle", type="cube", anchors={"o": ORIGIN})
+    obstacle.attach_to(parent=floor, parent_anchor="spot", child_anchor="o")
+    components = {"robot": Comp({"base": base, "link": link, "tool": tool}, moving=[link]),
+                  "deck": Comp({"floor": floor, "obstacle": obstacle})}
+    clearance = Clearance(cad_dir="/nonexistent")
+    clearance._mesh_boxes.update(cube=CUBE, nomesh=None)
+    scene = CompiledScene(components)
+    clearance.update(components, scene)
+    return components, scene, clearance
+
+
+def test_link_within_margin():
+    _, _, clearance = _cell()
+    # tool box [65, 85] vs obstacle [90, 110]: 5 mm
+    near = clearance.near(margin=10.0)
+    assert [(a, b) for a, b, _ in near] == [("robot_tool", "deck_obstacle")]
+    assert near[0][2] == 5.0
+    assert clearance.near(margin=4.0) == []
+    assert clearance.min_distances()["robot_tool"] == ("deck_obstacle", 5.0)
+
+
+def test_adjacent_links_are_excluded():
+    _, _, clearance = _cell()
+    # the link overlaps its parent (the base) by design: never reported
+    assert clearance.overlaps() == []
+    pairs = {frozenset((a, b)) for a, b, _ in clearance.near(margin=1000.0)}
+    assert frozenset(("robot_link", "robot_base")) not in pairs
+    assert frozenset(("robot_tool", "robot_base")) in pairs      # grandparent: still checked
+
+
+def test_moving_into_an_obstacle():
+    components, scene, clearance = _cell()
+    link = components["robot"].assembly["link"]
+    link.attach_to(parent=link.parent, parent_anchor="o", child_anchor="o", offset=[10, 0, 0, 0, 0, 0])
+    scene.update([link])
+    clearance.update(components, scene)
+    assert clearance.overlaps() == [("robot_tool", "deck_obstacle")]
+    clearance.ignore = {frozenset(("robot_tool", "deck_obstacle"))}
+    assert clearance.overlaps() == []
+
+
+def test_box_grid_candidates_cover_brute_force():
+    rng = np.random.default_rng(2)
+    lo = rng.uniform(-1000, 1000, (300, 3))
+    hi = lo + rng.uniform(1, 150, (300, 3))
+    hi[:3] = lo[:3] + 1500              # a few oversized boxes
+    grid = BoxGrid(cell=100.0, max_cells=64)
+    grid.update(np.arange(300), lo, hi)
+    assert len(grid.large) == 3
+    # move some boxes, drop others
+    lo[10:20] += 400
+    hi[10:20] += 400
+    grid.update(np.arange(10, 20), lo[10:20], hi[10:20])
+    grid.remove([20, 21])
+    live = np.setdiff1d(np.arange(300), [20, 21])
+    for _ in range(30):
+        q_lo = rng.uniform(-1000, 1000, 3)
+        q_hi = q_lo + rng.uniform(1, 300, 3)
+        hit = live[np.all((lo[live] <= q_hi) & (hi[live] >= q_lo), axis=1)]
+        cand = grid.query(q_lo, q_hi)
+        assert set(hit.tolist()) <= set(cand.tolist())
+        assert not {20, 21} & set(cand.tolist())
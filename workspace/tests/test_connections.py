@@ -0,0 +1,106 @@
+import threading, time
+
+from workspace.connections import Connection
+
+
+class FakeDevice:
+    """connect() blocks until `release` is set; records what was used and closed."""
+
+    def __init__(self, block=False):
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self.opened, self.used, self.closed = [], [], []
+        self.live = True
+
+    def connect(self):
+        self.release.wait()
+        handle = object()
+        self.opened.append(handle)
+        return handle
+
+    def use(self, handle):
+        self.used.append(handle)
+
+    def is_connected(self):
+        return self.live
+
+    def disconnect(self, handle=None):
+        if handle is not None:
+            self.closed.append(handle)
+        elif self.used:
+            self.closed.append(self.used[-1])
+
+
+def test_late_connect_is_closed_not_used():
+    dev = FakeDevice(block=True)
+    conn = Connection("dev", dev, timeout=0.05, backoff_s=10.0)
+    assert conn._attempt() is False and conn.error == "timeout"
+    dev.release.set()
+    conn._helper.join(1.0)
+    assert dev.used == []
+    assert dev.closed == dev.opened and len(dev.opened) == 1
+
+
+def test_lost_connection_reconnects():
+    dev = FakeDevice()
+    conn = Connection("dev", dev, timeout=1.0, backoff_s=0.01, check_s=0.01).start()
+    try:
+        assert conn.wait(1.0)
+        dev.live = False
+        end = time.perf_counter() + 2.0
+        while len(dev.used) < 2 and time.perf_counter() < end:
+            if dev.closed:
+                dev.live = True
+            time.sleep(0.01)
+        assert len(dev.used) >= 2
+        assert dev.closed[0] is dev.used[0]
+    finally:
+        conn.stop()
+
+
+class QuietFeed:
+    """push_age() under test control; probe() answers only if `answers`."""
+
+    def __init__(self):
+        self.age, self.probes, self.answers = float("inf"), 0, True
+
+    def push_age(self):
+        return self.age
+
+    def probe(self):
+        self.probes += 1
+        return self.answers
+
+
+def test_idle_controller_is_probed_not_dropped(monkeypatch):
+    from workspace.components import core as core_mod
+    core = core_mod.Core("core", {"ip": "1.2.3.4", "lost_s": 2.0})
+    feed = core.joint_feed = QuietFeed()
+    now = [100.0]
+    monkeypatch.setattr(core_mod.time, "perf_counter", lambda: now[0])
+
+    feed.age = 0.5
+    assert core.is_connected() and feed.probes == 0
+    feed.age = 3.0                       # idle: probe once, stay live while waiting
+    assert core.is_connected() and feed.probes == 1
+    now[0] += 1.0
+    feed.age = 4.0
+    assert core.is_connected() and feed.probes == 1
+    now[0] += 0.5
+    feed.age = 0.2                       # the answer arrived
+    assert core.is_connected()
+    now[0] += 3.0
+    feed.age = 3.2                       # quiet again: a new probe
+    assert core.is_connected() and feed.probes == 2
+    now[0] += 2.5
+    feed.age = 5.7                       # unanswered for lost_s: lost
+    assert not core.is_connected() and feed.probes == 2
+
+
+def test_probe_that_cant_be_sent_is_lost():
+    from workspace.components.core import Core
+    core = Core("core", {"ip": "1.2.3.4"})
+    core.joint_feed = QuietFeed()
+    core.joint_feed.answers = False
+    assert not core.is_connected()
@@ -0,0 +1,152 @@
+# tests/test_display.py
+import asyncio, threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from workspace import Workspace
+from workspace.async_display import AsyncDisplay, DisplayHub
+from workspace.display import Display, DisplayBase
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
+
+
+class FakeWorkspace:
+    """Records the thread compute_world_poses() runs on."""
+
+    def __init__(self):
+        self.components = {}
+        self.threads = set()
+
+    def compute_world_poses(self):
+        self.threads.add(threading.current_thread())
+        return {"a": [0.0] * 6}
+
+
+class PoseWorkspace:
+    """Two solids whose poses the test moves by hand."""
+
+    def __init__(self):
+        solids = {"a": SimpleNamespace(type="cube"), "b": SimpleNamespace(type="cube")}
+        self.components = {"c": SimpleNamespace(assembly=solids)}
+        self.poses = {"c_a": [0.0] * 6, "c_b": [100.0, 0, 0, 0, 0, 0]}
+
+    def compute_world_poses(self):
+        return {name: list(p) for name, p in self.poses.items()}
+
+
+class FakeClient:
+    """socketio.Client stand-in: records emits and holds their ACK callbacks."""
+
+    def __init__(self):
+        self.connected = True
+        self.sent = []
+
+    def emit(self, event, data=None, callback=None):
+        self.sent.append((event, data, callback))
+
+
+def _display():
+    display = Display(PoseWorkspace(), keyframe_s=1.0)
+    display.sio = FakeClient()
+    display._prepare_snapshot()
+    return display
+
+
+def test_idle_frames_are_empty():
+    display = _display()
+    assert display._build_pose_frame() == {}
+    display.workspace.poses["c_a"][0] += 0.005         # below pos_eps
+    assert display._build_pose_frame() == {}
+    display.workspace.poses["c_a"][0] += 1.0
+    assert list(display._build_pose_frame()) == ["c_a"]
+    assert display._build_pose_frame() == {}
+
+
+def test_keyframe_resends_every_pose():
+    display = _display()
+    assert display._build_pose_frame() == {}
+    display._last_keyframe -= display.keyframe_s
+    assert sorted(display._build_pose_frame()) == ["c_a", "c_b"]
+    assert display._build_pose_frame() == {}
+
+
+def test_snapshot_resets_the_baseline():
+    display = _display()
+    display.workspace.poses["c_b"][2] = 50.0
+    snapshot, _ = display._prepare_snapshot()
+    assert snapshot["c_b"]["pose"][2] == 50.0
+    assert display._last_sent["c_b"][2] == 50.0
+    assert display._build_pose_frame() == {}          # already sent with the snapshot
+
+
+def test_emit_coalesces_while_a_send_is_in_flight():
+    display = _display()
+    sio = display.sio
+    display._emit_update({"c_a": {"pose": [1.0] * 6, "visible": True}})
+    display._emit_update({"c_a": {"pose": [2.0] * 6}, "c_b": {"visible": False}})
+    display._emit_update({"c_b": {"pose": [3.0] * 6}})
+    assert len(sio.sent) == 1 and display._inflight
+    assert display._pending == {"c_a": {"pose": [2.0] * 6},
+                                "c_b": {"visible": False, "pose": [3.0] * 6}}
+    sio.sent[0][2]()                                  # ACK: the merged frame goes out
+    assert len(sio.sent) == 2 and display._pending is None
+    assert sio.sent[1][1] == {"c_a": {"pose": [2.0] * 6},
+                              "c_b": {"visible": False, "pose": [3.0] * 6}}
+    sio.sent[1][2]()
+    assert not display._inflight
+    assert display.metrics.snapshot()["counters"]["frames_coalesced"] == 2
+
+
+def test_display_base_is_abstract():
+    with pytest.raises(TypeError):
+        DisplayBase(FakeWorkspace())
+
+
+def test_frames_are_built_off_the_loop():
+    ws = FakeWorkspace()
+    display = AsyncDisplay(ws, DisplayHub(), fps=200)
+
+    async def main():
+        display._wake = asyncio.Event()
+        task = asyncio.ensure_future(display._frame_loop())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(main())
+    assert ws.threads and loop_thread not in ws.threads
+    assert all(t.name.startswith("display-hub") for t in ws.threads)
+    assert display.metrics.snapshot()["counters"].get("errors_frame", 0) == 0
+
+
+def test_hub_pool_is_bounded():
+    hub = DisplayHub(workers=2)
+    workspaces = [FakeWorkspace() for _ in range(8)]
+    displays = [AsyncDisplay(ws, hub, fps=200, cell=f"c{i}") for i, ws in enumerate(workspaces)]
+
+    async def main():
+        for display in displays:
+            display._wake = asyncio.Event()
+        tasks = [asyncio.ensure_future(display._frame_loop()) for display in displays]
+        await asyncio.sleep(0.1)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(main())
+    hub.stop()
+    threads = set().union(*(ws.threads for ws in workspaces))
+    assert all(ws.threads for ws in workspaces) and len(threads) <= 2
+
+
+def test_workspace_forwards_display_kwargs():
+    ws = Workspace(str(CONFIG), start_display=False, cache=False, connect_timeout=0.1, cell="c1",
+                   display_hub=DisplayHub(), display_kwargs={"fps": 30, "binary": True})
+    try:
+        assert isinstance(ws.display, AsyncDisplay)
+        assert (ws.display.fps, ws.display.binary, ws.display.cell) == (30, True, "c1")
+    finally:
+        ws.stop()
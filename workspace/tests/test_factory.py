@@ -0,0 +1,58 @@
+# tests/test_factory.py
+import os, subprocess, sys
+from types import SimpleNamespace
+
+import pytest
+
+from workspace.components import factory
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_builtin_modules_are_not_imported_up_front():
+    code = ("import sys; from workspace.components import factory; "
+            "print(sorted(m for m in factory._modules.values() if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=os.environ,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_module_is_imported_on_first_use(tmp_path, monkeypatch):
+    (tmp_path / "lazy_widget.py").write_text(
+        "from workspace.components.factory import register\n\n"
+        "@register('widget')\n"
+        "class Widget:\n"
+        "    def __init__(self, name, cfg):\n"
+        "        self.name, self.cfg = name, cfg\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setitem(factory._modules, "widget", "lazy_widget")
+    monkeypatch.setattr(factory, "_registry", dict(factory._registry))
+    monkeypatch.delitem(sys.modules, "lazy_widget", raising=False)
+
+    assert "widget" in factory.known_types()
+    assert "lazy_widget" not in sys.modules
+    widget = factory.create_component("w1", {"type": "widget"})
+    assert "lazy_widget" in sys.modules
+    assert (type(widget).__name__, widget.name) == ("Widget", "w1")
+
+
+def test_entry_point_plugins_resolve(monkeypatch):
+    class Decapper:
+        def __init__(self, name, cfg):
+            self.name = name
+
+    loaded = []
+
+    def fake_entry_points(group):
+        assert group == factory.ENTRY_POINT_GROUP
+        return [SimpleNamespace(name="decapper", load=lambda: loaded.append(1) or Decapper)]
+
+    monkeypatch.setattr(factory, "entry_points", fake_entry_points)
+    monkeypatch.setattr(factory, "_registry", dict(factory._registry))
+
+    assert "decapper" in factory.known_types() and not loaded
+    assert isinstance(factory.create_component("d", {"type": "decapper"}), Decapper)
+    factory.create_component("d2", {"type": "decapper"})
+    assert loaded == [1]                         # loaded once, then taken from the registry
+    with pytest.raises(ValueError, match="Unknown component type"):
+        factory.create_component("x", {"type": "nope"})
@@ -0,0 +1,80 @@
+# tests/test_glb.py
+import numpy as np
+
+from workspace import glb
+
+
+def _box(n=12, size=(4.0, 2.0, 1.0)):
+    """Closed box surface, every face split into n x n quads, flat normals (duplicated vertices)."""
+    pos, nrm, tris = [], [], []
+    s = np.asarray(size) / 2
+    for axis in range(3):
+        for sign in (-1.0, 1.0):
+            u, v = [a for a in range(3) if a != axis]
+            g = np.linspace(-1, 1, n + 1)
+            uu, vv = np.meshgrid(g, g, indexing="ij")
+            p = np.zeros((n + 1, n + 1, 3))
+            p[..., axis] = sign * s[axis]
+            p[..., u], p[..., v] = uu * s[u], vv * s[v]
+            base = sum(len(x) for x in pos)
+            pos.append(p.reshape(-1, 3))
+            nrm.append(np.tile(np.eye(3)[axis] * sign, ((n + 1) ** 2, 1)))
+            i = np.arange(n)[:, None] * (n + 1) + np.arange(n)[None, :]
+            q = np.stack([i, i + n + 1, i + n + 2, i + 1], -1).reshape(-1, 4) + base
+            tris += [q[:, [0, 1, 2]], q[:, [0, 2, 3]]]
+    return np.concatenate(pos), np.concatenate(nrm), np.concatenate(tris)
+
+
+def _glb(scale=10.0):
+    pos, nrm, tris = _box()
+    count = len(pos)
+    joints = np.tile(np.array([1, 2, 0, 0], np.uint8), (count, 1))
+    color = np.tile(np.array([255, 128, 0, 255], np.uint8), (count, 1))
+    arrays = [(pos.astype(np.float32), 5126, "VEC3"), (nrm.astype(np.float32), 5126, "VEC3"),
+              (joints, 5121, "VEC4"), (color, 5121, "VEC4"), (tris.reshape(-1).astype(np.uint16), 5123, "SCALAR")]
+    blob, views, accessors = bytearray(), [], []
+    for arr, ctype, kind in arrays:
+        blob.extend(b"\0" * (-len(blob) % 4))
+        views.append({"buffer": 0, "byteOffset": len(blob), "byteLength": arr.nbytes})
+        blob.extend(arr.tobytes())
+        accessors.append({"bufferView": len(views) - 1, "componentType": ctype, "count": len(arr), "type": kind})
+    accessors[0]["min"], accessors[0]["max"] = pos.min(0).tolist(), pos.max(0).tolist()
+    accessors[3]["normalized"] = True
+    gltf = {
+        "asset": {"version": "2.0"},
+        "scene": 0, "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "scale": [scale] * 3}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1, "JOINTS_0": 2, "COLOR_0": 3},
+                                    "indices": 4}]}],
+        "accessors": accessors, "bufferViews": views, "buffers": [{"byteLength": len(blob)}],
+    }
+    return glb.write_glb(gltf, blob)
+
+
+def test_decimate_keeps_shape_in_scene_units():
+    src = _glb(scale=10.0)
+    lo, hi = glb.bounds(src)
+    np.testing.assert_allclose(hi - lo, [40, 20, 10])
+    cell = 4.0      # scene units (the mesh itself is in units of 10)
+    data, count = glb.decimate(src, cell)
+    assert count < len(glb.triangles(src)) / 4
+    lo2, hi2 = glb.bounds(data)
+    np.testing.assert_allclose(lo2, lo, atol=1e-4)
+    np.testing.assert_allclose(hi2, hi, atol=1e-4)
+    assert glb.hausdorff(glb.triangles(src), glb.triangles(data), 2 * cell) < cell
+
+
+def test_decimate_keeps_component_types():
+    gltf, _ = glb.read_glb(glb.decimate(_glb(), 4.0)[0])
+    attrs = gltf["meshes"][0]["primitives"][0]["attributes"]
+    acc = {name: gltf["accessors"][i] for name, i in attrs.items()}
+    assert acc["POSITION"]["componentType"] == 5126
+    assert acc["JOINTS_0"]["componentType"] == 5121 and not acc["JOINTS_0"].get("normalized")
+    assert acc["COLOR_0"]["componentType"] == 5121 and acc["COLOR_0"]["normalized"] is True
+
+
+def test_nearest_distance_matches_brute_force():
+    rng = np.random.default_rng(3)
+    a, b = rng.random((500, 3)) * 10, rng.random((800, 3)) * 10
+    brute = np.sqrt(((a[:, None] - b[None]) ** 2).sum(-1)).min(1)
+    np.testing.assert_allclose(glb.nearest_distance(a, b, 0.8), np.minimum(brute, 0.8))
@@ -0,0 +1,51 @@
+# tests/test_instanced.py
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from workspace import Workspace
+from workspace.components.factory import create_component
+from workspace.scene import xyzabc_to_T_batch
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
+
+
+def test_instances_sit_where_the_solids_would():
+    inst = create_component("plate_i", {"type": "microplate", "full": True, "instanced": True})
+    solids = create_component("plate_s", {"type": "microplate", "full": True})
+    array = inst.instances["microtube"]
+    assert len(array) == 96 and array.names[0] == "A1" and array.names[-1] == "H12"
+    expected = np.array([solids.assembly[f"microtube_{name}"].local["T"] for name in array.names])
+    np.testing.assert_allclose(array.local_T(), expected, atol=1e-9)
+
+    parent_world = xyzabc_to_T_batch([[100, -20, 5, 0, 0, 30]])[0]
+    np.testing.assert_allclose(array.world_T(parent_world), parent_world @ expected, atol=1e-9)
+
+
+def test_occupancy():
+    plate = create_component("plate", {"type": "microplate", "full": True, "instanced": True, "wells": ["B3", "A1"]})
+    array = plate.instances["microtube"]
+    assert array.names == ["A1", "B3"]
+    array.set_occupied(["A1"], False)
+    assert array.names == ["B3"] and len(array.local_T()) == 1
+    with pytest.raises(KeyError):
+        array.set_occupied(["center"])
+
+
+def test_snapshot_spec():
+    ws = Workspace(str(CONFIG), start_display=False, cache=False, connect_timeout=0.1)
+    try:
+        snapshot = ws.display._build_snapshot()
+        spec = snapshot["microplate_1_microtube"]
+        assert spec["meshUrl"] == "/static/CAD/microtube.glb"
+        assert spec["pose"] == pytest.approx(snapshot["microplate_1_microplate"]["pose"])
+        array = ws.components["microplate_1"].instances["microtube"]
+        np.testing.assert_allclose(spec["instances"], array.local_xyzabc(), atol=1e-9)
+        assert not any(k.startswith("microplate_1_microtube_") for k in snapshot)
+
+        world = ws.instance_world_T("microplate_1", "microtube")
+        parent = ws._scene.world[ws._scene.index[id(array.parent)]]
+        np.testing.assert_allclose(world, parent @ array.local_T(), atol=1e-9)
+    finally:
+        ws.stop()
@@ -0,0 +1,62 @@
+# tests/test_joint_feed.py
+import asyncio, inspect
+
+from workspace.joint_feed import JointFeed
+
+
+class FakeApi:
+    def __init__(self, polls=True):
+        self.callbacks = []
+        self.polls = polls
+
+    def register_callback(self, fn):
+        self.callbacks.append(fn)
+
+    def joint(self):
+        if not self.polls:
+            raise ConnectionError("push only")
+        return [1.0] * 8
+
+
+def test_push_callback_is_awaitable_and_merges():
+    api = FakeApi(polls=False)
+    feed = JointFeed(api)
+    feed.start()
+    feed.stop()
+    (cb,) = api.callbacks
+    assert inspect.iscoroutinefunction(cb)
+
+    async def receive_loop():
+        # what dorna2's receive loop does with a registered callback
+        await cb({"j0": 10.0, "j2": 30.0}, {})
+        await cb({"cmd": "other"}, {})
+        await cb({"j1": 20.0}, {})
+
+    asyncio.run(receive_loop())
+    joints, t = feed.latest()
+    assert joints == [10.0, 20.0, 30.0]
+    assert feed.stats()["source"] == "push" and feed.stats()["samples"] == 2
+
+
+def test_push_overlays_polled_joints():
+    feed = JointFeed(FakeApi())
+    feed.poll()
+    asyncio.run(feed._on_message({"j3": 5.0}))
+    assert feed.latest()[0] == [1.0, 1.0, 1.0, 5.0, 1.0, 1.0, 1.0, 1.0]
+
+
+def test_polls_dont_count_as_liveness():
+    feed = JointFeed(FakeApi())
+    feed.poll()
+    assert feed.age() < 1.0
+    assert feed.push_age() == float("inf")
+    asyncio.run(feed._on_message({"cmd": "stat"}))
+    assert feed.push_age() < 1.0
+
+
+def test_probe_asks_for_a_reply():
+    api = FakeApi()
+    api.played = []
+    api.play = lambda **kwargs: api.played.append(kwargs)
+    assert JointFeed(api).probe() and api.played == [{"timeout": 0, "cmd": "version"}]
+    assert not JointFeed(FakeApi()).probe()      # an API that can't send: no probe
@@ -0,0 +1,94 @@
+# tests/test_recording.py
+import numpy as np
+
+from workspace.recording import Recorder, Recording
+
+
+def _frame(n, k):
+    """Poses of names 0..n-1 at row k."""
+    return {f"s{j}": {"pose": [k, j, 0.0, 0.0, 0.0, 0.0], "visible": True} for j in range(n)}
+
+
+def test_round_trip_growing_names(tmp_path):
+    path = tmp_path / "grow.wsr"
+    rec = Recorder(path, capacity=64)
+    rec.record_specs({"s0": {"meshUrl": "/static/CAD/a.glb", "pose": [0] * 6}})
+    for k in range(40):
+        rec.record(_frame(k + 1, k), t=1000.0 + k)     # one new name per row, past 16 and 32
+        if k % 7 == 6:
+            rec.flush()
+    rec.close()
+
+    r = Recording(path)
+    assert len(r) == 40
+    assert r.names == [f"s{j}" for j in range(40)]
+    assert r.specs == {"s0": {"meshUrl": "/static/CAD/a.glb"}}
+    np.testing.assert_array_equal(r.t, 1000.0 + np.arange(40))
+    for k in (0, 15, 16, 17, 32, 39):
+        row = r.row(k)
+        assert np.all(np.isnan(row[k + 1:, 0]))
+        np.testing.assert_array_equal(row[:k + 1, 0], k)
+        np.testing.assert_array_equal(row[:k + 1, 1], np.arange(k + 1))
+    track = r.pose("s20")
+    assert np.all(np.isnan(track[:20, 0]))
+    np.testing.assert_array_equal(track[20:, 0], np.arange(20, 40))
+    assert r.at(1000.0 + 5.5) == r.poses(5)
+
+
+def test_drops_oldest_rows_at_capacity(tmp_path):
+    path = tmp_path / "drop.wsr"
+    rec = Recorder(path, capacity=8)
+    for k in range(20):
+        rec.record(_frame(20, k), t=float(k))          # writer never ran: ring overflows
+    assert rec.dropped == 12
+    rec.close()
+
+    r = Recording(path)
+    np.testing.assert_array_equal(r.t, np.arange(12, 20))
+    np.testing.assert_array_equal(r.row(0)[:, 0], 12)
+    np.testing.assert_array_equal(r.row(7)[:, 0], 19)
+
+
+def test_empty_recording(tmp_path):
+    path = tmp_path / "empty.wsr"
+    Recorder(path).close()
+    path.touch()
+    r = Recording(path)
+    assert len(r) == 0 and r.duration == 0.0
+
+
+def test_only_changed_columns_are_stored(tmp_path):
+    path = tmp_path / "idle.wsr"
+    rec = Recorder(path)
+    rec.record(_frame(1000, 0), t=0.0)
+    for k in range(1, 100):
+        frame = _frame(1000, 0)
+        frame["s7"]["pose"] = [k, 7, 0.0, 0.0, 0.0, 0.0]     # one solid moves, 999 idle
+        rec.record(frame, t=float(k))
+    rec.close()
+    # 1000 poses for the first row, then one per row (not 1000 x 100)
+    assert path.stat().st_size < 1000 * 24 * 3
+
+    r = Recording(path)
+    assert len(r) == 100
+    np.testing.assert_array_equal(r.pose("s7")[:, 0], np.arange(100))
+    np.testing.assert_array_equal(r.pose("s8")[:, 1], 8)
+    row = r.row(50)
+    np.testing.assert_array_equal(row[:, 1], np.arange(1000))
+    assert row[7, 0] == 50 and np.all(np.delete(row[:, 0], 7) == 0)
+
+
+def test_byte_budget_folds_dropped_rows(tmp_path):
+    path = tmp_path / "budget.wsr"
+    rec = Recorder(path, max_bytes=10 * (12 + 28 * 3))
+    rec.record(_frame(3, 0), t=0.0)
+    rec.record({"extra": {"pose": [5.0] * 6}}, t=0.5)      # only in a row that gets dropped
+    for k in range(1, 30):
+        rec.record(_frame(3, k), t=float(k))
+    assert rec.dropped == 21 and rec._bytes <= rec.max_bytes
+    rec.close()
+
+    r = Recording(path)
+    np.testing.assert_array_equal(r.t, np.arange(20, 30))
+    assert r.poses(0)["extra"] == [5.0] * 6             # still known from the base state
+    np.testing.assert_array_equal(r.row(0)[:3, 0], 20)
@@ -0,0 +1,303 @@
+# tests/test_relay.py
+import asyncio
+
+import numpy as np
+import pytest
+import tornado.httpserver
+from tornado.httpclient import AsyncHTTPClient
+from tornado.testing import bind_unused_port
+
+import server
+from workspace.wire import pack_frame
+
+
+class FakeSio:
+    """Rooms and per-sid inboxes instead of sockets; call() ACKs at once."""
+
+    def __init__(self):
+        self.rooms = {}
+        self.inbox = {}
+
+    async def enter_room(self, sid, room):
+        self.rooms.setdefault(room, set()).add(sid)
+
+    async def leave_room(self, sid, room):
+        self.rooms.get(room, set()).discard(sid)
+
+    async def emit(self, event, data, to=None):
+        for sid in self.rooms.get(to, {to}):
+            self.inbox.setdefault(sid, []).append((event, data))
+
+    async def call(self, event, data, to=None, timeout=None):
+        await self.emit(event, data, to)
+        return "ok"
+
+    def events(self, sid, event=None):
+        return [e if event is None else d for e, d in self.inbox.get(sid, []) if event in (None, e)]
+
+
+@pytest.fixture
+def relay(monkeypatch):
+    """server.py with fresh relay state and a FakeSio."""
+    fake = FakeSio()
+    monkeypatch.setattr(server, "sio", fake)
+    for name in ("cells", "producer_cells", "subscriptions", "producer_stats"):
+        monkeypatch.setattr(server, name, {})
+    for name in ("clients", "producers"):
+        monkeypatch.setattr(server, name, set())
+    return fake
+
+
+async def _settle():
+    """Let the viewer queues' sender tasks run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _run_queue(pushes, monkeypatch):
+    """Feed a ViewerQueue and return what it sent: [(event, data, ack)]."""
+    sent = []
+
+    async def fake_emit(event, data, to, recipients=1, ack=False):
+        sent.append((event, data, ack))
+
+    monkeypatch.setattr(server, "_emit", fake_emit)
+
+    async def main():
+        cell = server.Cell("test")
+        cell.pose_buffer = server.PoseBuffer({"version": 1, "names": ["a", "b"]})
+        q = server.ViewerQueue("sid", cell)
+        for push in pushes:
+            push(cell, q)
+        await asyncio.sleep(0.01)
+        q.close()
+
+    asyncio.run(main())
+    return sent
+
+
+def _frame(cell, q, pose):
+    data = pack_frame(1, [pose], [True], [0])
+    cell.pose_buffer.merge(data)
+    q.push_frame(data)
+
+
+def _update(cell, q, pose):
+    payload = {"a": {"pose": pose}}
+    cell.pose_buffer.merge_specs(payload)
+    q.push_update(payload)
+
+
+def test_older_frame_goes_before_newer_update(monkeypatch):
+    sent = _run_queue([lambda c, q: _frame(c, q, [1] * 6), lambda c, q: _update(c, q, [2] * 6)], monkeypatch)
+    assert [e for e, _, _ in sent] == ["scene_frame", "scene_update"]
+    assert [ack for _, _, ack in sent] == [False, True]
+
+
+def test_newer_frame_goes_after_update(monkeypatch):
+    sent = _run_queue([lambda c, q: _update(c, q, [2] * 6), lambda c, q: _frame(c, q, [1] * 6)], monkeypatch)
+    assert [e for e, _, _ in sent] == ["scene_update", "scene_frame"]
+
+
+def test_coalesced_frame_is_newest(monkeypatch):
+    sent = _run_queue([lambda c, q: _frame(c, q, [1] * 6), lambda c, q: _frame(c, q, [3] * 6),
+                       lambda c, q: _update(c, q, [2] * 6)], monkeypatch)
+    assert [e for e, _, _ in sent] == ["scene_update", "scene_frame"]
+    frame = sent[-1][1][0]
+    poses = np.frombuffer(frame, dtype="<f4", count=12, offset=16).reshape(2, 6)
+    assert poses[0].tolist() == [2] * 6     # the update's pose, not the older frames'
+
+
+def _store(tmp_path, n):
+    (tmp_path / "CAD").mkdir()
+    for i in range(n):
+        (tmp_path / "CAD" / f"m{i}.glb").write_bytes(bytes([i]) * (10 + i))
+    return server.AssetStore(str(tmp_path))
+
+
+def test_evicted_bundle_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "MAX_BUNDLES", 2)
+    store = _store(tmp_path, 4)
+    urls = [store.url(f"CAD/m{i}.glb") for i in range(4)]
+    keys = [store.bundle_url(urls[:k]).rpartition("/")[2] for k in range(1, 5)]
+    first = store.bundle(keys[0]).variants["identity"]
+    for key in keys[1:]:
+        store.bundle(key)
+    assert len(store.built) == 2 and keys[0] not in store.built
+    assert store.bundle(keys[0]).variants["identity"] == first
+    assert store.bundle("0" * 16) is None
+
+
+def test_cell_bundle_url_follows_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "MAX_BUNDLE_KEYS", 1)
+    store = _store(tmp_path, 2)
+    monkeypatch.setattr(server, "assets", store)
+    cell = server.Cell("test")
+    cell.world_state.merge({"a": {"meshUrl": store.url("CAD/m0.glb")}})
+    url = cell.bundle_url()
+    store.bundle_url([store.url("CAD/m1.glb")])     # pushes the cell's bundle out
+    assert not store.has_bundle(url)
+    url = cell.bundle_url()
+    assert store.has_bundle(url) and store.bundle(url.rpartition("/")[2]) is not None
+
+
+def _fetch(requests):
+    """Serve server.app on a free port and GET each (path, headers); returns the responses."""
+    async def main():
+        sock, port = bind_unused_port()
+        http = tornado.httpserver.HTTPServer(server.app)
+        http.add_sockets([sock])
+        try:
+            client = AsyncHTTPClient()
+            return [await client.fetch(f"http://127.0.0.1:{port}{path}", headers=headers, raise_error=False)
+                    for path, headers in requests]
+        finally:
+            http.stop()
+
+    return asyncio.run(main())
+
+
+def test_hashed_assets_are_immutable(tmp_path, monkeypatch):
+    store = _store(tmp_path, 2)
+    monkeypatch.setattr(server, "assets", store)
+    url = store.url("CAD/m1.glb")
+    etag = f'"{store.assets["CAD/m1.glb"].hash}"'
+    bundle = store.bundle_url([url])
+    ok, cached, stale, missing, b_ok = _fetch([
+        (url, {}), (url, {"If-None-Match": etag}), (url.replace(etag[1:-1], "0" * 16), {}),
+        ("/assets/CAD/none.0123abcd.glb", {}), (bundle, {}),
+    ])
+    assert ok.code == 200 and ok.body == bytes([1]) * 11
+    assert ok.headers["ETag"] == etag and ok.headers["Cache-Control"] == server.IMMUTABLE
+    assert cached.code == 304 and not cached.body
+    assert stale.code == 404 and missing.code == 404
+    assert b_ok.code == 200 and b_ok.body.startswith(server.BUNDLE_MAGIC)
+    (b_cached,) = _fetch([(bundle, {"If-None-Match": b_ok.headers["ETag"]})])
+    assert b_cached.code == 304
+
+
+def test_bundle_holds_level_0_only(tmp_path):
+    store = _store(tmp_path, 2)
+    store.lods = {"CAD/m0.glb": {"bbox": [[0, 0, 0], [1, 1, 1]], "lods": [{"path": "CAD/m1.glb", "distance": 500}]}}
+    spec = {"meshUrl": "/static/CAD/m0.glb", "pose": [0] * 6}
+    store.rewrite(spec)
+    assert spec["lods"] == [{"url": store.url("CAD/m1.glb"), "distance": 500}]
+    assert store.mesh_urls({"a": spec}) == [store.url("CAD/m0.glb")]
+
+
+def test_unacked_batch_is_requeued(monkeypatch):
+    sent, fail = [], [True]
+
+    async def flaky_emit(event, data, to, recipients=1, ack=False):
+        if ack and fail[0]:
+            fail[0] = False
+            raise TimeoutError("no ACK")
+        sent.append((event, data))
+
+    monkeypatch.setattr(server, "_emit", flaky_emit)
+    monkeypatch.setattr(server, "RETRY_S", 0.0)
+
+    async def main():
+        cell = server.Cell("test")
+        cell.pose_buffer = server.PoseBuffer({"version": 1, "names": ["a", "b"]})
+        q = server.ViewerQueue("sid", cell)
+        q.push_update({"a": {"meshUrl": "a.glb", "visible": False}})
+        _frame(cell, q, [1] * 6)
+        await asyncio.sleep(0)           # the first batch is taken and fails
+        q.push_update({"a": {"visible": True}, "b": {"meshUrl": "b.glb"}})
+        await asyncio.sleep(0.02)
+        q.close()
+
+    asyncio.run(main())
+    updates = [data[0] for event, data in sent if event == "scene_update"]
+    frames = [data[0] for event, data in sent if event == "scene_frame"]
+    assert updates[-1] == {"a": {"meshUrl": "a.glb", "visible": True}, "b": {"meshUrl": "b.glb"}}
+    assert frames and frames[-1][12] & 1     # the resent frame is a full one
+
+
+def test_cells_are_routed_to_their_viewers(relay):
+    async def main():
+        await server.connect("p1", {}, {"role": "producer", "cell": "c1"})
+        await server.connect("p2", {}, {"role": "producer", "cell": "c2"})
+        await server.connect("v1", {}, {"cells": ["c1"]})
+        await server.connect("v2", {}, {"cells": ["c2"]})
+        await server.connect("v_all", {}, {})
+        await server.upstream_update("p1", {"a": {"pose": [1] * 6, "meshUrl": "/static/x.glb"}})
+        await server.upstream_update("p2", {"b": {"pose": [2] * 6, "meshUrl": "/static/y.glb"}})
+        await _settle()
+
+    asyncio.run(main())
+    got = {sid: [(u, m["cell"]) for u, m in relay.events(sid, "scene_update")] for sid in ("v1", "v2", "v_all")}
+    assert [(list(u), c) for u, c in got["v1"]] == [(["a"], "c1")]
+    assert [(list(u), c) for u, c in got["v2"]] == [(["b"], "c2")]
+    assert sorted(c for _, c in got["v_all"]) == ["c1", "c2"]
+    assert "a" in server.cells["c1"].world_state and "a" not in server.cells["c2"].world_state
+
+
+def test_viewers_dont_create_cells(relay):
+    async def main():
+        await server.connect("v", {}, {"cells": ["later"]})
+        assert await server.subscribe_cells("v", {"cells": ["later", "nope"]}) == ["later", "nope"]
+        assert not server.cells
+        # the producer of a requested cell shows up: the viewer joins it
+        await server.connect("p", {}, {"role": "producer", "cell": "later"})
+        await server.upstream_update("p", {"a": {"pose": [0] * 6, "meshUrl": "/static/x.glb"}})
+        await _settle()
+
+    asyncio.run(main())
+    assert list(server.cells) == ["later"]
+    assert "v" in server.cells["later"].viewers
+    assert [m["cell"] for _, m in relay.events("v", "scene_update")] == ["later"]
+
+
+def test_unsubscribe_leaves_cell(relay):
+    async def main():
+        await server.connect("p", {}, {"role": "producer", "cell": "c1"})
+        await server.connect("v", {}, {"cells": ["c1"]})
+        await server.subscribe_cells("v", {"cells": []})
+        await server.upstream_update("p", {"a": {"pose": [0] * 6, "meshUrl": "/static/x.glb"}})
+        await _settle()
+
+    asyncio.run(main())
+    assert not server.cells["c1"].viewers and not relay.events("v", "scene_update")
+
+
+def test_concurrent_joins_request_one_snapshot(relay, monkeypatch):
+    monkeypatch.setitem(server.relay_metrics, "snapshot_requests_coalesced", 0)
+
+    async def main():
+        await server.connect("p", {}, {"role": "producer", "cell": "c1"})
+        relay.inbox.clear()
+        await asyncio.gather(*(server.connect(f"v{i}", {}, {"cells": ["c1"]}) for i in range(5)))
+        assert len(relay.events("p", "request_snapshot")) == 1
+        # no snapshot within SNAPSHOT_TIMEOUT: the next join asks again
+        server.cells["c1"].snapshot_t -= server.SNAPSHOT_TIMEOUT
+        await server.connect("late", {}, {"cells": ["c1"]})
+        assert len(relay.events("p", "request_snapshot")) == 2
+        # a snapshot answers the request
+        await server.upstream_update("p", {"a": {"pose": [0] * 6, "meshUrl": "/static/x.glb"}})
+        assert server.cells["c1"].snapshot_t is None
+        await _settle()
+
+    asyncio.run(main())
+    assert server.relay_metrics["snapshot_requests_coalesced"] == 4
+
+
+def test_producer_metrics_are_grouped_per_family(relay):
+    snap = {"timers": {"frame": {"count": 3, "sum": 0.01, "max": 0.005}},
+            "counters": {"frames_sent": 3}, "gauges": {"fps_achieved": 59.5}}
+    server.producer_stats[("p1", "c1")] = snap
+    server.producer_stats[("p2", "c2")] = snap
+    lines = server.render_metrics().splitlines()
+    for family, kind in [("workspace_producer_stage_seconds", "summary"),
+                         ("workspace_producer_stage_seconds_max", "gauge"),
+                         ("workspace_producer_frames_sent_total", "counter"),
+                         ("workspace_producer_fps_achieved", "gauge")]:
+        assert lines.count(f"# TYPE {family} {kind}") == 1
+        assert sum(l.startswith(f"# HELP {family} ") for l in lines) == 1
+        # both producers' samples follow their family's header
+        i = lines.index(f"# TYPE {family} {kind}") + 1
+        j = next((k for k in range(i, len(lines)) if lines[k].startswith("#")), len(lines))
+        samples = lines[i:j]
+        assert any('producer="p1"' in l for l in samples) and any('producer="p2"' in l for l in samples)
+    assert 'workspace_producer_stage_seconds_count{producer="p2",cell="c2",stage="frame"} 3' in lines
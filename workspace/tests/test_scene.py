@@ -0,0 +1,70 @@
+# tests/test_scene.py
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from workspace import Workspace
+from workspace.scene import CompiledScene
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
+
+
+@pytest.fixture
+def ws():
+    ws = Workspace(str(CONFIG), start_display=False, cache=False, connect_timeout=0.1)
+    yield ws
+    ws.stop()
+
+
+class FakeFeed:
+    def __init__(self, joints):
+        self.joints, self.t = list(joints), 1.0
+
+    def latest(self):
+        return self.joints, self.t
+
+    def stop(self):
+        pass
+
+
+def naive_world(solid):
+    """World transform by walking the parent links (the reference CompiledScene replaces)."""
+    T = np.asarray(solid.local["T"], dtype=float)
+    while solid.parent is not None:
+        solid = solid.parent
+        T = np.asarray(solid.local["T"], dtype=float) @ T
+    return T
+
+
+def assert_matches_naive(scene):
+    for i, s in enumerate(scene.solids):
+        np.testing.assert_allclose(scene.world[i], naive_world(s), atol=1e-9)
+
+
+def test_dirty_subtree_update_matches_naive(ws):
+    scene = ws._scene
+    assert_matches_naive(scene)
+    rng = np.random.default_rng(0)
+    core = ws.components["core"]
+    for _ in range(5):
+        core.joint_feed = FakeFeed(np.r_[rng.uniform(-90, 90, 6), rng.uniform(0, 500), 0.0])
+        core._joints_t = None
+        ws.compute_world_poses()
+        assert ws._scene is scene
+        assert_matches_naive(scene)
+    # every key agrees with a fresh compile
+    fresh = CompiledScene(ws.components)
+    poses = scene.poses()
+    for key, pose in fresh.poses().items():
+        assert poses[key] == pytest.approx(pose, abs=1e-6)
+
+
+def test_subtree_slices(ws):
+    scene = ws._scene
+    for i in range(len(scene.solids)):
+        for j in range(i + 1, scene.subtree_end[i]):
+            p = scene.parent_idx[j]
+            while p > i:
+                p = scene.parent_idx[p]
+            assert p == i
@@ -0,0 +1,42 @@
+# tests/test_trajectory.py
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from workspace import Workspace
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
+
+
+@pytest.fixture
+def ws():
+    ws = Workspace(str(CONFIG), start_display=False, cache=False, connect_timeout=0.1)
+    yield ws
+    ws.stop()
+
+
+class FakeFeed:
+    def __init__(self, joints):
+        self.joints, self.t = list(joints), 1.0
+
+    def latest(self):
+        return self.joints, self.t
+
+    def stop(self):
+        pass
+
+
+def test_trajectory_matches_live_update_pose(ws):
+    core = ws.components["core"]
+    rng = np.random.default_rng(1)
+    joints = np.c_[rng.uniform(-90, 90, (4, 6)), rng.uniform(0, 500, 4), np.zeros(4)]
+    traj = ws.trajectory(joints)
+    assert len(traj) == 4 and traj.keys
+    for i, q in enumerate(joints):
+        core.joint_feed = FakeFeed(q)
+        core._joints_t = None
+        live = ws.compute_world_poses()
+        for key, pose in traj.poses(i).items():
+            assert pose == pytest.approx(live[key], abs=1e-6)
+
@@ -0,0 +1,79 @@
+# tests/test_wire.py
+import numpy as np
+import pytest
+
+import server
+from server import PoseBuffer
+from workspace.wire import pack_frame, unpack_frame
+
+
+def test_pack_unpack_roundtrip():
+    rng = np.random.default_rng(0)
+    poses = rng.normal(size=(11, 6)).astype(np.float32)
+    visible = rng.random(11) > 0.5
+    version, indices, out, vis = unpack_frame(pack_frame(7, poses, visible))
+    assert version == 7 and indices is None
+    np.testing.assert_array_equal(out, poses)
+    np.testing.assert_array_equal(vis, visible)
+
+    idx = [3, 0, 9]
+    version, indices, out, vis = unpack_frame(pack_frame(8, poses[:3], visible[:3], idx))
+    assert version == 8 and indices.tolist() == idx
+    np.testing.assert_array_equal(out, poses[:3])
+    np.testing.assert_array_equal(vis, visible[:3])
+
+    with pytest.raises(ValueError):
+        unpack_frame(b"XXXX" + bytes(12))
+
+
+def test_pose_buffer_merge_roundtrip():
+    names = [f"s{i}" for i in range(10)]
+    buf = PoseBuffer({"version": 3, "names": names})
+    rng = np.random.default_rng(1)
+    poses = rng.normal(size=(10, 6)).astype(np.float32)
+    visible = np.ones(10, dtype=bool)
+    assert buf.merge(pack_frame(3, poses, visible))
+
+    # delta: move two entries, hide one
+    poses[[2, 9]] = rng.normal(size=(2, 6))
+    visible[9] = False
+    assert buf.merge(pack_frame(3, poses[[2, 9]], visible[[2, 9]], [2, 9]))
+
+    version, indices, out, vis = unpack_frame(buf.full_frame())
+    assert version == 3 and indices is None
+    np.testing.assert_array_equal(out, poses)
+    np.testing.assert_array_equal(vis, visible)
+
+    # other table version, bad index, truncated: rejected without touching the buffer
+    before = buf.full_frame()
+    assert not buf.merge(pack_frame(4, poses, visible))
+    assert not buf.merge(pack_frame(3, poses[:1], None, [10]))
+    assert not buf.merge(pack_frame(3, poses, visible)[:-1])
+    assert buf.full_frame() == before
+
+
+def test_pose_buffer_merge_specs():
+    buf = PoseBuffer({"version": 1, "names": ["a", "b"]})
+    buf.merge_specs({"b": {"pose": [1, 2, 3, 4, 5, 6], "visible": False}, "zz": {"pose": [0] * 6}})
+    _, _, poses, vis = unpack_frame(buf.full_frame())
+    assert poses[1].tolist() == [1, 2, 3, 4, 5, 6]
+    assert vis.tolist() == [True, False]
+
+
+def test_relay_counts_payload_bytes():
+    metrics = server.relay_metrics
+    bytes_in, frames = metrics["bytes_in"], metrics["events"].get("upstream_frame", 0)
+    server._count("upstream_frame", b"\x00" * 10)
+    server._count("upstream_update", {"é": 1})
+    assert metrics["bytes_in"] - bytes_in == 10 + len('{"\\u00e9":1}')    # as socket.io encodes JSON
+    assert metrics["events"]["upstream_frame"] == frames + 1
+
+
+def test_new_table_starts_from_known_poses():
+    specs = {"a": {"pose": [1, 2, 3, 0, 0, 0], "visible": False}, "b": {"pose": [4, 5, 6, 0, 0, 0]}}
+    old = PoseBuffer({"version": 1, "names": ["b", "gone"]})
+    old.merge(pack_frame(1, [[7, 7, 7, 0, 0, 0], [9] * 6]))
+    buf = PoseBuffer({"version": 2, "names": ["new", "a", "b"]}, prev=old, specs=specs)
+    _, _, poses, visible = unpack_frame(buf.full_frame())
+    assert poses.tolist() == [[0] * 6, [1, 2, 3, 0, 0, 0], [7, 7, 7, 0, 0, 0]]   # prev beats specs
+    assert visible.tolist() == [True, False, True]
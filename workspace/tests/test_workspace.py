@@ -0,0 +1,43 @@
+# tests/test_workspace.py
+from pathlib import Path
+
+import pytest
+
+from workspace import Workspace
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
+
+
+@pytest.fixture
+def ws():
+    ws = Workspace(str(CONFIG), start_display=False, cache=False, connect_timeout=0.1)
+    yield ws
+    ws.stop()
+
+
+def _truth(ws):
+    ws.invalidate_scene()
+    return ws.compute_world_poses()
+
+
+def test_attach_anywhere_is_picked_up(ws):
+    """attach_to() outside update_pose(), with no mark_dirty(), still moves the solid."""
+    before = ws.compute_world_poses()
+    plate = ws.components["microplate_2"].assembly["microplate"]
+    adapter = ws.components["SBS_adapter_1"].assembly["SBS_adapter"]
+    plate.attach_to(parent=adapter, parent_anchor="center", child_anchor="center", offset=[0, 0, 50, 0, 0, 0])
+    after = ws.compute_world_poses()
+    assert after["microplate_2_microplate"] != before["microplate_2_microplate"]
+    truth = _truth(ws)
+    assert after.keys() == truth.keys()
+    for key, pose in after.items():
+        assert pose == pytest.approx(truth[key])
+
+
+def test_offset_change_same_parent(ws):
+    ws.compute_world_poses()
+    plate = ws.components["microplate_2"].assembly["microplate"]
+    plate.attach_to(parent=plate.parent, parent_anchor="center", child_anchor="center", offset=[10, 0, 0, 0, 0, 0])
+    after = ws.compute_world_poses()
+    truth = _truth(ws)
+    assert after["microplate_2_microplate"] == pytest.approx(truth["microplate_2_microplate"])
@@ -0,0 +1,71 @@
+# tests/test_world_state.py
+import json
+
+from server import WorldState
+
+
+def test_changes_since():
+    ws = WorldState()
+    ws.merge({"a": {"pose": [0] * 6, "meshUrl": "a.glb"}, "b": {"pose": [0] * 6}})
+    v1 = ws.version
+    ws.merge({"a": {"pose": [1] + [0] * 5}})
+    ws.merge({"b": {"delete": True}, "c": {"pose": [2] * 6}})
+    assert ws.changes_since(v1) == {"a": ws.objects["a"], "c": ws.objects["c"], "b": {"delete": True}}
+    assert ws.changes_since(ws.version) == {}
+    assert ws.changes_since(ws.version + 1) is None
+    assert ws.changes_since("1") is None
+
+    # unchanged merges don't bump the version
+    v = ws.version
+    assert not ws.merge({"c": {"pose": [2] * 6}})
+    assert ws.version == v
+
+
+def test_changes_since_across_compaction():
+    ws = WorldState()
+    ws.merge({"a": {"pose": [0] * 6}, "b": {"pose": [0] * 6}})
+    old = ws.version
+    ws.merge({"b": {"delete": True}})
+    ws.compact()
+    # the tombstone is gone: an older viewer needs a full snapshot
+    assert ws.changes_since(old) is None
+    assert ws.changes_since(ws.floor) == {}
+    ws.merge({"a": {"visible": False}})
+    assert ws.changes_since(ws.floor) == {"a": ws.objects["a"]}
+
+
+def test_encoded_is_cached_per_version():
+    ws = WorldState()
+    ws.merge({"a": {"pose": [0] * 6, "meshUrl": "a.glb"}})
+    data = ws.encoded()
+    assert json.loads(data) == ws.objects
+    assert ws.encoded() is data
+    ws.merge({"a": {"pose": [0] * 6}})            # no change: same bytes
+    assert ws.encoded() is data
+    ws.merge({"a": {"visible": False}})
+    assert ws.encoded() is not data and json.loads(ws.encoded())["a"]["visible"] is False
+    ws.merge({"a": {"delete": True}})
+    assert ws.encoded() == b"{}"
+
+
+def test_epoch_is_per_state():
+    a, b = WorldState(), WorldState()
+    assert a.epoch != b.epoch
+    # same version numbers, different epochs: a viewer can't mix them up
+    a.merge({"x": {"pose": [0] * 6}})
+    b.merge({"x": {"pose": [0] * 6}})
+    assert a.meta()["version"] == b.meta()["version"] and a.meta() != b.meta()
+
+
+def test_tombstones():
+    ws = WorldState()
+    ws.merge({"a": {"pose": [0] * 6, "meshUrl": "a.glb"}, "b": {"pose": [0] * 6}})
+    v = ws.version
+    assert not ws.complete                        # b has no mesh yet
+    assert not ws.merge({"nope": {"delete": True}})
+    ws.merge({"b": {"delete": True}})
+    assert ws.complete and "b" not in ws
+    assert ws.changes_since(v) == {"b": {"delete": True}}
+    # re-adding the object drops its tombstone
+    ws.merge({"b": {"pose": [1] * 6, "meshUrl": "b.glb"}})
+    assert ws.deleted == {} and ws.changes_since(v) == {"b": ws.objects["b"]}
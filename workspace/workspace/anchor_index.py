@@ -0,0 +1,114 @@
+# workspace/anchor_index.py
+import numpy as np
+
+from workspace.anchors import anchor_T
+from workspace.spatial import PointGrid
+
+
+class AnchorIndex:
+    """
+    Spatial index over the world positions of every anchor of every solid in a workspace
+    (plate grids, adapter holes, microplate wells, ...), for "which anchor is here?".
+
+    Positions are kept in arrays and bucketed in a uniform grid (PointGrid). update()
+    recomputes positions only for anchors whose solid's world transform changed, and
+    re-buckets only those that changed cell, so static fixtures cost nothing.
+    Results are anchor ids; refs[i] is the (component, solid, anchor) of id i.
+    Filters take component types (e.g. {"microplate", "SBS_adapter"}).
+
+    Get one with Workspace.anchor_index(), which brings it up to date first.
+    """
+
+    def __init__(self, cell=25.0):
+        self.cell = float(cell)
+        self._scene = None
+
+    def _build(self, components, scene):
+        refs, types, owners, tables, names = [], [], [], [], []
+        for comp_name, comp in components.items():
+            comp_type = getattr(comp, "type", comp_name)
+            for solid_name, solid in comp.assembly.items():
+                i = scene.index.get(id(solid))
+                anchors = getattr(solid, "anchors", None) or {}
+                if i is None:
+                    continue
+                for anchor in anchors:
+                    refs.append((comp_name, solid_name, anchor))
+                    types.append(comp_type)
+                    owners.append(i)
+                    tables.append(anchors)
+                    names.append(anchor)
+        self.refs = refs
+        self.types = np.array(types, dtype=object)
+        self.owner = np.array(owners, dtype=np.intp)
+        self.local = anchor_T(tables, names)[:, :, 3] if refs else np.zeros((0, 4))   # homogeneous points
+        self.xyz = np.zeros((len(refs), 3))
+        self._owner_world = np.full((len(refs), 4, 4), np.nan)
+        self.grid = PointGrid(self.cell)
+        self._scene = scene
+
+    def update(self, components, scene):
+        """Bring positions up to date with the scene; returns self."""
+        if scene is not self._scene:
+            self._build(components, scene)
+        if len(self.refs):
+            W = scene.world[self.owner]
+            moved = np.flatnonzero(np.any(W != self._owner_world, axis=(1, 2)))
+            if len(moved):
+                self._owner_world[moved] = W[moved]
+                self.xyz[moved] = np.einsum("nij,nj->ni", W[moved], self.local[moved])[:, :3]
+                self.grid.update(moved, self.xyz[moved])
+        return self
+
+    # ---------- queries ----------
+    def _mask(self, ids, types):
+        if types is None or not len(ids):
+            return ids
+        if isinstance(types, str):
+            types = (types,)
+        return ids[np.isin(self.types[ids], list(types))]
+
+    def nearest(self, points, k=1, types=None, max_dist=np.inf):
+        """
+        k nearest anchors of each of (Q, 3) points (or one (3,) point).
+        Returns (dist, ids), both (Q, k); missing neighbours are inf / -1.
+        """
+        pts = np.asarray(points, dtype=float).reshape(-1, 3)
+        dist = np.full((len(pts), k), np.inf)
+        ids = np.full((len(pts), k), -1, dtype=np.intp)
+        grid, cell = self.grid, self.cell
+        for q, p in enumerate(pts):
+            r, r_max = 1, grid.max_ring(p)
+            while True:
+                cand = self._mask(grid.query_ring(p, r), types)
+                if len(cand):
+                    d = np.linalg.norm(self.xyz[cand] - p, axis=1)
+                    keep = d <= max_dist
+                    cand, d = cand[keep], d[keep]
+                    order = np.argsort(d, kind="stable")[:k]
+                    n = len(order)
+                    # every anchor within r * cell is in the ring: done once the k-th is inside that
+                    if n == k and d[order[-1]] <= r * cell or r >= r_max or r * cell > max_dist:
+                        dist[q, :n], ids[q, :n] = d[order], cand[order]
+                        break
+                elif r >= r_max or r * cell > max_dist:
+                    break
+                r *= 2
+        return dist, ids
+
+    def radius(self, points, r, types=None):
+        """For each of (Q, 3) points, the ids of anchors within r, closest first."""
+        out = []
+        for p in np.asarray(points, dtype=float).reshape(-1, 3):
+            cand = self._mask(self.grid.query_box(p - r, p + r), types)
+            d = np.linalg.norm(self.xyz[cand] - p, axis=1)
+            keep = d <= r
+            out.append(cand[keep][np.argsort(d[keep], kind="stable")])
+        return out
+
+    def box(self, lo, hi, types=None):
+        """Ids of anchors inside the axis-aligned box [lo, hi]."""
+        lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+        cand = self._mask(self.grid.query_box(lo, hi), types)
+        xyz = self.xyz[cand]
+        return cand[np.all((xyz >= lo) & (xyz <= hi), axis=1)]
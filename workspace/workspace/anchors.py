@@ -0,0 +1,125 @@
+# workspace/anchors.py
+from collections.abc import Mapping
+import numpy as np
+
+from workspace.scene import xyzabc_to_T_batch
+
+
+class GridAnchors(Mapping):
+    """
+    Read-only anchor table for a rows x cols grid of holes/wells (A1, A2, ..., J20)
+    plus a few named extras (corners, center, ...).
+
+    Grid anchors are resolved arithmetically from origin/pitch instead of being stored:
+    row r (A=0), column c (1-based) sits at
+        [origin_x + (c-1) * pitch_x, origin_y - r * pitch_y, origin_z, 0, 0, 0]
+    It behaves like the usual {name: [x,y,z,a,b,c]} dict, so it can be passed
+    straight to Solid(anchors=...). Use GridAnchors.shared() so that every instance of
+    a fixture type uses the same table and the same cached transform array.
+    """
+
+    _shared = {}
+
+    def __init__(self, rows, cols, pitch, origin, extras=None):
+        if not 0 < rows <= 26:
+            raise ValueError(f"GridAnchors supports 1..26 rows, got {rows}")
+        self.rows = int(rows)
+        self.cols = int(cols)
+        self.pitch = (float(pitch), float(pitch)) if np.isscalar(pitch) else tuple(map(float, pitch))
+        self.origin = tuple(map(float, origin))
+        self.extras = {k: list(v) for k, v in (extras or {}).items()}
+        self.row_labels = tuple(chr(ord("A") + r) for r in range(self.rows))
+        self._T = None
+
+    @classmethod
+    def shared(cls, rows, cols, pitch, origin, extras=None):
+        """One GridAnchors per distinct spec, shared by every fixture built from it."""
+        key = (rows, cols, pitch if np.isscalar(pitch) else tuple(pitch), tuple(origin),
+               tuple((k, tuple(v)) for k, v in (extras or {}).items()))
+        grid = cls._shared.get(key)
+        if grid is None:
+            grid = cls._shared[key] = cls(rows, cols, pitch, origin, extras)
+        return grid
+
+    # ---------- grid arithmetic ----------
+    def cell(self, name):
+        """Map "F12" -> (5, 11) zero-based (row, col), or None if not a grid anchor."""
+        if len(name) < 2 or not name[1:].isdigit():
+            return None
+        r = ord(name[0]) - ord("A")
+        c = int(name[1:]) - 1
+        if 0 <= r < self.rows and 0 <= c < self.cols and name[1] != "0":
+            return r, c
+        return None
+
+    def index(self, name):
+        """Position of an anchor in iteration order (and in the T array)."""
+        rc = self.cell(name)
+        if rc is not None:
+            return rc[0] * self.cols + rc[1]
+        if name in self.extras:
+            return self.rows * self.cols + list(self.extras).index(name)
+        raise KeyError(name)
+
+    @property
+    def T(self):
+        """(len(self), 4, 4) transforms of all anchors in iteration order (cached)."""
+        if self._T is None:
+            n = self.rows * self.cols
+            r, c = np.divmod(np.arange(n), self.cols)
+            T = np.tile(np.eye(4), (n, 1, 1))
+            T[:, 0, 3] = self.origin[0] + c * self.pitch[0]
+            T[:, 1, 3] = self.origin[1] - r * self.pitch[1]
+            T[:, 2, 3] = self.origin[2]
+            if self.extras:
+                T = np.concatenate([T, xyzabc_to_T_batch(list(self.extras.values()))])
+            T.setflags(write=False)
+            self._T = T
+        return self._T
+
+    # ---------- Mapping ----------
+    def __getitem__(self, name):
+        rc = self.cell(name) if isinstance(name, str) else None
+        if rc is None:
+            return self.extras[name]
+        r, c = rc
+        return [self.origin[0] + c * self.pitch[0], self.origin[1] - r * self.pitch[1],
+                self.origin[2], 0.0, 0.0, 0.0]
+
+    def __iter__(self):
+        for r in self.row_labels:
+            for c in range(1, self.cols + 1):
+                yield f"{r}{c}"
+        yield from self.extras
+
+    def __len__(self):
+        return self.rows * self.cols + len(self.extras)
+
+    def __contains__(self, name):
+        return isinstance(name, str) and (self.cell(name) is not None or name in self.extras)
+
+    def copy(self):
+        # immutable: safe to share
+        return self
+
+    def __repr__(self):
+        return (f"GridAnchors(rows={self.rows}, cols={self.cols}, pitch={self.pitch}, "
+                f"origin={self.origin}, extras={list(self.extras)})")
+
+
+def anchor_T(tables, names):
+    """
+    (R, 4, 4) transforms of anchors names[k] of anchor tables tables[k] (GridAnchors or
+    {name: xyzabc} dicts). GridAnchors rows come from their cached T array.
+    """
+    A = np.empty((len(names), 4, 4))
+    plain = []
+    for k, (table, name) in enumerate(zip(tables, names)):
+        if isinstance(table, GridAnchors):
+            A[k] = table.T[table.index(name)]
+        else:
+            plain.append((k, table[name]))
+    if plain:
+        rows, poses = zip(*plain)
+        A[list(rows)] = xyzabc_to_T_batch(list(poses))
+    return A
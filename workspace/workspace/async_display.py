@@ -0,0 +1,365 @@
+# workspace/async_display.py
+import asyncio, threading, time
+from concurrent.futures import ThreadPoolExecutor
+import socketio
+
+from workspace.display import DisplayBase
+
+
+class AsyncDisplay(DisplayBase):
+    """
+    asyncio producer for one workspace, run by a DisplayHub (many per process).
+
+    Same frames as Display (see DisplayBase), but paced by the event loop instead of a
+    thread; frames are built in the hub's worker pool (DisplayHub.run_blocking). Backpressure:
+    the frame task merges each frame into `_pending` (per object, so no delta is lost) and the
+    sender task sends it once the previous frame's ACK has arrived (sio.call), i.e. at most one
+    frame in flight per cell.
+
+    start() / stop() / send_snapshot() may be called from any thread.
+    """
+
+    def __init__(self, workspace, hub, fps=60, delta=True, pos_eps=0.01, ang_eps=0.01, keyframe_s=1.0,
+                 binary=False, metrics_s=1.0, cell="default"):
+        super().__init__(workspace, fps=fps, delta=delta, pos_eps=pos_eps, ang_eps=ang_eps,
+                         keyframe_s=keyframe_s, binary=binary, metrics_s=metrics_s, cell=cell)
+        self.hub = hub
+        self._conn = None       # _Connection, set by the hub
+        self._tasks = []
+        self._pending = None    # merged frames not sent yet (event loop only)
+        self._wake = None       # asyncio.Event: _pending is set
+
+    # ---------- public (thread-safe) ----------
+    def start(self):
+        """Attach to the hub (connecting if needed) and start streaming."""
+        return self.hub.attach(self)
+
+    def stop(self):
+        self.hub.detach(self)
+        self.stop_recording()
+
+    def send_snapshot(self):
+        """Force a full snapshot now."""
+        if self._conn is not None:
+            self.hub.call_soon(lambda: self.hub.spawn(self._send_snapshot()))
+
+    # ---------- event loop ----------
+    async def _run(self):
+        """Start the frame and sender tasks (on the hub's loop)."""
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._frame_loop()), asyncio.ensure_future(self._send_loop())]
+
+    async def _cancel(self):
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _send_snapshot(self):
+        # the snapshot computes poses under the workspace's (threading) pose lock: not on the loop
+        snapshot, table = await self.hub.run_blocking(self._prepare_snapshot)
+        conn = self._conn
+        if conn is None:
+            return
+        if table is not None and snapshot and conn.connected:
+            # the table goes out directly (never coalesced) so frames can be decoded
+            await conn.emit("upstream_table", table, self.cell)
+        self._queue(snapshot)
+
+    def _send_frame(self, frame):
+        self.hub.call_soon(self._queue, frame)
+
+    def _queue(self, payload):
+        metrics = self.metrics
+        if not payload:
+            metrics.inc("frames_empty")
+            return
+        if self._conn is None or not self._conn.connected:
+            metrics.inc("frames_dropped")
+            return
+        if self._pending is None:
+            self._pending = {name: dict(spec) for name, spec in payload.items()}
+        else:
+            # the previous frame is still waiting for its ACK: merge
+            metrics.inc("frames_coalesced")
+            for name, spec in payload.items():
+                self._pending.setdefault(name, {}).update(spec)
+        self._wake.set()
+
+    async def _send_loop(self):
+        metrics = self.metrics
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            payload, self._pending = self._pending, None
+            if not payload:
+                continue
+            t_sent = time.perf_counter()
+            try:
+                with metrics.time("serialize"):
+                    frame = self._encode_frame(payload) if self.binary else None
+                if frame is not None:
+                    metrics.inc("bytes_out", len(frame))
+                    await self._conn.call("upstream_frame", frame, self.cell)
+                else:
+                    await self._conn.call("upstream_update", payload, self.cell)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # ACK timeout or lost connection: the next snapshot/keyframe resyncs
+                metrics.inc("errors_emit")
+                continue
+            metrics.observe("ack_rtt", time.perf_counter() - t_sent)
+            metrics.inc("frames_sent")
+
+    async def _frame_loop(self):
+        # drift-resistant frame timer on the loop clock
+        loop = asyncio.get_running_loop()
+        next_t = loop.time()
+        ticks, window_t = 0, next_t
+        while True:
+            try:
+                # compute_world_poses() takes the workspace's threading lock (shared with user
+                # calls) and does the FK: run it off the loop so other cells keep streaming
+                with self.metrics.time("frame"):
+                    self._queue(await self.hub.run_blocking(self._next_frame))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # don't let one bad frame kill the task
+                self.metrics.inc("errors_frame")
+
+            ticks += 1
+            now = loop.time()
+            if now - window_t >= self.metrics_s:
+                await self._push_metrics(ticks, now - window_t)
+                ticks, window_t = 0, now
+
+            period = self._period
+            next_t += period
+            now = loop.time()
+            delay = next_t - now
+            if delay < -period:
+                # far behind (loop stalled): reset the schedule
+                next_t = now + period
+                delay = period
+            await asyncio.sleep(max(delay, 0.0))
+
+    async def _push_metrics(self, ticks, dt):
+        """Achieved fps over the last window, then ship all metrics to the server."""
+        self.metrics.set("fps_achieved", ticks / dt if dt > 0 else 0.0)
+        if self._conn is not None and self._conn.connected:
+            try:
+                await self._conn.emit("producer_metrics", self.metrics.snapshot(), self.cell)
+            except Exception:
+                pass
+
+
+class _Connection:
+    """One socketio.AsyncClient carrying one cell, or many (multiplexed: events carry the cell ID)."""
+
+    def __init__(self, hub, multiplex):
+        self.hub = hub
+        self.multiplex = multiplex
+        self.displays = {}      # cell ID -> AsyncDisplay
+        self._lock = asyncio.Lock()
+        # set from the connect handler (sio.connected only turns True once connect() returns)
+        self.connected = False
+        self.sio = socketio.AsyncClient(reconnection=True, logger=hub.debug, engineio_logger=hub.debug)
+        self.sio.on("connect", self._on_connect)
+        self.sio.on("disconnect", self._on_disconnect)
+        self.sio.on("request_snapshot", self._on_request_snapshot)
+
+    def _args(self, data, cell):
+        return (data, cell) if self.multiplex else data
+
+    async def emit(self, event, data, cell):
+        await self.sio.emit(event, self._args(data, cell))
+
+    async def call(self, event, data, cell):
+        """Emit and wait for the server's ACK."""
+        return await self.sio.call(event, self._args(data, cell), timeout=self.hub.ack_timeout)
+
+    async def connect(self):
+        async with self._lock:
+            if self.sio.connected:
+                return
+            if self.multiplex:
+                auth = {"role": "producer", "cells": list(self.displays)}
+            else:
+                auth = {"role": "producer", "cell": next(iter(self.displays))}
+            await self.sio.connect(self.hub.server_url, transports=["websocket"], socketio_path="/socket.io/",
+                                   auth=auth, wait_timeout=5)
+
+    async def _on_connect(self):
+        self.connected = True
+        # full snapshot of every cell on (re)connect
+        for display in list(self.displays.values()):
+            self.hub.spawn(display._send_snapshot())
+
+    async def _on_disconnect(self, *_reason):
+        self.connected = False
+
+    async def _on_request_snapshot(self, data=None):
+        cell = data.get("cell") if isinstance(data, dict) else None
+        for cell_id, display in list(self.displays.items()):
+            if cell is None or cell_id == cell:
+                await display._send_snapshot()
+
+
+class DisplayHub:
+    """
+    Runs the AsyncDisplays of many workspaces (e.g. a farm of simulated cells) on one asyncio
+    event loop: no thread per workspace, and with multiplex=True a single socket.io connection
+    for all of them (the relay routes each event by the cell ID it carries).
+
+        hub = DisplayHub("http://127.0.0.1:5000")
+        cells = [Workspace(cfg, cell=f"sim-{i}", display_hub=hub) for i in range(40)]
+        ...
+        hub.stop()
+
+    Without a running loop, the hub starts its own in a background thread on first use.
+    From code already running in an event loop, use `await hub.add(display)` / `remove()`;
+    that loop becomes the hub's loop.
+
+    Frames and snapshots are built (FK under each workspace's pose lock) in the hub's own
+    pool of `workers` threads, not the loop's default executor: the farm's thread count stays
+    fixed however many cells it runs, a workspace blocked on its lock holds at most one worker,
+    and other code using the default executor neither starves nor is starved by the frames.
+    """
+
+    def __init__(self, server_url="http://127.0.0.1:5000", multiplex=True, ack_timeout=5.0, debug=False,
+                 workers=4):
+        self.server_url = server_url
+        self.multiplex = bool(multiplex)
+        self.ack_timeout = float(ack_timeout)
+        self.debug = bool(debug)
+        self.workers = max(1, int(workers))
+        self.loop = None
+        self._thread = None
+        self._executor = None   # ThreadPoolExecutor for run_blocking(), made on first use
+        self._conns = {}        # None (multiplexed) or cell ID -> _Connection
+        self._spawned = set()
+
+    # ---------- loop ----------
+    def _ensure_loop(self):
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(self.loop)
+                self.loop.call_soon(ready.set)
+                self.loop.run_forever()
+
+            self._thread = threading.Thread(target=run, daemon=True)
+            self._thread.start()
+            ready.wait()
+        return self.loop
+
+    def _in_loop(self):
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def call_soon(self, fn, *args):
+        """Run fn(*args) on the hub's loop (thread-safe)."""
+        if self.loop is None:
+            return
+        if self._in_loop():
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+    def spawn(self, coro):
+        """Run a coroutine as a task on the hub's loop (from the loop)."""
+        task = asyncio.ensure_future(coro)
+        self._spawned.add(task)
+        task.add_done_callback(self._spawned.discard)
+        return task
+
+    async def run_blocking(self, fn):
+        """Await fn() run in the hub's worker pool (from the loop)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="display-hub")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn)
+
+    def _stop_workers(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _submit(self, coro, wait):
+        """Run coro on the hub's loop; from another thread optionally wait for it."""
+        if self._in_loop():
+            return self.spawn(coro)
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result(timeout=10.0) if wait else future
+
+    # ---------- displays ----------
+    def attach(self, display):
+        """add() from any thread: True if connected and streaming (from the loop: a task)."""
+        return self._submit(self.add(display), wait=True)
+
+    def detach(self, display):
+        if self.loop is not None and not self.loop.is_closed():
+            return self._submit(self.remove(display), wait=False)
+
+    async def add(self, display):
+        """Start streaming a display; connects its connection if needed. False if the server is unreachable."""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        key = None if self.multiplex else display.cell
+        conn = self._conns.get(key)
+        if conn is None:
+            conn = self._conns[key] = _Connection(self, self.multiplex)
+        if conn.displays.get(display.cell, display) is not display:
+            raise ValueError(f"cell '{display.cell}' already has a display on this hub")
+        conn.displays[display.cell] = display
+        display._conn = conn
+        await display._run()
+        if conn.connected:
+            await display._send_snapshot()
+            return True
+        try:
+            await conn.connect()        # snapshots of every display go out on connect
+        except Exception:
+            await self.remove(display)
+            return False
+        return True
+
+    async def remove(self, display):
+        await display._cancel()
+        key = None if self.multiplex else display.cell
+        conn = self._conns.get(key)
+        if conn is None or conn.displays.get(display.cell) is not display:
+            return
+        del conn.displays[display.cell]
+        display._conn = None
+        if not conn.displays:
+            del self._conns[key]
+            conn.connected = False
+            await conn.sio.disconnect()
+
+    def stop(self):
+        """Stop every display, disconnect, and stop the hub's own loop thread and worker pool."""
+        if self.loop is None:
+            self._stop_workers()
+            return
+
+        async def shutdown():
+            for conn in list(self._conns.values()):
+                for display in list(conn.displays.values()):
+                    await self.remove(display)
+            self._stop_workers()
+
+        if self._thread is not None:
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout=10.0)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=2.0)
+            self._thread = None
+            self.loop.close()
+            self.loop = None
+        elif self._in_loop():
+            return self.spawn(shutdown())
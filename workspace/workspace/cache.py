@@ -0,0 +1,152 @@
+# workspace/cache.py
+"""
+Compiled-scene cache (opt-in: Workspace(cache=True)): skip YAML parsing and the scene compile
+on start.
+
+After a normal build, Workspace stores the parsed config (as JSON) and the CompiledScene as
+plain arrays (solid paths, parent indices, depths, local/world transforms, poses, keys) in
+one uncompressed .npz under
+    <cache dir>/<key>.npz
+key = sha256 of the config file bytes, the source of the workspace package (including the
+built-in component modules), the dorna2 version and the Python version, so editing the
+config or the code that builds it makes a new entry. Components from entry points are
+checked by their distribution version on load.
+
+Nothing executable is stored: entries are read with np.load(allow_pickle=False). On a hit
+the components are still built from the config (they hold live state and hardware), but the
+scene is adopted from the arrays (CompiledScene.from_arrays) instead of being compiled, and
+any local transform that differs is recomputed. Only the `keep` most recently used entries
+are kept; store() deletes older ones. Location: $WORKSPACE_CACHE_DIR, else
+$XDG_CACHE_HOME/dorna-workspace, else ~/.cache/dorna-workspace.
+"""
+import hashlib, json, os, sys, tempfile
+from importlib.metadata import version, PackageNotFoundError
+from pathlib import Path
+
+import numpy as np
+
+from workspace.components import factory as comp_factory
+
+FORMAT = 2
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+def default_dir():
+    env = os.environ.get("WORKSPACE_CACHE_DIR")
+    if env:
+        return Path(env)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "dorna-workspace"
+
+
+def _dist_version(name):
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def cache_key(config_bytes):
+    """Hex key of a config file's bytes + the code that builds it."""
+    h = hashlib.sha256()
+    h.update(f"wsc{FORMAT} py{sys.version_info[0]}.{sys.version_info[1]}\0".encode())
+    h.update(f"dorna2 {_dist_version('dorna2')}\0".encode())
+    for path in sorted(PACKAGE_DIR.rglob("*.py")):
+        h.update(str(path.relative_to(PACKAGE_DIR)).encode() + b"\0")
+        h.update(path.read_bytes())
+    h.update(b"\0config\0")
+    h.update(config_bytes)
+    return h.hexdigest()
+
+
+def _plugin_versions(cfgs):
+    """{type: [distribution, version]} of the component types provided by entry points."""
+    types = {ccfg.get("type") for ccfg in cfgs.values()} - set(comp_factory._modules)
+    if not types:
+        return {}
+    out = {}
+    for ep in comp_factory.entry_points(group=comp_factory.ENTRY_POINT_GROUP):
+        if ep.name in types:
+            dist = getattr(ep, "dist", None)
+            out[ep.name] = [dist.name, dist.version] if dist is not None else [ep.value, None]
+    return out
+
+
+def _text(obj):
+    return np.frombuffer(json.dumps(obj, separators=(",", ":")).encode(), dtype=np.uint8)
+
+
+def _untext(arr):
+    return json.loads(arr.tobytes().decode())
+
+
+class WorkspaceCache:
+    """
+    Load / store compiled scenes in `path` (default: default_dir()).
+        key = cache_key(config_bytes)
+        hit = cache.load(key)   -> (cfgs, {name: ndarray}) or None
+        cache.store(key, cfgs, arrays)
+    Any unreadable, outdated or foreign entry is a miss; store() never raises.
+    A hit marks the entry as used; store() prunes all but the `keep` most recently used.
+    """
+
+    def __init__(self, path=None, keep=8):
+        self.path = Path(path) if path is not None else default_dir()
+        self.keep = max(1, int(keep))
+
+    def file(self, key):
+        return self.path / f"{key}.npz"
+
+    def load(self, key):
+        try:
+            with np.load(self.file(key), allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+            meta = _untext(arrays.pop("meta"))
+        except Exception:
+            return None
+        if not isinstance(meta, dict) or meta.get("format") != FORMAT:
+            return None
+        if meta["plugins"] and meta["plugins"] != _plugin_versions(meta["cfgs"]):
+            return None
+        try:
+            os.utime(self.file(key))     # most recently used: kept by prune()
+        except OSError:
+            pass
+        return meta["cfgs"], arrays
+
+    def store(self, key, cfgs, arrays):
+        """Write an entry atomically; False if it can't (e.g. a config value JSON can't hold)."""
+        tmp = None
+        try:
+            meta = _text({"format": FORMAT, "plugins": _plugin_versions(cfgs), "cfgs": cfgs})
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, meta=meta, **arrays)
+            os.replace(tmp, self.file(key))
+        except Exception:
+            if tmp is not None and os.path.exists(tmp):
+                os.unlink(tmp)
+            return False
+        self.prune()
+        return True
+
+    def prune(self):
+        """Delete all but the `keep` most recently used entries (every config/code edit makes a new one)."""
+        entries = []
+        for path in self.path.glob("*.npz"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                pass
+        entries.sort(reverse=True)
+        for _, path in entries[self.keep:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def clear(self):
+        """Delete every cached scene."""
+        for path in self.path.glob("*.npz"):
+            path.unlink(missing_ok=True)
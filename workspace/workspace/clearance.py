@@ -0,0 +1,177 @@
+# workspace/clearance.py
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from workspace import glb
+from workspace.spatial import BoxGrid, box_gap
+
+CAD_DIR = Path(__file__).resolve().parents[1] / "static" / "CAD"
+
+
+class Clearance:
+    """
+    Broad-phase collision / clearance between the robot and everything else.
+
+    Every solid (and every instance of an InstancedArray) gets the box of its mesh,
+    read from the GLB POSITION accessor min/max (static/CAD/<type>.glb, no vertex data).
+    The box is an OBB in the solid's frame; its world AABB is computed from the
+    compiled scene's world transforms in one batch, only for boxes whose owner moved,
+    and kept in a uniform grid (BoxGrid) so a query only tests nearby boxes.
+
+    "Moving" boxes are the subtrees of the components' `moving` solids (core: rail
+    carriage, links, flange and whatever is attached to it). Queries test moving
+    boxes against the static ones; parent/child pairs (always in contact) are skipped.
+    Distances are AABB gaps: a lower bound of the true mesh distance, i.e. a warning
+    fires early rather than late.
+
+    Workspace.enable_clearance() creates one and refreshes it in compute_world_poses().
+    After changing instance occupancy, call Workspace.invalidate_scene() to rebuild the boxes.
+    """
+
+    def __init__(self, cad_dir=CAD_DIR, cell=100.0, moving=None, ignore=()):
+        self.cad_dir = Path(cad_dir)
+        self.cell = float(cell)
+        self.moving_solids = moving            # None: the components' `moving` solids
+        self.ignore = {frozenset(p) for p in ignore}
+        self._mesh_boxes = {}                  # mesh type -> (lo, hi) or None
+        self._lock = threading.Lock()
+        self._scene = None
+
+    # ---------- geometry ----------
+    def mesh_box(self, mesh_type):
+        """(lo, hi) of static/CAD/<mesh_type>.glb in the mesh frame, or None without a mesh."""
+        if mesh_type not in self._mesh_boxes:
+            path = self.cad_dir / f"{mesh_type}.glb"
+            try:
+                self._mesh_boxes[mesh_type] = glb.bounds(path)
+            except (OSError, ValueError, KeyError):
+                self._mesh_boxes[mesh_type] = None
+        return self._mesh_boxes[mesh_type]
+
+    def _build(self, components, scene):
+        """Box arrays for a (re)compiled scene."""
+        names, owners, offsets, centers, halves, keys = [], [], [], [], [], []
+        # each box belongs to an owner solid (scene index); the box frame is owner_world @ offset
+
+        def add(name, owner, offset, box, key):
+            lo, hi = box
+            names.append(name)
+            owners.append(owner)
+            offsets.append(offset)
+            centers.append((lo + hi) / 2.0)
+            halves.append((hi - lo) / 2.0)
+            keys.append(key)
+
+        index = scene.index
+        for comp_name, comp in components.items():
+            for solid_name, solid in comp.assembly.items():
+                box = self.mesh_box(getattr(solid, "type", solid_name))
+                if box is not None and id(solid) in index:
+                    add(f"{comp_name}_{solid_name}", index[id(solid)], np.eye(4), box, id(solid))
+            for inst_name, inst in getattr(comp, "instances", {}).items():
+                box = self.mesh_box(inst.type)
+                if box is None or id(inst.parent) not in index:
+                    continue
+                for slot, T in zip(inst.names, inst.local_T()):
+                    add(f"{comp_name}_{inst_name}[{slot}]", index[id(inst.parent)], T, box, id(inst.parent))
+
+        n = len(names)
+        self.names = names
+        self.owner = np.array(owners, dtype=np.intp)
+        self.offset = np.array(offsets, dtype=float).reshape(n, 4, 4)
+        self.center = np.array(centers, dtype=float).reshape(n, 3)
+        self.half = np.array(halves, dtype=float).reshape(n, 3)
+        self.lo = np.zeros((n, 3))
+        self.hi = np.zeros((n, 3))
+        self._owner_world = np.full((n, 4, 4), np.nan)   # owner world T the box was last computed for
+
+        # moving = subtrees of the moving solids
+        moving = self.moving_solids
+        if moving is None:
+            moving = [s for comp in components.values() for s in getattr(comp, "moving", ())]
+        in_moving = np.zeros(len(scene.solids), dtype=bool)
+        for s in moving:
+            i = index.get(id(s))
+            if i is not None:
+                in_moving[i:scene.subtree_end[i]] = True
+        self.is_moving = in_moving[self.owner] if n else np.zeros(0, dtype=bool)
+        self.moving_idx = np.flatnonzero(self.is_moving)
+
+        # pairs never reported: parent/child solids and user-ignored name pairs
+        self._parent_of = {id(s): id(s.parent) for s in scene.solids if s.parent is not None}
+        self._key = keys
+
+        self.grid = BoxGrid(self.cell)
+        self._scene = scene
+
+    def update(self, components, scene):
+        """Refresh world boxes from the scene (rebuilds after a recompile); only moved owners are recomputed."""
+        with self._lock:
+            if scene is not self._scene:
+                self._build(components, scene)
+            if not len(self.names):
+                return 0
+            W = scene.world[self.owner]
+            moved = np.flatnonzero(np.any(W != self._owner_world, axis=(1, 2)))
+            if len(moved):
+                self._owner_world[moved] = W[moved]
+                M = W[moved] @ self.offset[moved]
+                R, t = M[:, :3, :3], M[:, :3, 3]
+                c = np.einsum("nij,nj->ni", R, self.center[moved]) + t
+                h = np.einsum("nij,nj->ni", np.abs(R), self.half[moved])
+                self.lo[moved], self.hi[moved] = c - h, c + h
+                static = moved[~self.is_moving[moved]]
+                if len(static):
+                    self.grid.update(static, self.lo[static], self.hi[static])
+            return len(moved)
+
+    # ---------- queries ----------
+    def _adjacent(self, a, b):
+        """Same solid, or parent and child (e.g. a tube and its plate): in contact by design."""
+        ka, kb, parent_of = self._key[a], self._key[b], self._parent_of
+        return ka == kb or parent_of.get(ka) == kb or parent_of.get(kb) == ka
+
+    def _pairs(self, within):
+        """Candidate (moving box, static box) pairs closer than `within`, with their AABB gaps."""
+        a_list, b_list = [], []
+        for a in self.moving_idx.tolist():
+            cand = self.grid.query(self.lo[a] - within, self.hi[a] + within)
+            if len(cand):
+                a_list.append(np.full(len(cand), a))
+                b_list.append(cand)
+        if not a_list:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0)
+        a, b = np.concatenate(a_list), np.concatenate(b_list)
+        d = box_gap(self.lo[a], self.hi[a], self.lo[b], self.hi[b])
+        keep = d <= within
+        a, b, d = a[keep], b[keep], d[keep]
+        names = self.names
+        ok = np.array([not self._adjacent(i, j) and frozenset((names[i], names[j])) not in self.ignore
+                       for i, j in zip(a.tolist(), b.tolist())], dtype=bool)
+        if len(ok):
+            a, b, d = a[ok], b[ok], d[ok]
+        return a, b, d
+
+    def near(self, margin=10.0):
+        """[(moving name, other name, distance)] for every pair closer than margin (mm), closest first."""
+        with self._lock:
+            if self._scene is None:
+                return []
+            a, b, d = self._pairs(float(margin))
+            order = np.argsort(d, kind="stable")
+            names = self.names
+            return [(names[a[k]], names[b[k]], float(d[k])) for k in order.tolist()]
+
+    def overlaps(self):
+        """[(moving name, other name)] of overlapping boxes."""
+        return [(a, b) for a, b, d in self.near(0.0) if d == 0.0]
+
+    def min_distances(self, within=500.0):
+        """{moving name: (closest other name, distance)} among boxes closer than `within` (mm)."""
+        out = {}
+        for a, b, d in self.near(within):
+            if a not in out:
+                out[a] = (b, d)
+        return out
@@ -1,12 +1,6 @@
 # workspace/components/__init__.py
 """
-Auto-import all component modules in this package so their
-@register decorators run and they get added to the factory.
+Component types are registered lazily: factory.create_component() imports a
+component module (running its @register decorator) only when a config uses
+that type. See factory._modules for the built-in type -> module table.
 """
-
-import pkgutil
-import importlib
-
-# Dynamically import every submodule in this package
-for loader, module_name, is_pkg in pkgutil.iter_modules(__path__):
-    importlib.import_module(f"{__name__}.{module_name}")
@@ -1,6 +1,11 @@
 # workspace/components/core.py
+import time
+import numpy as np
 from dorna2 import Solid, Dorna
 from workspace.components.factory import register
+from workspace.joint_feed import JointFeed
+from workspace.anchors import GridAnchors, anchor_T
+from workspace.scene import xyzabc_to_T_batch
 
 
 @register("core")
@@ -21,36 +26,30 @@ class Core:
         self.aux_axis = cfg.get("aux_axis", 6)
         self.rail_offset = cfg.get("rail_offset", 0)
 
-        # optional robot API hookup
+        self.joint_rate = cfg.get("joint_rate", 100)
+        self.lost_s = cfg.get("lost_s", 2.0)    # quiet this long: probe; no reply for as long: reconnect
+
+        # optional robot API hookup, opened by connect()
         self.robot_api = None
-        if self.robot_ip:
-            try:
-                self.robot_api = Dorna()
-                self.robot_api.connect(self.robot_ip)
-            except Exception:
-                # keep going without a live robot
-                self.robot_api = None
+        self.joint_feed = None
+        self._joints_t = None   # timestamp of the joint sample last applied
+        self._probe_t = None    # perf_counter() of the last liveness probe (see is_connected())
 
 
         # now we buiild all anchors for the following items:
         # --------- plate
-        plate_anchors = {}
         # 10 x 20 grid (A..J, 1..20), 25mm pitch, + convenience anchors
-        plate_x_start = -237.5
-        plate_y_start = 112.5
-        plate_pitch = 25.0
-        rows = [chr(c) for c in range(ord("A"), ord("J") + 1)]  # A..J
-        cols = range(1, 21)  # 1..20
-        for r_idx, r in enumerate(rows):
-            y = plate_y_start - r_idx * plate_pitch
-            for c in cols:
-                x = plate_x_start + (c - 1) * plate_pitch
-                plate_anchors[f"{r}{c}"] = [x, y, 7.0, 0.0, 0.0, 0.0]
-        plate_anchors["corner_0"] = [-250.0, 125.0, 7.0, 0.0, 0.0, 0.0]
-        plate_anchors["corner_1"] = [250.0, 125.0, 7.0, 0.0, 0.0, 0.0]
-        plate_anchors["corner_2"] = [250.0, -125.0, 7.0, 0.0, 0.0, 0.0]
-        plate_anchors["corner_3"] = [-250.0, -125.0, 7.0, 0.0, 0.0, 0.0]
-        plate_anchors["center"] = [0.0, 0.0, 7.0, 0.0, 0.0, 0.0]
+        # (one shared, arithmetically resolved table for all six plates)
+        plate_anchors = GridAnchors.shared(
+            rows=10, cols=20, pitch=25.0, origin=(-237.5, 112.5, 7.0),
+            extras={
+                "corner_0": [-250.0, 125.0, 7.0, 0.0, 0.0, 0.0],
+                "corner_1": [250.0, 125.0, 7.0, 0.0, 0.0, 0.0],
+                "corner_2": [250.0, -125.0, 7.0, 0.0, 0.0, 0.0],
+                "corner_3": [-250.0, -125.0, 7.0, 0.0, 0.0, 0.0],
+                "center": [0.0, 0.0, 7.0, 0.0, 0.0, 0.0],
+            },
+        )
 
 
         # --------- rail base
@@ -185,6 +184,10 @@ class Core:
         self.robot_flange.attach_to(parent=self.robot_A5, parent_anchor="output", child_anchor="input", offset=[0, 0, 0, 0, 0, 0])
         # done
 
+        # solids re-attached by update_pose(); they and everything below them move with the robot
+        self.moving = [self.rail_carriage, self.robot_A1, self.robot_A2, self.robot_A3,
+                       self.robot_A4, self.robot_A5, self.robot_flange]
+
         # we check if there is tool changer
         self.has_toolchanger = cfg.get("has_toolchanger", False)
         if self.has_toolchanger:
@@ -198,6 +201,65 @@ class Core:
 
 
 
+    # -------------------------------------------------------------------------
+    # robot connection
+    # -------------------------------------------------------------------------
+
+    @property
+    def has_hardware(self):
+        return bool(self.robot_ip)
+
+    def connect(self):
+        """
+        Open the robot connection (blocking, raises on failure) and return it without putting
+        it in use; use() does that. Called in the background by the workspace
+        (workspace/connections.py); until then the robot keeps its static pose.
+        """
+        api = Dorna()
+        if api.connect(self.robot_ip) is False:
+            raise ConnectionError(f"robot at {self.robot_ip} refused the connection")
+        return api
+
+    def use(self, api):
+        """Put a connect()ed robot in use: joints are read in the background from now on."""
+        # update_pose() only reads the JointFeed cache
+        feed = JointFeed(api, rate=self.joint_rate)
+        feed.start()
+        self._probe_t = None
+        self.robot_api, self.joint_feed = api, feed
+
+    def is_connected(self):
+        """
+        Live while the controller keeps pushing messages (polled joints don't count:
+        dorna2 answers them from its cache even after the socket died). An idle controller
+        may push nothing, so after lost_s of quiet it is probed once, and only a probe left
+        unanswered for another lost_s means the link is lost.
+        """
+        feed = self.joint_feed
+        if feed is None:
+            return False
+        age = feed.push_age()
+        if age < self.lost_s:
+            return True
+        now = time.perf_counter()
+        if self._probe_t is None or now - age > self._probe_t:
+            # quiet since the last answer (or never probed): ask
+            self._probe_t = now
+            return feed.probe()
+        return now - self._probe_t < self.lost_s
+
+    def disconnect(self, api=None):
+        """Close the robot in use, or a connect()ed one that was never used."""
+        if api is not None:
+            api.close()
+            return
+        feed, api = self.joint_feed, self.robot_api
+        self.joint_feed = self.robot_api = None
+        if feed:
+            feed.stop()
+        if api:
+            api.close()
+
     # -------------------------------------------------------------------------
     # live joint update
     # -------------------------------------------------------------------------
@@ -206,14 +268,18 @@ class Core:
         """
         If a Dorna robot connection exists, update A1..A5 relative rotations
         by attaching each link with a Z-rotation equal to the corresponding joint angle.
+        Returns the solids that were re-attached (for the workspace transform cache).
+        Never blocks on the robot: joints come from the JointFeed cache, and nothing
+        is re-attached if no new sample arrived since the last call.
         """
-        if self.robot_api is None:
-            return
+        feed = self.joint_feed    # replaced by the connection thread
+        if feed is None:
+            return []
 
-        try:
-            joints = self.robot_api.joint()  # expect list/tuple of 5 floats
-        except Exception:
-            return
+        joints, t = feed.latest()  # expect list of 8 floats (j0..j7)
+        if joints is None or t == self._joints_t or len(joints) <= max(5, self.aux_axis):
+            return []
+        self._joints_t = t
 
 
         self.rail_carriage.attach_to(parent =self.rail_base, parent_anchor="center", child_anchor="center", offset =[joints[self.aux_axis],0,82,0,0,0])
@@ -225,11 +291,41 @@ class Core:
         self.robot_A5.attach_to(parent=self.robot_A4, parent_anchor="output", child_anchor="input", offset=[0, 0, 0, 0, 0, -joints[4]])
         self.robot_flange.attach_to(parent=self.robot_A5, parent_anchor="output", child_anchor="input", offset=[0, 0, 0, 0, 0, joints[5]])
 
+        return list(self.moving)
 
-
+    def joint_local_T(self, joints):
+        """
+        Batched version of update_pose() for a whole trajectory, without touching the solids.
+        joints: (S, 7+) samples in the robot's joint order (j0..j5, rail at aux_axis; with
+        exactly 7 columns the last one is the rail). Returns {solid: (S, 4, 4) local transform}
+        for the solids update_pose() re-attaches (feed to Trajectory.compute()).
+        """
+        q = np.asarray(joints, dtype=float)
+        if q.ndim != 2 or q.shape[1] < 7:
+            raise ValueError(f"joints must be (samples, 7+) with the rail axis, got {q.shape}")
+        aux = self.aux_axis if q.shape[1] > self.aux_axis else 6
+
+        # (solid, parent, parent anchor, child anchor, offset column, value column, sign), as in update_pose()
+        links = [
+            (self.rail_carriage, self.rail_base, "center", "center", 0, aux, 1.0),
+            (self.robot_A1, self.robot_A0, "output", "input", 5, 0, 1.0),
+            (self.robot_A2, self.robot_A1, "output", "input", 5, 1, 1.0),
+            (self.robot_A3, self.robot_A2, "output", "input", 5, 2, 1.0),
+            (self.robot_A4, self.robot_A3, "output", "input", 5, 3, 1.0),
+            (self.robot_A5, self.robot_A4, "output", "input", 5, 4, -1.0),
+            (self.robot_flange, self.robot_A5, "output", "input", 5, 5, 1.0),
+        ]
+        out = {}
+        for solid, parent, parent_anchor, child_anchor, slot, k, sign in links:
+            offset = np.zeros((len(q), 6))
+            if solid is self.rail_carriage:
+                offset[:, 2] = 82.0
+            offset[:, slot] = sign * q[:, k]
+            A = anchor_T([parent.anchors], [parent_anchor])[0]
+            C_inv = np.linalg.inv(anchor_T([solid.anchors], [child_anchor])[0])
+            out[solid] = A @ xyzabc_to_T_batch(offset) @ C_inv
+        return out
 
 
     def stop(self):
-
-        if self.robot_api:
-            self.robot_api.close()
+        self.disconnect()
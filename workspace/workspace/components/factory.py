@@ -1,8 +1,26 @@
 # workspace/components/factory.py
+import importlib
+from importlib.metadata import entry_points
 
-# Global registry: maps type string -> class
+# Global registry: maps type string -> class (filled by @register when a module is imported)
 _registry: dict[str, type] = {}
 
+# Built-in component types: type string -> module that registers it.
+# Modules are imported lazily, only when a config actually uses the type.
+_modules: dict[str, str] = {
+    "core": "workspace.components.core",
+    "microplate": "workspace.components.microplate",
+    "microtube": "workspace.components.microtube",
+    "microtube_gripper": "workspace.components.microtube_gripper",
+    "SBS_adapter": "workspace.components.SBS_adapter",
+    "tool_rack": "workspace.components.tool_rack",
+}
+
+# Third-party packages can add types through this entry point group:
+#   [project.entry-points."workspace.components"]
+#   decapper = "my_pkg.decapper:Decapper"
+ENTRY_POINT_GROUP = "workspace.components"
+
 
 def register(type_name: str):
     """
@@ -18,6 +36,28 @@ def register(type_name: str):
     return decorator
 
 
+def _load(type_name: str):
+    """Import the module providing type_name (built-in table first, then entry points)."""
+    module = _modules.get(type_name)
+    if module is not None:
+        importlib.import_module(module)
+        return _registry.get(type_name)
+
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        if ep.name == type_name:
+            cls = ep.load()
+            _registry.setdefault(type_name, cls)
+            return _registry[type_name]
+    return None
+
+
+def known_types():
+    """All component type names that can be created (without importing them)."""
+    names = set(_registry) | set(_modules)
+    names.update(ep.name for ep in entry_points(group=ENTRY_POINT_GROUP))
+    return sorted(names)
+
+
 def create_component(name: str, cfg: dict):
     """
     Factory function: creates a component from its config dict.
@@ -27,7 +67,7 @@ def create_component(name: str, cfg: dict):
     if not type_name:
         raise ValueError(f"Component '{name}' missing 'type' in config")
 
-    cls = _registry.get(type_name)
+    cls = _registry.get(type_name) or _load(type_name)
     if cls is None:
         raise ValueError(f"Unknown component type '{type_name}' for '{name}'")
 
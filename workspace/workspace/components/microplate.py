@@ -1,6 +1,8 @@
 # workspace/components/core.py
 from dorna2 import Solid, Dorna
 from workspace.components.factory import register
+from workspace.anchors import GridAnchors
+from workspace.instanced import InstancedArray
 
 
 @register("microplate")
@@ -13,31 +15,31 @@ class microplate:
         self.name = name
         self.type = "microplate"
         self.assembly = {}
+        self.instances = {}
         self.full = cfg.get("full", False)
+        self.instanced = cfg.get("instanced", False)
 
 
-        anchors = {}
-        anchors["center"] = [0,0,0,0,0,0]
-
-        x_start = -49.8
-        y_start = 31.5
-        pitch = 9.0
-        rows = [chr(c) for c in range(ord("A"), ord("H") + 1)]  # A..H
-        cols = range(1, 13)  # 1..20
-        for r_idx, r in enumerate(rows):
-            y = y_start - r_idx * pitch
-            for c in cols:
-                x = x_start + (c - 1) * pitch
-                anchors[f"{r}{c}"] = [x, y, 3.0, 0.0, 0.0, 0.0]
+        # 8 x 12 wells (A..H, 1..12), 9mm pitch, shared by every microplate
+        anchors = GridAnchors.shared(
+            rows=8, cols=12, pitch=9.0, origin=(-49.8, 31.5, 3.0),
+            extras={"center": [0, 0, 0, 0, 0, 0]},
+        )
 
 
         self.assembly["microplate"] = Solid(name="microplate", type="microplate", anchors=anchors, component=self.name)
 
-        if self.full:
+        if self.full and self.instanced:
+            # one instanced array over the wells instead of 96 Solids
+            self.instances["microtube"] = InstancedArray(
+                name="microtube", type="microtube", parent=self.assembly["microplate"],
+                anchors=anchors, occupied=cfg.get("wells"),
+            )
+        elif self.full:
             microtube_anchors = {}
             microtube_anchors["center"] = [0,0,0,0,0,0]
-            for r_idx, r in enumerate(rows):
-                for c in cols:
+            for r in anchors.row_labels:
+                for c in range(1, anchors.cols + 1):
                     self.assembly[f"microtube_{r}{c}"] = Solid(name=f"microtube_{r}{c}", type="microtube", anchors=microtube_anchors, component=self.name)
                     self.assembly[f"microtube_{r}{c}"].attach_to(parent=self.assembly["microplate"], parent_anchor=f"{r}{c}", child_anchor="center", offset=[0, 0, 0, 0, 0, 0])
 
@@ -0,0 +1,196 @@
+# workspace/connections.py
+import random, threading, time
+
+
+class Connection:
+    """
+    Keeps one hardware-backed component connected, in a background thread.
+
+    The component implements
+        connect()           open the device without putting it in use (blocking, raises on
+                            failure); returns a handle
+        use(handle)         put an opened handle in use (quick)
+        disconnect(handle)  close a handle that was never used
+        disconnect()        close the one in use (idempotent)
+        is_connected()      still healthy? (checked every check_s while live)
+    connect() runs in a helper thread, so a device that hangs costs `timeout` seconds, not
+    a stalled workspace; a handle that arrives after its timeout (or after stop()) is
+    closed without ever being used.
+    Failed or lost connections are retried with exponential backoff (backoff_s .. max_backoff_s,
+    +-20% jitter). Until connect() succeeds the component keeps its static pose.
+
+    state: "connecting", "live", "backoff" or "stopped".
+    """
+
+    def __init__(self, name, component, metrics=None, timeout=5.0, backoff_s=0.5, max_backoff_s=30.0,
+                 check_s=0.5):
+        self.name = name
+        self.component = component
+        self.metrics = metrics
+        self.timeout = float(timeout)
+        self.backoff_s = float(backoff_s)
+        self.max_backoff_s = float(max_backoff_s)
+        self.check_s = float(check_s)
+
+        self.state = "stopped"
+        self.attempts = 0           # connect() calls
+        self.error = None           # last failure (exception or "timeout")
+        self.live_since = None      # time.time() of the current connection
+
+        self._lock = threading.Lock()
+        self._live = threading.Event()
+        self._helper = None         # thread running connect()
+        self._result = None         # its outcome, shared with it under _lock
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    # ---------- connect ----------
+    def _attempt(self):
+        """One connect() with the timeout; True if connected."""
+        if self._helper is not None and self._helper.is_alive():
+            # the previous, timed-out connect() is still running: never two at once
+            self.error = "timeout"
+            return False
+        self.attempts += 1
+        result = self._result = {}
+        comp = self.component
+
+        def run():
+            handle, ok, error = None, False, None
+            try:
+                handle = comp.connect()
+                ok = True
+            except Exception as e:
+                error = e
+            with self._lock:
+                # decided under the lock _attempt() gives up under: used or abandoned, never both
+                abandoned = result.get("abandoned", False)
+                if ok and not abandoned:
+                    try:
+                        comp.use(handle)
+                    except Exception as e:
+                        ok, error = False, e
+                        _quiet(lambda: comp.disconnect(handle))
+                result["ok"], result["error"] = ok, error
+            if ok and abandoned:
+                # connected after we gave up on it
+                _quiet(lambda: comp.disconnect(handle))
+
+        t = self._helper = threading.Thread(target=run, daemon=True, name=f"connect-{self.name}")
+        t.start()
+        t.join(self.timeout)
+        with self._lock:
+            if "ok" not in result:
+                result["abandoned"] = True
+                self.error = "timeout"
+                return False
+        self.error = result["error"]
+        return result["ok"]
+
+    def _inc(self, name):
+        if self.metrics is not None:
+            self.metrics.inc(name)
+
+    def _run(self):
+        delay = self.backoff_s
+        while not self._stop_event.is_set():
+            self.state = "connecting"
+            if self._attempt():
+                self.state, self.live_since = "live", time.time()
+                self._live.set()
+                self._inc("connects")
+                delay = self.backoff_s
+                while not self._stop_event.wait(self.check_s):
+                    if not _quiet(self.component.is_connected):
+                        break
+                self._live.clear()
+                self.live_since = None
+                _quiet(self.component.disconnect)
+                if self._stop_event.is_set():
+                    break
+                self.error = "lost"
+                self._inc("connections_lost")
+            else:
+                self._inc("connect_failures")
+            self.state = "backoff"
+            self._stop_event.wait(delay * random.uniform(0.8, 1.2))
+            delay = min(2 * delay, self.max_backoff_s)
+        self.state = "stopped"
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"connection-{self.name}")
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Block until live; False on timeout."""
+        return self._live.wait(timeout)
+
+    def stop(self):
+        self._stop_event.set()
+        t = self._thread
+        self._thread = None
+        if t and t.is_alive():
+            t.join(timeout=self.check_s + 2.0)
+        with self._lock:
+            if self._result is not None and "ok" not in self._result:
+                self._result["abandoned"] = True     # a hung connect() closes itself if it ever returns
+        _quiet(self.component.disconnect)
+        self._live.clear()
+        self.state = "stopped"
+
+    def status(self):
+        return {"state": self.state, "attempts": self.attempts, "live_since": self.live_since,
+                "error": None if self.error is None else str(self.error)}
+
+
+class Connections:
+    """
+    The Connections of every hardware-backed component of a workspace, all connecting
+    concurrently (one thread each). A component takes part if it has connect() and use()
+    and its `has_hardware` (default True) is set.
+    """
+
+    def __init__(self, components, metrics=None, **kwargs):
+        self.items = {
+            name: Connection(name, comp, metrics, **kwargs)
+            for name, comp in components.items()
+            if callable(getattr(comp, "connect", None)) and callable(getattr(comp, "use", None))
+            and getattr(comp, "has_hardware", True)
+        }
+
+    def start(self):
+        for conn in self.items.values():
+            conn.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Block until every device is live; False on timeout."""
+        end = None if timeout is None else time.perf_counter() + timeout
+        for conn in self.items.values():
+            left = None if end is None else max(0.0, end - time.perf_counter())
+            if not conn.wait(left):
+                return False
+        return True
+
+    def status(self):
+        """{component name: {"state", "attempts", "live_since", "error"}}."""
+        return {name: conn.status() for name, conn in self.items.items()}
+
+    def stop(self):
+        conns = list(self.items.values())
+        for conn in conns:
+            conn._stop_event.set()
+        for conn in conns:
+            conn.stop()
+
+
+def _quiet(fn):
+    try:
+        return fn()
+    except Exception:
+        return None
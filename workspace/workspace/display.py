@@ -1,45 +1,60 @@
 # workspace/display.py
-import time, json, threading
+import time, threading
+from abc import ABC, abstractmethod
 import socketio
 
-class Display:
-    def __init__(self, workspace, server_url="http://127.0.0.1:5000", fps=60, debug=False):
+from workspace import wire
+from workspace.metrics import Metrics
+
+
+class DisplayBase(ABC):
+    """
+    Everything a producer does apart from talking to the server: snapshot and pose-frame
+    builders, delta filtering, the binary name table, trajectory playback, recording and
+    metrics. Display (a thread + socketio.Client per workspace) and AsyncDisplay (asyncio,
+    many workspaces per process, workspace/async_display.py) send what it builds.
+    """
+
+    def __init__(self, workspace, fps=60, delta=True, pos_eps=0.01, ang_eps=0.01, keyframe_s=1.0,
+                 binary=False, metrics_s=1.0, cell="default"):
         self.workspace = workspace
-        self.SERVER = server_url
+        # the relay keeps one state per cell; viewers subscribe to the cells they show
+        self.cell = str(cell)
         self.fps = max(1, int(fps))
         self._period = 1.0 / self.fps
 
-        self._thread = None
-        self._stop_event = threading.Event()
-        self._state_lock = threading.RLock()   # protects _inflight/_pending
+        # delta mode: only send solids that moved more than pos_eps (mm) / ang_eps (deg)
+        # since the last pose we emitted; a full pose keyframe goes out every keyframe_s
+        self.delta = bool(delta)
+        self.pos_eps = float(pos_eps)
+        self.ang_eps = float(ang_eps)
+        self.keyframe_s = float(keyframe_s)
+        self._last_sent = {}        # name -> last emitted pose
+        self._last_keyframe = 0.0
 
-        self.sio = socketio.Client(
-            reconnection=True,
-            logger=bool(debug),
-            engineio_logger=bool(debug)
-        )
-        self._connected_evt = threading.Event()
+        # binary mode: pose-only frames go out as packed float32 buffers (see workspace/wire.py)
+        # indexed by a name table that is sent with each snapshot
+        self.binary = bool(binary)
+        self._table = {"version": 0, "names": []}
+        self._table_index = {}
 
-        @self.sio.event
-        def connect():
-            self._connected_evt.set()
-            # full snapshot on (re)connect
-            self._emit_update(self._build_snapshot())
+        # hot-path timers/counters (shared with the workspace), pushed to the server every metrics_s
+        self.metrics = getattr(workspace, "metrics", None) or Metrics()
+        self.metrics_s = float(metrics_s)
+        self.metrics.set("fps_target", self.fps)
 
-        @self.sio.event
-        def disconnect():
-            self._connected_evt.clear()
-
-        @self.sio.on("request_snapshot")
-        def _on_request_snapshot(_data=None):
-            self._emit_update(self._build_snapshot())
+        self._state_lock = threading.RLock()   # delta baseline, table, playback (user calls vs frame loop)
 
-        # ACK/backpressure state
-        self._inflight = False
-        self._pending = None
+        # trajectory playback (see play()): replaces the live poses of the solids it moves
+        self._traj = None
+        self._play_t0 = 0.0       # perf_counter() at which sample _play_i0 was shown
+        self._play_i0 = 0
+        self._play_speed = 1.0
+        self._play_loop = False
+        self._play_paused = False
 
-        # (optional) last payload size to skip redundant huge frames
-        self._last_size = 0
+        # optional on-disk recording of every emitted frame (see start_recording())
+        self.recorder = None
 
     # ---------- public utilities ----------
     def set_fps(self, fps:int):
@@ -47,18 +62,160 @@ class Display:
         with self._state_lock:
             self.fps = max(1, int(fps))
             self._period = 1.0 / self.fps
+        self.metrics.set("fps_target", self.fps)
 
-    def send_snapshot(self):
-        """Force a full snapshot now."""
-        self._emit_update(self._build_snapshot())
+    # ---------- frames (sent by the transport) ----------
+    def _prepare_snapshot(self):
+        """
+        Build a full snapshot and make it the delta baseline (and, in binary mode, the name
+        table). Returns (snapshot, table to send first or None).
+        """
+        snapshot = self._build_snapshot()
+        # the snapshot carries every pose, so it becomes the new delta baseline
+        table = None
+        with self._state_lock:
+            self._last_sent = {name: spec["pose"] for name, spec in snapshot.items()
+                               if len(spec["pose"]) == 6}
+            self._last_keyframe = time.perf_counter()
+            if self.binary:
+                names = list(snapshot)
+                if names != self._table["names"]:
+                    self._table = {"version": self._table["version"] + 1, "names": names}
+                    self._table_index = {name: i for i, name in enumerate(names)}
+                table = self._table
+        recorder = self.recorder
+        if recorder is not None:
+            try:
+                recorder.record_specs(snapshot)
+                recorder.record(snapshot)
+            except Exception:
+                # a recorder fault never costs the live snapshot
+                self.metrics.inc("errors_record")
+        return snapshot, table
+
+    def _next_frame(self):
+        """This tick's frame: the trajectory sample while playing, else the live poses (recorded)."""
+        if self._traj is not None:
+            return self._recorded(self._build_playback_frame())
+        return self._recorded(self._build_pose_frame())
+
+    def _recorded(self, frame):
+        recorder = self.recorder
+        if recorder is not None:
+            try:
+                recorder.record(frame)
+            except Exception:
+                # a recorder fault never costs the live frame
+                self.metrics.inc("errors_record")
+        return frame
+
+    @abstractmethod
+    def _send_frame(self, frame):
+        """Send one frame now (seek()); implemented by the transport."""
+
+    # ---------- recording ----------
+    def start_recording(self, path, **kwargs):
+        """
+        Append every frame from now on to a recording file (see workspace/recording.py);
+        kwargs go to Recorder. Returns the Recorder.
+        """
+        from workspace.recording import Recorder
+        self.stop_recording()
+        recorder = Recorder(path, **kwargs).start()
+        snapshot = self._build_snapshot()
+        recorder.record_specs(snapshot)
+        recorder.record(snapshot)
+        self.recorder = recorder
+        return recorder
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    # ---------- trajectory playback ----------
+    def play(self, trajectory, speed=1.0, loop=False, start=0):
+        """
+        Stream a precomputed Trajectory instead of the live robot poses, at the display fps
+        (one sample per frame if trajectory.dt is None, else in real time * speed).
+        Live poses resume when it ends (unless loop) or on stop_playback().
+        """
+        with self._state_lock:
+            self._traj = trajectory
+            self._play_speed = float(speed)
+            self._play_loop = bool(loop)
+            self._play_paused = False
+            self._play_i0 = int(start)
+            self._play_t0 = time.perf_counter()
+
+    def pause(self):
+        with self._state_lock:
+            if self._traj is not None and not self._play_paused:
+                self._play_i0 = self._play_index(time.perf_counter())
+                self._play_paused = True
+
+    def resume(self):
+        with self._state_lock:
+            if self._traj is not None and self._play_paused:
+                self._play_paused = False
+                self._play_t0 = time.perf_counter()
+
+    def seek(self, i):
+        """Jump to sample i (scrubbing); the frame is sent right away."""
+        with self._state_lock:
+            if self._traj is None:
+                return
+            self._play_i0 = min(max(int(i), 0), len(self._traj) - 1)
+            self._play_t0 = time.perf_counter()
+        self._send_frame(self._recorded(self._build_playback_frame()))
+
+    def stop_playback(self):
+        with self._state_lock:
+            self._traj = None
+
+    @property
+    def playback_index(self):
+        """Sample currently shown, or None without a trajectory."""
+        with self._state_lock:
+            return None if self._traj is None else self._play_index(time.perf_counter())
+
+    def _play_index(self, now):
+        """Sample index at `now` (unclamped), under _state_lock."""
+        if self._play_paused:
+            return self._play_i0
+        dt = self._traj.dt or self._period
+        return self._play_i0 + int((now - self._play_t0) * self._play_speed / dt)
+
+    def _playback_poses(self, finish=False):
+        """Poses of the current trajectory sample ({} without one); finish: end a finished one."""
+        with self._state_lock:
+            traj = self._traj
+            if traj is None:
+                return {}
+            i = self._play_index(time.perf_counter())
+            if i >= len(traj):
+                if self._play_loop:
+                    i %= len(traj)
+                else:
+                    # hold the last sample, then back to live poses
+                    i = len(traj) - 1
+                    if finish:
+                        self._traj = None
+        return traj.poses(i)
+
+    def _build_playback_frame(self):
+        """Pose frame of the current trajectory sample (delta-filtered like live frames)."""
+        return self._delta_frame(self._playback_poses(finish=True))
 
     # ---------- payload builders ----------
     def _build_snapshot(self):
-        """meshUrl + pose + visible for each solid."""
+        """meshUrl + pose + visible for each solid (+ instances for instanced arrays)."""
         try:
             poses = self.workspace.compute_world_poses()
         except Exception:
+            self.metrics.inc("errors_compute")
             poses = {}
+        poses.update(self._playback_poses())
 
         batch = {}
         try:
@@ -74,42 +231,152 @@ class Display:
                         "pose": pose,
                         "visible": True,
                     }
+                # instanced arrays: one spec, pose = parent pose, instances relative to it
+                for inst_name, inst in (getattr(comp, "instances", {}) or {}).items():
+                    key = f"{comp_name}_{inst_name}"
+                    batch[key] = {
+                        "meshUrl": f"/static/CAD/{inst.type}.glb",
+                        "pose": poses.get(key, [0, 0, 0, 0, 0, 0]),
+                        "visible": True,
+                        "instances": inst.local_xyzabc().tolist(),
+                    }
         except Exception:
             # If anything goes wrong, return what we have (or empty dict)
-            pass
+            self.metrics.inc("errors_snapshot")
 
         return batch
 
     def _build_pose_frame(self):
-        """pose + visible only (lightweight per-frame)."""
+        """
+        pose + visible only (lightweight per-frame).
+        In delta mode only solids that moved past pos_eps/ang_eps are included,
+        so an idle robot produces empty frames (nothing is sent) apart from the keyframe.
+        """
         try:
             poses = self.workspace.compute_world_poses()
         except Exception:
+            self.metrics.inc("errors_compute")
             poses = {}
+        return self._delta_frame(poses)
 
-        return {name: {"pose": p, "visible": True} for name, p in poses.items()}
+    def _delta_frame(self, poses):
+        """{name: pose} -> frame, keeping only what moved (delta mode) and updating the baseline."""
+        if not self.delta:
+            return {name: {"pose": p, "visible": True} for name, p in poses.items()}
+
+        now = time.perf_counter()
+        pos_eps, ang_eps = self.pos_eps, self.ang_eps
+        frame = {}
+        with self._state_lock:
+            last = self._last_sent
+            keyframe = now - self._last_keyframe >= self.keyframe_s
+            if keyframe:
+                self._last_keyframe = now
+            for name, p in poses.items():
+                prev = last.get(name)
+                if not keyframe and prev is not None and not _moved(prev, p, pos_eps, ang_eps):
+                    continue
+                frame[name] = {"pose": p, "visible": True}
+                last[name] = p
+        return frame
+
+    def _encode_frame(self, payload: dict):
+        """Pack a pose-only payload as a binary frame (None if it has to go as JSON)."""
+        with self._state_lock:
+            table, index = self._table, self._table_index
+        try:
+            idx = [index[name] for name in payload]
+        except KeyError:
+            return None  # unknown solid: let the JSON path (and the server) sort it out
+        poses, visible = [], []
+        for spec in payload.values():
+            if "pose" not in spec or spec.keys() - _FRAME_KEYS:
+                return None  # carries mesh info etc.
+            poses.append(spec["pose"])
+            visible.append(spec.get("visible", True))
+        if len(idx) == len(index) and idx == list(range(len(idx))):
+            idx = None  # full frame in table order
+        try:
+            return wire.pack_frame(table["version"], poses, visible, idx)
+        except ValueError:
+            return None
+
+
+class Display(DisplayBase):
+    """Producer for one workspace: a socketio.Client and a frame thread."""
+
+    def __init__(self, workspace, server_url="http://127.0.0.1:5000", fps=60, debug=False,
+                 delta=True, pos_eps=0.01, ang_eps=0.01, keyframe_s=1.0, binary=False,
+                 metrics_s=1.0, cell="default"):
+        super().__init__(workspace, fps=fps, delta=delta, pos_eps=pos_eps, ang_eps=ang_eps,
+                         keyframe_s=keyframe_s, binary=binary, metrics_s=metrics_s, cell=cell)
+        self.SERVER = server_url
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        self.sio = socketio.Client(
+            reconnection=True,
+            logger=bool(debug),
+            engineio_logger=bool(debug)
+        )
+        self._connected_evt = threading.Event()
+
+        @self.sio.event
+        def connect():
+            self._connected_evt.set()
+            # full snapshot on (re)connect
+            self.send_snapshot()
+
+        @self.sio.event
+        def disconnect():
+            self._connected_evt.clear()
+
+        @self.sio.on("request_snapshot")
+        def _on_request_snapshot(_data=None):
+            self.send_snapshot()
+
+        # ACK/backpressure state (under _state_lock)
+        self._inflight = False
+        self._pending = None
+
+    # ---------- snapshots ----------
+    def send_snapshot(self):
+        """Force a full snapshot now."""
+        snapshot, table = self._prepare_snapshot()
+        if table is not None and snapshot and self.sio.connected:
+            # the table goes out directly (never coalesced) so frames can be decoded
+            self.sio.emit("upstream_table", table)
+        self._emit_update(snapshot)
 
     # ---------- emit / loop ----------
+    def _send_frame(self, frame):
+        self._emit_update(frame)
+
     def _emit_update(self, payload: dict):
+        metrics = self.metrics
         if not payload:
+            metrics.inc("frames_empty")
             return
         if not self.sio.connected:
-            return
-
-        # (optional) micro-opt: skip if payload size identical to last large full snapshot
-        try:
-            encoded = json.dumps(payload)
-        except Exception:
+            metrics.inc("frames_dropped")
             return
 
         with self._state_lock:
             if self._inflight:
-                # coalesce to most recent
-                self._pending = payload
+                # coalesce: merge per object so deltas in a superseded frame are not lost
+                metrics.inc("frames_coalesced")
+                if self._pending is None:
+                    self._pending = {name: dict(spec) for name, spec in payload.items()}
+                else:
+                    for name, spec in payload.items():
+                        self._pending.setdefault(name, {}).update(spec)
                 return
             self._inflight = True
 
+        t_sent = time.perf_counter()
+
         def ack_cb(_ok=None):
+            metrics.observe("ack_rtt", time.perf_counter() - t_sent)
             with self._state_lock:
                 self._inflight = False
                 next_payload = self._pending
@@ -117,20 +384,50 @@ class Display:
             if next_payload is not None:
                 self._emit_update(next_payload)
 
-        self._last_size = len(encoded)
         # Avoid passing unsupported kwargs (e.g., compress) — rely on server defaults
-        self.sio.emit("upstream_update", payload, callback=ack_cb)
+        # ("serialize" covers packing and socket.io's own JSON encoding inside emit)
+        try:
+            with metrics.time("serialize"):
+                frame = self._encode_frame(payload) if self.binary else None
+                if frame is not None:
+                    metrics.inc("bytes_out", len(frame))
+                    self.sio.emit("upstream_frame", frame, callback=ack_cb)
+                else:
+                    self.sio.emit("upstream_update", payload, callback=ack_cb)
+        except Exception:
+            with self._state_lock:
+                self._inflight = False
+            metrics.inc("errors_emit")
+            raise
+        metrics.inc("frames_sent")
+
+    def _push_metrics(self, ticks, dt):
+        """Achieved fps over the last window, then ship all metrics to the server."""
+        self.metrics.set("fps_achieved", ticks / dt if dt > 0 else 0.0)
+        if self.sio.connected:
+            try:
+                self.sio.emit("producer_metrics", self.metrics.snapshot())
+            except Exception:
+                pass
 
     def _run(self):
         # Drift-resistant frame timer
         period = self._period
         next_t = time.perf_counter()
+        ticks, window_t = 0, next_t
         while not self._stop_event.is_set():
             try:
-                self._emit_update(self._build_pose_frame())
+                with self.metrics.time("frame"):
+                    self._emit_update(self._next_frame())
             except Exception:
                 # Don’t let one bad frame kill the thread
-                pass
+                self.metrics.inc("errors_frame")
+
+            ticks += 1
+            now = time.perf_counter()
+            if now - window_t >= self.metrics_s:
+                self._push_metrics(ticks, now - window_t)
+                ticks, window_t = 0, now
 
             next_t += period
             # If we’re far behind (system sleep, GC pause etc), reset the schedule
@@ -152,7 +449,8 @@ class Display:
 
         # Try to connect (websocket preferred)
         try:
-            self.sio.connect(self.SERVER, transports=["websocket"], wait=True, wait_timeout=5,socketio_path="/socket.io/")
+            self.sio.connect(self.SERVER, transports=["websocket"], wait=True, wait_timeout=5,socketio_path="/socket.io/",
+                             auth={"role": "producer", "cell": self.cell})
         except Exception:
             return
 
@@ -176,7 +474,18 @@ class Display:
         if t and t.is_alive():
             # Don’t hang forever on exit
             t.join(timeout=2.0)
+        self.stop_recording()
         try:
             self.sio.disconnect()
         except Exception:
             pass
+
+
+_FRAME_KEYS = {"pose", "visible"}
+
+
+def _moved(prev, pose, pos_eps, ang_eps):
+    """True if pose differs from prev by more than pos_eps (xyz) or ang_eps (abc)."""
+    return (abs(pose[0] - prev[0]) > pos_eps or abs(pose[1] - prev[1]) > pos_eps
+            or abs(pose[2] - prev[2]) > pos_eps or abs(pose[3] - prev[3]) > ang_eps
+            or abs(pose[4] - prev[4]) > ang_eps or abs(pose[5] - prev[5]) > ang_eps)
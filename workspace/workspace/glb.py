@@ -0,0 +1,337 @@
+# workspace/glb.py
+"""
+Minimal binary glTF (GLB) reader/writer and vertex-clustering decimation, numpy only.
+
+Covers what the meshes in static/CAD use: one JSON chunk, one BIN chunk, triangle
+primitives with float attributes and uint8/16/32 indices, tightly packed or strided
+buffer views.
+"""
+import json, struct
+import numpy as np
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+MODE_TRIANGLES = 4
+
+_COMPONENTS = {5120: np.int8, 5121: np.uint8, 5122: np.int16, 5123: np.uint16, 5125: np.uint32, 5126: np.float32}
+_WIDTH = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT4": 16}
+
+
+def read_glb(path_or_bytes):
+    """-> (gltf JSON dict, BIN chunk bytes)."""
+    if isinstance(path_or_bytes, (bytes, bytearray)):
+        data = bytes(path_or_bytes)
+    else:
+        with open(path_or_bytes, "rb") as f:
+            data = f.read()
+    magic, version, length = struct.unpack_from("<4sII", data)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError("not a glTF 2.0 binary")
+    gltf, bin_chunk, off = None, b"", 12
+    while off < length:
+        size, kind = struct.unpack_from("<II", data, off)
+        chunk = data[off + 8:off + 8 + size]
+        if kind == CHUNK_JSON:
+            gltf = json.loads(chunk)
+        elif kind == CHUNK_BIN:
+            bin_chunk = chunk
+        off += 8 + size
+    if gltf is None:
+        raise ValueError("GLB has no JSON chunk")
+    return gltf, bin_chunk
+
+
+def write_glb(gltf, bin_chunk):
+    """GLB bytes for a JSON dict and BIN chunk (both padded to 4 bytes)."""
+    js = json.dumps(gltf, separators=(",", ":")).encode()
+    js += b" " * (-len(js) % 4)
+    bin_chunk = bytes(bin_chunk) + b"\0" * (-len(bin_chunk) % 4)
+    length = 12 + 8 + len(js) + (8 + len(bin_chunk) if bin_chunk else 0)
+    parts = [struct.pack("<4sII", GLB_MAGIC, 2, length), struct.pack("<II", len(js), CHUNK_JSON), js]
+    if bin_chunk:
+        parts += [struct.pack("<II", len(bin_chunk), CHUNK_BIN), bin_chunk]
+    return b"".join(parts)
+
+
+def accessor(gltf, bin_chunk, index):
+    """Accessor data as an (count, width) array (count for SCALAR)."""
+    acc = gltf["accessors"][index]
+    dtype = np.dtype(_COMPONENTS[acc["componentType"]]).newbyteorder("<")
+    width = _WIDTH[acc["type"]]
+    count = acc["count"]
+    view = gltf["bufferViews"][acc["bufferView"]]
+    off = view.get("byteOffset", 0) + acc.get("byteOffset", 0)
+    stride = view.get("byteStride", 0) or dtype.itemsize * width
+    rows = np.ndarray((count, width), dtype=dtype, buffer=bin_chunk, offset=off, strides=(stride, dtype.itemsize))
+    out = np.array(rows)
+    return out[:, 0] if acc["type"] == "SCALAR" else out
+
+
+def _node_matrix(node):
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=float).reshape(4, 4).T   # column-major
+    T = np.eye(4)
+    x, y, z, w = node.get("rotation", (0, 0, 0, 1))
+    T[:3, :3] = [
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ]
+    T[:3, :3] *= np.asarray(node.get("scale", (1, 1, 1)), dtype=float)
+    T[:3, 3] = node.get("translation", (0, 0, 0))
+    return T
+
+
+def mesh_nodes(gltf):
+    """[(mesh index, (4, 4) transform in the GLB's scene frame)] for every mesh node."""
+    scene = gltf.get("scenes", [{}])[gltf.get("scene", 0)] if gltf.get("scenes") else {}
+    roots = scene.get("nodes", range(len(gltf.get("nodes", []))))
+    out, stack = [], [(i, np.eye(4)) for i in roots]
+    while stack:
+        i, parent = stack.pop()
+        node = gltf["nodes"][i]
+        T = parent @ _node_matrix(node)
+        if "mesh" in node:
+            out.append((node["mesh"], T))
+        stack.extend((c, T) for c in node.get("children", ()))
+    return out
+
+
+def bounds(path_or_bytes):
+    """
+    (min (3,), max (3,)) of the whole GLB in its scene frame, from the POSITION accessors'
+    min/max (no vertex data is read); each mesh box is transformed by its node.
+    """
+    gltf, _ = read_glb(path_or_bytes)
+    lo, hi = np.full(3, np.inf), np.full(3, -np.inf)
+    for mesh, T in mesh_nodes(gltf):
+        for prim in gltf["meshes"][mesh]["primitives"]:
+            acc = gltf["accessors"][prim["attributes"]["POSITION"]]
+            a, b = np.asarray(acc["min"], dtype=float), np.asarray(acc["max"], dtype=float)
+            corners = np.array([[x, y, z, 1.0] for x in (a[0], b[0]) for y in (a[1], b[1]) for z in (a[2], b[2])])
+            pts = (corners @ T.T)[:, :3]
+            lo, hi = np.minimum(lo, pts.min(0)), np.maximum(hi, pts.max(0))
+    return lo, hi
+
+
+def triangles(path_or_bytes):
+    """(T, 3, 3) float64 vertices of every triangle of the GLB, in its scene frame."""
+    gltf, bin_chunk = read_glb(path_or_bytes)
+    out = []
+    for mesh, T in mesh_nodes(gltf):
+        for prim in gltf["meshes"][mesh]["primitives"]:
+            pos = accessor(gltf, bin_chunk, prim["attributes"]["POSITION"]).astype(np.float64)
+            pos = pos @ T[:3, :3].T + T[:3, 3]
+            idx = accessor(gltf, bin_chunk, prim["indices"]) if "indices" in prim else np.arange(len(pos))
+            out.append(pos[idx.astype(np.int64)].reshape(-1, 3, 3))
+    return np.concatenate(out) if out else np.zeros((0, 3, 3))
+
+
+# ---------- geometric error ----------
+def surface_samples(tris, spacing, seed=0):
+    """Vertices plus area-proportional random points (about one per spacing^2) of (T, 3, 3) triangles."""
+    area = 0.5 * np.linalg.norm(np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0]), axis=1)
+    k = np.ceil(area / spacing ** 2).astype(np.int64)
+    owner = np.repeat(np.arange(len(tris)), k)
+    rng = np.random.default_rng(seed)
+    u, v = rng.random(len(owner)), rng.random(len(owner))
+    flip = u + v > 1
+    u[flip], v[flip] = 1 - u[flip], 1 - v[flip]
+    t = tris[owner]
+    pts = t[:, 0] + u[:, None] * (t[:, 1] - t[:, 0]) + v[:, None] * (t[:, 2] - t[:, 0])
+    return np.concatenate([np.unique(tris.reshape(-1, 3), axis=0), pts])
+
+
+def nearest_distance(a, b, cap, chunk=65536):
+    """Distance from each point of a to the nearest point of b, capped at `cap` (voxel hash of b)."""
+    out = np.full(len(a), float(cap))
+    if not len(a) or not len(b):
+        return out
+    origin = np.minimum(a.min(0), b.min(0)) - cap
+    va = np.floor((a - origin) / cap).astype(np.int64)
+    vb = np.floor((b - origin) / cap).astype(np.int64)
+    dims = np.maximum(va.max(0), vb.max(0)) + 2
+
+    def key(v):
+        return (v[:, 0] * dims[1] + v[:, 1]) * dims[2] + v[:, 2]
+
+    kb = key(vb)
+    order = np.argsort(kb)
+    b, kb = b[order], kb[order]
+    offsets = np.array([(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)])
+    for i in range(0, len(a), chunk):
+        pa, v = a[i:i + chunk], va[i:i + chunk]
+        best = np.full(len(pa), float(cap) ** 2)
+        for off in offsets:
+            k = key(v + off)
+            start = np.searchsorted(kb, k, "left")
+            n = np.searchsorted(kb, k, "right") - start
+            hit = n > 0
+            if not hit.any():
+                continue
+            first = np.cumsum(n) - n
+            rows = np.repeat(np.arange(len(pa)), n)
+            cols = np.repeat(start - first, n) + np.arange(first[-1] + n[-1])
+            d2 = ((pa[rows] - b[cols]) ** 2).sum(1)
+            best[hit] = np.minimum(best[hit], np.minimum.reduceat(d2, first[hit]))
+        out[i:i + chunk] = np.sqrt(best)
+    return out
+
+
+def hausdorff(tris_a, tris_b, cap, spacing=None):
+    """
+    Symmetric Hausdorff distance between two triangle soups (capped at `cap`: a result of
+    `cap` means "at least"), estimated on surface samples `spacing` apart (default cap / 3),
+    i.e. over-estimated by up to about one spacing.
+    """
+    spacing = spacing or cap / 3.0
+    a, b = surface_samples(tris_a, spacing), surface_samples(tris_b, spacing)
+    return float(max(nearest_distance(a, b, cap).max(initial=0.0), nearest_distance(b, a, cap).max(initial=0.0)))
+
+
+# ---------- decimation ----------
+def _cluster(positions, normals, cell, normal_bins):
+    """
+    Position grid cell per vertex, and cluster id per vertex: grid cell (+ quantized
+    normal, to keep hard edges). -> (cell per vertex, first vertex per cluster, cluster per vertex)
+    """
+    keys = np.floor((positions - positions.min(0)) / cell).astype(np.int64)
+    _, cells = np.unique(keys, axis=0, return_inverse=True)
+    cells = cells.reshape(-1)
+    if normals is not None and normal_bins:
+        keys = np.hstack([cells[:, None], np.rint(normals * normal_bins).astype(np.int64)])
+    else:
+        keys = cells[:, None]
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return cells, first, inverse.reshape(-1)
+
+
+def _cell_points(pos, idx, cells, cell):
+    """
+    Representative point per grid cell minimizing the squared distance to the planes of the
+    triangles touching the cell (Lindstrom's quadric clustering), so corners, edges and the
+    silhouette stay put instead of shrinking towards the cell mean. Falls back to the mean
+    where the quadric is degenerate or its optimum leaves the cell.
+    """
+    n = int(cells.max()) + 1
+    counts = np.bincount(cells, minlength=n)[:, None]
+    mean = np.zeros((n, 3))
+    np.add.at(mean, cells, pos)
+    mean /= counts
+
+    tri = idx.reshape(-1, 3)
+    p0, p1, p2 = pos[tri[:, 0]], pos[tri[:, 1]], pos[tri[:, 2]]
+    nrm = np.cross(p1 - p0, p2 - p0)          # length = 2 * area: area-weighted planes
+    area = np.linalg.norm(nrm, axis=1, keepdims=True)
+    unit = nrm / np.maximum(area, 1e-300)
+    d = -np.einsum("ij,ij->i", unit, p0)
+    w = area[:, 0]
+    A = np.einsum("i,ij,ik->ijk", w, unit, unit)
+    b = (w * d)[:, None] * unit
+    QA = np.zeros((n, 3, 3))
+    Qb = np.zeros((n, 3))
+    for corner in range(3):
+        c = cells[tri[:, corner]]
+        np.add.at(QA, c, A)
+        np.add.at(Qb, c, b)
+
+    # minimize x^T A x + 2 b^T x, regularized towards the mean along unconstrained directions
+    reg = 1e-6 * np.maximum(np.trace(QA, axis1=1, axis2=2), 1e-300)[:, None, None]
+    out = np.linalg.solve(QA + reg * np.eye(3), (reg[:, :, 0] * mean - Qb)[:, :, None])[:, :, 0]
+    lo = np.zeros((n, 3)) + np.inf
+    hi = np.zeros((n, 3)) - np.inf
+    np.minimum.at(lo, cells, pos)
+    np.maximum.at(hi, cells, pos)
+    slack = 0.5 * cell
+    bad = ~np.all(np.isfinite(out), axis=1) | np.any(out < lo - slack, axis=1) | np.any(out > hi + slack, axis=1)
+    out[bad] = mean[bad]
+    return out
+
+
+def decimate(path_or_bytes, cell, normal_bins=2):
+    """
+    Vertex-clustering simplification: vertices closer than `cell` (scene units, as bounds()) with similar
+    normals collapse into one (quadric-optimal position per cell, summed normal, first
+    vertex's other attributes), degenerate and duplicate triangles are dropped. Returns
+    (GLB bytes, triangle count). Materials, nodes and extensions are kept as they are, and
+    every attribute keeps its accessor's component type (and normalized flag).
+    """
+    gltf, bin_chunk = read_glb(path_or_bytes)
+    # `cell` is in scene units: per mesh, in its own units at the largest scale it is drawn with
+    scale = {}
+    for mesh, T in mesh_nodes(gltf):
+        scale[mesh] = max(scale.get(mesh, 0.0), float(np.linalg.norm(T[:3, :3], axis=0).max()))
+    out = {k: v for k, v in gltf.items() if k not in ("accessors", "bufferViews", "buffers")}
+    out["meshes"] = [dict(m, primitives=[dict(p) for p in m["primitives"]]) for m in gltf["meshes"]]
+    accessors, views, blob = [], [], bytearray()
+    triangles = 0
+
+    def add(arr, target, minmax=False, normalized=False):
+        arr = np.ascontiguousarray(arr)
+        blob.extend(b"\0" * (-len(blob) % 4))
+        views.append({"buffer": 0, "byteOffset": len(blob), "byteLength": arr.nbytes, "target": target})
+        blob.extend(arr.tobytes())
+        width = 1 if arr.ndim == 1 else arr.shape[1]
+        acc = {"bufferView": len(views) - 1, "componentType": {np.dtype(t): c for c, t in _COMPONENTS.items()}[arr.dtype],
+               "count": len(arr), "type": {v: k for k, v in _WIDTH.items()}[width]}
+        if normalized:
+            acc["normalized"] = True
+        if minmax:
+            acc["min"], acc["max"] = arr.min(0).tolist(), arr.max(0).tolist()
+        accessors.append(acc)
+        return len(accessors) - 1
+
+    for m, mesh in enumerate(out["meshes"]):
+        local_cell = cell / (scale.get(m) or 1.0)
+        for prim in mesh["primitives"]:
+            attrs = {name: accessor(gltf, bin_chunk, i) for name, i in prim["attributes"].items()}
+            normalized = {name: gltf["accessors"][i].get("normalized", False) for name, i in prim["attributes"].items()}
+            pos = attrs["POSITION"].astype(np.float64)
+            if "indices" in prim:
+                idx = accessor(gltf, bin_chunk, prim["indices"]).astype(np.int64)
+            else:
+                idx = np.arange(len(pos))
+            if prim.get("mode", MODE_TRIANGLES) != MODE_TRIANGLES or len(pos) == 0:
+                raise ValueError("only indexed/non-indexed triangle lists are supported")
+
+            nrm = attrs.get("NORMAL")
+            cells, first, inverse = _cluster(pos, nrm, local_cell, normal_bins)
+            points = _cell_points(pos, idx, cells, local_cell)
+            n = len(first)
+            new = {}
+            for name, values in attrs.items():
+                if name == "POSITION":
+                    new[name] = points[cells[first]].astype(np.float32)
+                elif name == "NORMAL":
+                    v = np.zeros((n, 3))
+                    np.add.at(v, inverse, values)
+                    v /= np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+                    new[name] = v.astype(np.float32)
+                else:
+                    # JOINTS_n, COLOR_n, TEXCOORD_n, ...: the first vertex's value, same type
+                    new[name] = values[first]
+
+            tri = inverse[idx].reshape(-1, 3)
+            keep = (tri[:, 0] != tri[:, 1]) & (tri[:, 1] != tri[:, 2]) & (tri[:, 0] != tri[:, 2])
+            tri = tri[keep]
+            # drop duplicates regardless of rotation, keeping the first winding seen
+            _, uniq = np.unique(np.sort(tri, axis=1), axis=0, return_index=True)
+            tri = tri[np.sort(uniq)]
+            if len(tri) == 0:
+                # collapsed completely (a part smaller than one cell): keep it at full detail
+                new = dict(attrs, POSITION=attrs["POSITION"].astype(np.float32))
+                tri = idx.reshape(-1, 3)
+            # only keep vertices that are still referenced
+            used, remap = np.unique(tri, return_inverse=True)
+            tri = remap.reshape(-1, 3)
+            triangles += len(tri)
+
+            prim["attributes"] = {name: add(v[used], 34962, minmax=(name == "POSITION"), normalized=normalized[name])
+                                  for name, v in new.items()}
+            index_type = np.uint16 if len(used) < 65536 else np.uint32
+            prim["indices"] = add(tri.reshape(-1).astype(index_type), 34963)
+
+    out["accessors"], out["bufferViews"] = accessors, views
+    out["buffers"] = [{"byteLength": len(blob) + (-len(blob) % 4)}]
+    return write_glb(out, blob), triangles
@@ -0,0 +1,68 @@
+# workspace/instanced.py
+import numpy as np
+
+from workspace.scene import T_to_xyzabc_batch, xyzabc_to_T_batch
+
+
+class InstancedArray:
+    """
+    Many identical solids (microtubes, tips, vials) sitting on the grid anchors of one
+    parent solid, stored as an occupancy mask instead of one Solid per item.
+
+    The array has no pose of its own: it moves with `parent`, and each instance sits
+    at its anchor (child_anchor is the instance's own anchor that lands on it, as in
+    attach_to). The viewer gets a single instanced-mesh spec (mesh URL + the local
+    transforms of all instances) and renders it with one draw call per mesh.
+
+    Components expose these as `self.instances = {name: InstancedArray}`.
+    After changing occupancy at runtime call display.send_snapshot() to push it.
+    """
+
+    def __init__(self, name, type, parent, anchors, occupied=None, child_anchor=(0, 0, 0, 0, 0, 0)):
+        self.name = name
+        self.type = type
+        self.parent = parent
+        self.anchors = anchors      # GridAnchors of the parent
+        self._child_inv = np.linalg.inv(xyzabc_to_T_batch([child_anchor])[0])
+
+        n = anchors.rows * anchors.cols
+        if occupied is None:
+            self.occupancy = np.ones(n, dtype=bool)
+        else:
+            self.occupancy = np.zeros(n, dtype=bool)
+            self.set_occupied(occupied, True)
+        self._local = None
+
+    # ---------- occupancy ----------
+    def set_occupied(self, names, occupied=True):
+        """Mark grid anchors (e.g. ["A1", "C7"]) as occupied / empty."""
+        for name in names:
+            if self.anchors.cell(name) is None:
+                raise KeyError(f"'{name}' is not a grid anchor")
+            self.occupancy[self.anchors.index(name)] = occupied
+        self._local = None
+
+    @property
+    def names(self):
+        """Anchor names of the occupied slots, in instance order."""
+        all_names = list(self.anchors)
+        return [all_names[i] for i in np.flatnonzero(self.occupancy)]
+
+    def __len__(self):
+        return int(self.occupancy.sum())
+
+    # ---------- transforms ----------
+    def local_T(self):
+        """(M, 4, 4) instance transforms relative to the parent solid (cached)."""
+        if self._local is None:
+            grid_T = self.anchors.T[: len(self.occupancy)]
+            self._local = grid_T[self.occupancy] @ self._child_inv
+        return self._local
+
+    def local_xyzabc(self):
+        """(M, 6) instance poses relative to the parent solid."""
+        return T_to_xyzabc_batch(self.local_T())
+
+    def world_T(self, parent_world):
+        """(M, 4, 4) instance world transforms for the parent's (4, 4) world transform."""
+        return parent_world @ self.local_T()
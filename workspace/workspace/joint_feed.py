@@ -0,0 +1,142 @@
+# workspace/joint_feed.py
+import time, threading
+from collections import deque
+
+
+class JointFeed:
+    """
+    Background joint-state subscriber for one Dorna robot.
+
+    Keeps a timestamped latest-value cache so readers (Core.update_pose) never block
+    on the controller. Samples come from the controller's push messages when the API
+    supports register_callback(); if no pushed sample arrived within stale_s, the
+    feed thread falls back to polling robot_api.joint() at `rate` Hz.
+    """
+
+    def __init__(self, robot_api, rate=100.0, stale_s=0.25):
+        self.robot_api = robot_api
+        self._period = 1.0 / max(1.0, float(rate))
+        self.stale_s = float(stale_s)
+
+        self._lock = threading.Lock()
+        self._joints = None
+        self._t = None                       # perf_counter() of the latest sample
+        self._times = deque(maxlen=100)      # sample times, for the rate estimate
+        self._samples = 0
+        self._source = None                  # "push" or "poll"
+        self._last_push = None               # perf_counter() of the latest pushed joints
+        self._last_message = None            # ... and of any pushed message
+
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    # ---------- producers ----------
+    async def _on_message(self, msg, union=None):
+        """
+        Push callback, registered with robot_api.register_callback() (dorna2 awaits it from
+        its receive loop): controller messages carry (some of) the joints as j0..j7.
+        """
+        self._last_message = time.perf_counter()    # any message: the link is up
+        if not isinstance(msg, dict) or not any(f"j{i}" in msg for i in range(8)):
+            return
+        self._merge(msg)
+
+    def _merge(self, msg):
+        """Overlay the j0..j7 of a message on the latest joints, in one critical section."""
+        now = time.perf_counter()
+        with self._lock:
+            joints = list(self._joints or [])
+            for i in range(8):
+                v = msg.get(f"j{i}")
+                if v is None:
+                    continue
+                joints.extend([0.0] * (i + 1 - len(joints)))
+                joints[i] = v
+            self._last_push = now
+            self._set(joints, now, "push")
+
+    def _store(self, joints, source):
+        with self._lock:
+            self._set(list(joints), time.perf_counter(), source)
+
+    def _set(self, joints, now, source):
+        """Install a sample (under _lock)."""
+        self._joints = joints
+        self._t = now
+        self._times.append(now)
+        self._samples += 1
+        self._source = source
+
+    def poll(self):
+        """Read the joints once, synchronously (what the feed thread does when push is stale)."""
+        self._store(self.robot_api.joint(), "poll")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            last_push = self._last_push
+            if last_push is None or time.perf_counter() - last_push > self.stale_s:
+                try:
+                    self.poll()
+                except Exception:
+                    pass
+            self._stop_event.wait(self._period)
+
+    # ---------- readers (non-blocking) ----------
+    def latest(self):
+        """(joints, timestamp) of the newest sample, or (None, None) before the first one."""
+        with self._lock:
+            return self._joints, self._t
+
+    def age(self):
+        """Seconds since the newest sample (inf before the first one)."""
+        t = self._t
+        return float("inf") if t is None else time.perf_counter() - t
+
+    def push_age(self):
+        """
+        Seconds since the controller last pushed any message (inf before the first one).
+        Unlike age(), polling can't keep this fresh: dorna2 answers joint() from its local
+        cache even when the socket is dead.
+        """
+        t = self._last_message
+        return float("inf") if t is None else time.perf_counter() - t
+
+    def probe(self):
+        """
+        Ask the controller for a reply without waiting for it ({"cmd": "version"}; its answer
+        is pushed like any message and refreshes push_age()). False if it can't be sent.
+        """
+        try:
+            self.robot_api.play(timeout=0, cmd="version")
+            return True
+        except Exception:
+            return False
+
+    def stats(self):
+        """Staleness and sample-rate stats."""
+        with self._lock:
+            times = list(self._times)
+            samples, source = self._samples, self._source
+        rate = (len(times) - 1) / (times[-1] - times[0]) if len(times) > 1 and times[-1] > times[0] else 0.0
+        return {"age": self.age(), "rate": rate, "samples": samples, "source": source}
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        register = getattr(self.robot_api, "register_callback", None)
+        if callable(register):
+            try:
+                register(self._on_message)
+            except Exception:
+                pass  # polling only
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        t = self._thread
+        self._thread = None
+        if t and t.is_alive():
+            t.join(timeout=2.0)
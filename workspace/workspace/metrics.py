@@ -0,0 +1,53 @@
+# workspace/metrics.py
+import time, threading
+from contextlib import contextmanager
+
+
+class Metrics:
+    """
+    Low-overhead stage timers, counters and gauges for the producer hot path.
+
+    Timers keep count / sum / max (seconds). snapshot() returns a plain dict that
+    Display pushes to server.py, which exposes it on /metrics (Prometheus text format).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timers = {}     # name -> [count, sum, max]
+        self.counters = {}   # name -> int
+        self.gauges = {}     # name -> float
+
+    def observe(self, name, seconds):
+        with self._lock:
+            t = self.timers.get(name)
+            if t is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                t[0] += 1
+                t[1] += seconds
+                if seconds > t[2]:
+                    t[2] = seconds
+
+    @contextmanager
+    def time(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name, value):
+        self.gauges[name] = value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "timers": {k: {"count": c, "sum": s, "max": m} for k, (c, s, m) in self.timers.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+
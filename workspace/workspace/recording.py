@@ -0,0 +1,262 @@
+# workspace/recording.py
+"""
+Compact on-disk pose recordings (what Display streamed), for replaying incidents and analysis.
+
+A recording is a sequence of chunks, each one flush of the Recorder (little-endian):
+
+    header   <4sIIII4x          magic b"WSR2", row count R, name count N, change count C,
+                                meta length M
+    meta     UTF-8 JSON         {"names": [...], "specs": {name: {meshUrl, instances, ...}}},
+                                space-padded to a multiple of 8 bytes
+    t        float64[R]         wall-clock time of each row (time.time())
+    base     float32[N, 6]      x, y, z, a, b, c of every name before the first row (NaN: not seen)
+    ends     uint32[R]          number of changes up to and including each row
+    cols     uint32[C]          column of each change
+    poses    float32[C, 6]      new pose of each change
+
+A row only stores the columns whose pose changed in that frame, so an idle cell costs a
+timestamp per row; each chunk starts from the full state, so any chunk decodes on its own.
+`names` are all names known when the chunk was written (earlier names keep their column);
+`specs` only holds the mesh specs that changed since the previous chunk. Recording(path)
+memory-maps the chunks, no JSON beyond the chunk headers is parsed.
+"""
+import json, struct, threading, time
+from collections import deque
+
+import numpy as np
+
+MAGIC = b"WSR2"
+HEADER = struct.Struct("<4sIIII4x")
+ROW_BYTES = 12          # t + ends
+CHANGE_BYTES = 28       # cols + poses
+
+
+class Recorder:
+    """
+    Appends the frames Display emits to a recording file.
+
+    record() only keeps the frame's changed poses in memory (no I/O); a background thread
+    writes whatever accumulated every flush_s as one chunk. Unwritten rows are bounded by
+    `capacity` rows and `max_bytes` of pose data: if the writer falls further behind, the
+    oldest unwritten rows are folded into the chunk's base state and dropped (counted in
+    `dropped`) rather than blocking the frame loop.
+    """
+
+    def __init__(self, path, capacity=4096, flush_s=1.0, max_bytes=64 << 20):
+        self.path = str(path)
+        self.capacity = int(capacity)
+        self.flush_s = float(flush_s)
+        self.max_bytes = int(max_bytes)
+
+        self._lock = threading.Lock()
+        self._names = []
+        self._index = {}
+        self._state = np.full((16, 6), np.nan, dtype=np.float32)   # current pose per name (grows)
+        self._base = self._state.copy()   # pose per name before the first unwritten row
+        self._rows = deque()    # unwritten rows: (t, cols, poses)
+        self._bytes = 0         # size of the unwritten rows as written
+        self._specs = {}        # specs changed since the last chunk
+        self.dropped = 0
+        self.chunks = 0
+
+        self._file = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    # ---------- recording (frame loop) ----------
+    def _column(self, name):
+        i = self._index.get(name)
+        if i is None:
+            i = self._index[name] = len(self._names)
+            self._names.append(name)
+            if i >= len(self._state):
+                n = 2 * len(self._state)
+                state = np.full((n, 6), np.nan, dtype=np.float32)
+                base = state.copy()
+                state[:i], base[:i] = self._state, self._base
+                self._state, self._base = state, base
+        return i
+
+    def record(self, frame, t=None):
+        """Add a row for a frame / snapshot {name: {"pose": [x,y,z,a,b,c], ...}}."""
+        if not frame:
+            return
+        t = time.time() if t is None else t
+        with self._lock:
+            cols, poses = [], []
+            for name, spec in frame.items():
+                pose = spec.get("pose")
+                if pose is not None and len(pose) == 6:
+                    cols.append(self._column(name))     # may grow _state: index it only afterwards
+                    poses.append(pose)
+            cols = np.array(cols, dtype=np.uint32)
+            poses = np.array(poses, dtype=np.float32).reshape(-1, 6)
+            # keep only what changed (a column not seen yet is NaN, so it always differs)
+            changed = np.any(self._state[cols] != poses, axis=1)
+            cols, poses = cols[changed], poses[changed]
+            self._state[cols] = poses
+            self._rows.append((t, cols, poses))
+            self._bytes += ROW_BYTES + CHANGE_BYTES * len(cols)
+            while len(self._rows) > self.capacity or (self._bytes > self.max_bytes and len(self._rows) > 1):
+                _, c0, p0 = self._rows.popleft()
+                self._base[c0] = p0
+                self._bytes -= ROW_BYTES + CHANGE_BYTES * len(c0)
+                self.dropped += 1
+
+    def record_specs(self, snapshot):
+        """Remember the mesh specs (everything but the pose) of a snapshot, for replay."""
+        with self._lock:
+            for name, spec in snapshot.items():
+                self._column(name)
+                self._specs[name] = {k: v for k, v in spec.items() if k != "pose"}
+
+    # ---------- writing (background) ----------
+    def flush(self):
+        """Write the rows recorded since the last flush as one chunk."""
+        with self._lock:
+            if not self._rows and not self._specs:
+                return 0
+            rows, self._rows, self._bytes = self._rows, deque(), 0
+            names = list(self._names)
+            base = self._base[:len(names)].copy()
+            self._base = self._state.copy()
+            specs, self._specs = self._specs, {}
+        t = np.array([r[0] for r in rows], dtype="<f8")
+        ends = np.cumsum([len(r[1]) for r in rows], dtype=np.int64)
+        cols = np.concatenate([np.zeros(0, np.uint32)] + [r[1] for r in rows])
+        poses = np.concatenate([np.zeros((0, 6), np.float32)] + [r[2] for r in rows])
+        meta = json.dumps({"names": names, "specs": specs}, separators=(",", ":")).encode()
+        meta += b" " * (-len(meta) % 8)
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(HEADER.pack(MAGIC, len(t), len(names), len(cols), len(meta)))
+        self._file.write(meta)
+        for a, dtype in ((t, "<f8"), (base, "<f4"), (ends, "<u4"), (cols, "<u4"), (poses, "<f4")):
+            self._file.write(a.astype(dtype).tobytes())
+        self._file.flush()
+        self.chunks += 1
+        return len(t)
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_s):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the writer thread and flush what is left."""
+        self._stop_event.set()
+        t = self._thread
+        self._thread = None
+        if t and t.is_alive():
+            t.join(timeout=2.0)
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Recording:
+    """
+    A recording file, memory-mapped:
+        names  : every name in the recording (column order of pose)
+        specs  : last mesh spec per name (meshUrl, instances, ...)
+        t      : (R,) float64 row times
+        chunks : [(t (R_k,), base (N_k, 6), ends (R_k,), cols (C_k,), poses (C_k, 6),
+                   column of each of the N_k names)], arrays as in the file
+    pose(name) gives one solid's (R, 6) track, row(i) / at(t) one full state.
+    A chunk cut short (e.g. a crash mid-write) ends the recording.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        buf = np.memmap(self.path, dtype=np.uint8, mode="r") if _size(self.path) else np.zeros(0, np.uint8)
+        self.names, self.specs, self.chunks = [], {}, []
+        index = {}
+        off = 0
+        while off + HEADER.size <= len(buf):
+            magic, R, N, C, M = HEADER.unpack_from(buf, off)
+            end = off + HEADER.size + M + 12 * R + 24 * N + 28 * C
+            if magic != MAGIC or end > len(buf):
+                break
+            off += HEADER.size
+            meta = json.loads(bytes(buf[off:off + M]))
+            off += M
+            for name in meta["names"]:
+                if name not in index:
+                    index[name] = len(self.names)
+                    self.names.append(name)
+            self.specs.update(meta["specs"])
+            parts = []
+            for dtype, n, shape in (("<f8", 8 * R, (R,)), ("<f4", 24 * N, (N, 6)), ("<u4", 4 * R, (R,)),
+                                    ("<u4", 4 * C, (C,)), ("<f4", 24 * C, (C, 6))):
+                parts.append(buf[off:off + n].view(dtype).reshape(shape))
+                off += n
+            if R:
+                self.chunks.append((*parts, np.array([index[n] for n in meta["names"]], dtype=np.intp)))
+        self._index = index
+        self.t = np.concatenate([c[0] for c in self.chunks]) if self.chunks else np.zeros(0)
+        self._start = np.cumsum([0] + [len(c[0]) for c in self.chunks])
+
+    def __len__(self):
+        return len(self.t)
+
+    @property
+    def duration(self):
+        return float(self.t[-1] - self.t[0]) if len(self.t) else 0.0
+
+    def index(self, t):
+        """Row shown at wall-clock time t (the last row at or before it)."""
+        return max(int(np.searchsorted(self.t, t, side="right")) - 1, 0)
+
+    def row(self, i):
+        """(N, 6) float32 state at row i, columns as in names."""
+        k = int(np.searchsorted(self._start, i, side="right")) - 1
+        t, base, ends, cols, poses, names = self.chunks[k]
+        out = np.full((len(self.names), 6), np.nan, dtype=np.float32)
+        out[names] = base
+        n = int(ends[i - self._start[k]])
+        if n:
+            # the last change of each column up to this row
+            c, first = np.unique(cols[:n][::-1], return_index=True)
+            out[names[c]] = poses[:n][::-1][first]
+        return out
+
+    def poses(self, i):
+        """{name: [x,y,z,a,b,c]} at row i (names not seen yet are left out)."""
+        row = self.row(i)
+        return {name: p for name, p, ok in zip(self.names, row.tolist(), ~np.isnan(row[:, 0])) if ok}
+
+    def at(self, t):
+        return self.poses(self.index(t))
+
+    def pose(self, name):
+        """(R, 6) track of one name over the whole recording (NaN where not yet seen)."""
+        j = self._index[name]
+        parts = []
+        for t, base, ends, cols, poses, names in self.chunks:
+            track = np.full((len(t), 6), np.nan, dtype=np.float32)
+            c = np.flatnonzero(names == j)
+            if len(c):
+                track[:] = base[c[0]]
+                hits = np.flatnonzero(cols == c[0])
+                rows = np.searchsorted(ends, hits, side="right")            # row of each change
+                last = np.searchsorted(rows, np.arange(len(t)), side="right") - 1
+                ok = last >= 0
+                track[ok] = poses[hits[last[ok]]]
+            parts.append(track)
+        return np.concatenate(parts) if parts else np.zeros((0, 6), dtype=np.float32)
+
+
+def _size(path):
+    with open(path, "rb") as f:
+        return f.seek(0, 2)
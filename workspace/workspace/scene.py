@@ -0,0 +1,361 @@
+# workspace/scene.py
+import numpy as np
+from dorna2.pose import T_to_xyzabc
+
+
+class CompiledScene:
+    """
+    Array-backed, incrementally updated view of the solid tree of a set of components.
+
+    The tree is flattened once into arrays in DFS preorder (parents before children,
+    every subtree is a contiguous slice):
+        solids      : list of Solid
+        parent_idx  : (N,) int, -1 for roots
+        subtree_end : (N,) int, solids[i:subtree_end[i]] is the subtree of solid i
+        levels      : list of index arrays, one per depth >= 1
+        local, world: (N, 4, 4) transforms
+    World transforms are computed level by level with batched matmuls and xyzabc is
+    extracted in one vectorized call. Only the subtrees of solids whose local["T"]
+    changed are recomputed; clean subtrees are served from the cache.
+    """
+
+    def __init__(self, components):
+        # keyed solids in component/assembly order ("component_solid" -> solid);
+        # an instanced array is keyed like a solid and follows its parent's pose
+        keyed = []
+        for comp_name, comp in components.items():
+            for solid_name, solid in comp.assembly.items():
+                keyed.append((f"{comp_name}_{solid_name}", solid))
+            for inst_name, inst in getattr(comp, "instances", {}).items():
+                keyed.append((f"{comp_name}_{inst_name}", inst.parent))
+
+        # collect every node reachable through parent links
+        nodes = {}
+        for _, solid in keyed:
+            while solid is not None and id(solid) not in nodes:
+                nodes[id(solid)] = solid
+                solid = solid.parent
+
+        kids = {}
+        roots = []
+        for solid in nodes.values():
+            if solid.parent is None:
+                roots.append(solid)
+            else:
+                kids.setdefault(id(solid.parent), []).append(solid)
+
+        # DFS preorder with depth
+        self.solids = []
+        depths = []
+        stack = [(root, 0) for root in reversed(roots)]
+        while stack:
+            solid, d = stack.pop()
+            self.solids.append(solid)
+            depths.append(d)
+            stack.extend((child, d + 1) for child in reversed(kids.get(id(solid), ())))
+
+        self.index = {id(s): i for i, s in enumerate(self.solids)}
+        n = len(self.solids)
+        index = self.index
+
+        self.parent_idx = np.array(
+            [index[id(s.parent)] if s.parent is not None else -1 for s in self.solids],
+            dtype=np.intp,
+        )
+        depths = np.array(depths, dtype=np.intp)
+        self.levels = [np.flatnonzero(depths == d) for d in range(1, int(depths.max(initial=0)) + 1)]
+        self.roots = np.flatnonzero(depths == 0)
+
+        # preorder: the subtree of i ends at the first later node that is not deeper
+        self.subtree_end = np.full(n, n, dtype=np.intp)
+        open_ = []
+        for i, d in enumerate(depths):
+            while open_ and depths[open_[-1]] >= d:
+                self.subtree_end[open_.pop()] = i
+            open_.append(i)
+
+        self.keys = [key for key, _ in keyed]
+        self.key_idx = np.array([index[id(s)] for _, s in keyed], dtype=np.intp)
+        self._parents = [s.parent for s in self.solids]
+        self._T_refs = [s.local["T"] for s in self.solids]   # local["T"] objects last read (see scan())
+        self._layout = _layout(components)
+
+        self.local = np.array([s.local["T"] for s in self.solids], dtype=float).reshape(n, 4, 4)
+        self.world = np.empty((n, 4, 4))
+        self._recompute(np.ones(n, dtype=bool))
+
+        # the vectorized xyzabc must match dorna2's T_to_xyzabc; check once on real data
+        self._vectorized = _matches_reference(self.world)
+        self.pose = self.xyzabc(self.world[self.key_idx])
+        self._poses = dict(zip(self.keys, self.pose.tolist()))
+
+    # ---------- workspace cache (workspace/cache.py) ----------
+    def arrays(self, components):
+        """
+        The compiled scene as plain arrays ({name: ndarray}, no objects), or None if a solid
+        is not in any component's assembly (it couldn't be found again on load).
+        Solids are named "component/solid".
+        """
+        path = {id(s): f"{comp_name}/{solid_name}"
+                for comp_name, comp in components.items() for solid_name, s in comp.assembly.items()}
+        paths = [path.get(id(s)) for s in self.solids]
+        if None in paths:
+            return None
+        depths = np.zeros(len(self.solids), dtype=np.intp)
+        for d, idx in enumerate(self.levels, 1):
+            depths[idx] = d
+        return {"paths": np.array(paths, dtype=str), "parent_idx": self.parent_idx, "depths": depths,
+                "subtree_end": self.subtree_end, "keys": np.array(self.keys, dtype=str),
+                "key_idx": self.key_idx, "local": self.local, "world": self.world, "pose": self.pose,
+                "vectorized": np.array(self._vectorized), "layout": np.array(_layout_strings(components), dtype=str)}
+
+    @classmethod
+    def from_arrays(cls, components, arrays):
+        """
+        A CompiledScene over freshly built components from arrays(): no tree walk, no FK, no
+        xyzabc extraction. None if the components don't match the arrays (different solids or
+        parents); local transforms that differ are simply recomputed by update().
+        """
+        if arrays["layout"].tolist() != _layout_strings(components):
+            return None
+        by_path = {f"{comp_name}/{solid_name}": s
+                   for comp_name, comp in components.items() for solid_name, s in comp.assembly.items()}
+        solids = [by_path.get(p) for p in arrays["paths"].tolist()]
+        if None in solids:
+            return None
+        parent_idx = arrays["parent_idx"]
+        for s, p in zip(solids, parent_idx.tolist()):
+            if s.parent is not (solids[p] if p >= 0 else None):
+                return None
+
+        self = cls.__new__(cls)
+        self.solids = solids
+        self.index = {id(s): i for i, s in enumerate(solids)}
+        self.parent_idx = parent_idx
+        depths = arrays["depths"]
+        self.levels = [np.flatnonzero(depths == d) for d in range(1, int(depths.max(initial=0)) + 1)]
+        self.roots = np.flatnonzero(depths == 0)
+        self.subtree_end = arrays["subtree_end"]
+        self.keys = arrays["keys"].tolist()
+        self.key_idx = arrays["key_idx"]
+        self._parents = [s.parent for s in solids]
+        self._T_refs = [None] * len(solids)     # filled by update() below
+        self._layout = _layout(components)
+        self.local = arrays["local"].copy()
+        self.world = arrays["world"].copy()
+        self._vectorized = bool(arrays["vectorized"])
+        self.pose = arrays["pose"].copy()
+        self._poses = dict(zip(self.keys, self.pose.tolist()))
+        self.update()    # picks up any local transform that differs from the cached one
+        return self
+
+    # ---------- topology ----------
+    def stale(self, solids=None):
+        """
+        True if any of the given solids (default: all) was re-parented or is unknown
+        since compile, i.e. a new CompiledScene is needed.
+        """
+        if solids is None:
+            return any(s.parent is not p for s, p in zip(self.solids, self._parents))
+        index, parents = self.index, self._parents
+        for s in solids:
+            i = index.get(id(s))
+            if i is None or s.parent is not parents[i]:
+                return True
+        return False
+
+    def scan(self, components):
+        """
+        Per-frame change detection that needs no help from whoever moved a solid: returns the
+        solids whose local["T"] object was replaced since it was last read (any attach_to()),
+        or None if the topology changed (a solid re-parented, solids or components added),
+        i.e. a new CompiledScene is needed. Identity checks only, no matrix compares.
+        """
+        if _layout(components) != self._layout:
+            return None
+        changed = []
+        for s, T, p in zip(self.solids, self._T_refs, self._parents):
+            if s.parent is not p:
+                return None
+            if s.local["T"] is not T:
+                changed.append(s)
+        return changed
+
+    # ---------- per-frame ----------
+    def update(self, solids=None):
+        """
+        Refresh from the given solids' local["T"] (default: scan all solids) and
+        recompute world transforms / poses for the subtrees that actually changed.
+        Returns the number of solids whose world pose was recomputed.
+        """
+        index, local, refs = self.index, self.local, self._T_refs
+        candidates = range(len(self.solids)) if solids is None else (index[id(s)] for s in solids)
+
+        dirty = np.zeros(len(self.solids), dtype=bool)
+        end = self.subtree_end
+        any_dirty = False
+        for i in candidates:
+            T = refs[i] = self.solids[i].local["T"]
+            if np.array_equal(local[i], T):
+                continue
+            local[i] = T
+            dirty[i:end[i]] = True
+            any_dirty = True
+
+        if not any_dirty:
+            return 0
+
+        self._recompute(dirty)
+        sel = np.flatnonzero(dirty[self.key_idx])
+        rows = self.xyzabc(self.world[self.key_idx[sel]])
+        self.pose[sel] = rows
+        keys = self.keys
+        self._poses.update(zip([keys[k] for k in sel.tolist()], rows.tolist()))
+        return int(dirty.sum())
+
+    def _recompute(self, dirty):
+        """World transforms for the masked solids (a union of whole subtrees)."""
+        local, world, parent_idx = self.local, self.world, self.parent_idx
+        roots = self.roots[dirty[self.roots]]
+        world[roots] = local[roots]
+        for idx in self.levels:
+            idx = idx[dirty[idx]]
+            if len(idx):
+                world[idx] = world[parent_idx[idx]] @ local[idx]
+
+    def sweep(self, local_T, world=None):
+        """
+        Batched FK for S samples of the local transforms of some solids,
+        local_T = {scene index: (S, 4, 4)}. Only their subtrees are computed; everything
+        else stays at `world` (default: the cached world transforms).
+        Returns (rows, W): scene indices in preorder and their (S, len(rows), 4, 4) world transforms.
+        """
+        world = self.world if world is None else world
+        dirty = np.zeros(len(self.solids), dtype=bool)
+        for i in local_T:
+            dirty[i:self.subtree_end[i]] = True
+        rows = np.flatnonzero(dirty)
+        S = len(next(iter(local_T.values()))) if local_T else 0
+        col = {i: c for c, i in enumerate(rows.tolist())}
+        W = np.empty((S, len(rows), 4, 4))
+        for c, i in enumerate(rows.tolist()):
+            L = local_T.get(i, self.local[i])
+            p = self.parent_idx[i]
+            if p < 0:
+                W[:, c] = L
+            else:
+                W[:, c] = (W[:, col[p]] if p in col else world[p]) @ L
+        return rows, W
+
+    def xyzabc(self, T):
+        """(N, 6) xyzabc for (N, 4, 4) transforms."""
+        if self._vectorized:
+            return T_to_xyzabc_batch(T)
+        return np.array([T_to_xyzabc(t) for t in T], dtype=float).reshape(-1, 6)
+
+    def world_poses(self, solids=None):
+        """Update (see update()) and return {"component_solid": [x,y,z,a,b,c]}."""
+        self.update(solids)
+        return self.poses()
+
+    def poses(self):
+        """{"component_solid": [x,y,z,a,b,c]} as of the last update (a copy)."""
+        return dict(self._poses)
+
+
+def _layout_strings(components):
+    """_layout() as strings (stored in the workspace cache)."""
+    return [f"{name}/{n_solids}/{n_instances}" for name, n_solids, n_instances in _layout(components)]
+
+
+def _layout(components):
+    """What the scene was compiled from, cheaply: component names and their solid counts."""
+    return [(name, len(comp.assembly), len(getattr(comp, "instances", ()) or ()))
+            for name, comp in components.items()]
+
+
+# ---------- vectorized pose extraction ----------
+
+def T_to_xyzabc_batch(T):
+    """
+    Vectorized T_to_xyzabc: (N, 4, 4) -> (N, 6) [x, y, z, a, b, c],
+    with abc the rotation vector in degrees (same convention as dorna2.pose).
+    """
+    T = np.asarray(T, dtype=float)
+    R = T[:, :3, :3]
+    out = np.empty((len(T), 6))
+    out[:, :3] = T[:, :3, 3]
+
+    cos = np.clip((np.trace(R, axis1=1, axis2=2) - 1.0) / 2.0, -1.0, 1.0)
+    theta = np.arccos(cos)
+    v = np.stack([R[:, 2, 1] - R[:, 1, 2],
+                  R[:, 0, 2] - R[:, 2, 0],
+                  R[:, 1, 0] - R[:, 0, 1]], axis=1)
+    sin = np.sin(theta)
+
+    # generic case: theta / (2 sin theta) * v  (-> v / 2 as theta -> 0)
+    scale = np.full_like(theta, 0.5)
+    big = theta > 1e-6
+    scale[big] = theta[big] / (2.0 * sin[big])
+    rv = v * scale[:, None]
+
+    # near pi, sin -> 0 and v carries no axis information: use the symmetric part
+    flip = theta > np.pi - 1e-4
+    if flip.any():
+        Rf, cf, tf = R[flip], cos[flip], theta[flip]
+        k = np.argmax(np.diagonal(Rf, axis1=1, axis2=2), axis=1)
+        rows = np.arange(len(Rf))
+        axis = (Rf[rows, :, k] + Rf[rows, k, :]) / 2.0
+        axis[rows, k] = Rf[rows, k, k] - cf
+        axis /= np.linalg.norm(axis, axis=1, keepdims=True)
+        # keep the sign consistent with the (tiny) antisymmetric part
+        sign = np.where(np.einsum("ij,ij->i", axis, v[flip]) < 0, -1.0, 1.0)
+        rv[flip] = axis * (sign * tf)[:, None]
+
+    out[:, 3:] = np.degrees(rv)
+    return out
+
+
+def xyzabc_to_T_batch(xyzabc):
+    """
+    Vectorized inverse of T_to_xyzabc_batch: (N, 6) [x, y, z, a, b, c] -> (N, 4, 4),
+    with abc the rotation vector in degrees (Rodrigues).
+    """
+    p = np.asarray(xyzabc, dtype=float).reshape(-1, 6)
+    rv = np.radians(p[:, 3:])
+    theta = np.linalg.norm(rv, axis=1)
+    axis = np.zeros_like(rv)
+    nz = theta > 0
+    axis[nz] = rv[nz] / theta[nz, None]
+    x, y, z = axis.T
+    K = np.zeros((len(p), 3, 3))
+    K[:, 0, 1], K[:, 0, 2] = -z, y
+    K[:, 1, 0], K[:, 1, 2] = z, -x
+    K[:, 2, 0], K[:, 2, 1] = -y, x
+    sin, cos = np.sin(theta)[:, None, None], np.cos(theta)[:, None, None]
+
+    T = np.tile(np.eye(4), (len(p), 1, 1))
+    T[:, :3, :3] += sin * K + (1.0 - cos) * (K @ K)
+    T[:, :3, 3] = p[:, :3]
+    return T
+
+
+def _matches_reference(T, atol=1e-6):
+    """
+    Check T_to_xyzabc_batch against dorna2's T_to_xyzabc on the given transforms
+    plus a few fixed probe rotations (so an all-identity scene still checks the convention).
+    Rotations within a degree of 180 are skipped: the axis sign is ambiguous there.
+    """
+    probes = np.tile(np.eye(4), (3, 1, 1))
+    for P, (axis, deg) in zip(probes, ((0, 30.0), (1, -45.0), (2, 120.0))):
+        c, s = np.cos(np.radians(deg)), np.sin(np.radians(deg))
+        i, j = [(1, 2), (2, 0), (0, 1)][axis]
+        P[i, i], P[i, j], P[j, i], P[j, j] = c, -s, s, c
+        P[:3, 3] = (10.0, -20.0, 30.0)
+    probes[2] = probes[0] @ probes[1] @ probes[2]
+    T = np.concatenate([np.asarray(T, dtype=float).reshape(-1, 4, 4), probes])
+
+    ref = np.array([T_to_xyzabc(t) for t in T], dtype=float).reshape(-1, 6)
+    ours = T_to_xyzabc_batch(T)
+    check = np.linalg.norm(ref[:, 3:], axis=1) < 179.0
+    return bool(np.allclose(ref[check], ours[check], rtol=atol, atol=atol))
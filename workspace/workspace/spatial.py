@@ -0,0 +1,149 @@
+# workspace/spatial.py
+import numpy as np
+
+
+class BoxGrid:
+    """
+    Uniform-grid index over axis-aligned boxes, keyed by integer id.
+
+    update() only touches boxes whose covered cell range changed, so static boxes cost
+    nothing per frame. Boxes covering more than max_cells cells are kept in a separate
+    list that every query returns (a few big fixtures instead of hundreds of cells each).
+    """
+
+    def __init__(self, cell=100.0, max_cells=64):
+        self.cell = float(cell)
+        self.max_cells = int(max_cells)
+        self.cells = {}      # (ix, iy, iz) -> set of ids
+        self.large = set()   # ids of oversized boxes
+        self._span = {}      # id -> ((ix0, iy0, iz0), (ix1, iy1, iz1))
+
+    def _range(self, lo, hi):
+        return np.floor(np.asarray(lo) / self.cell).astype(int), np.floor(np.asarray(hi) / self.cell).astype(int)
+
+    @staticmethod
+    def _keys(a, b):
+        return [(x, y, z) for x in range(a[0], b[0] + 1) for y in range(a[1], b[1] + 1) for z in range(a[2], b[2] + 1)]
+
+    def _remove(self, i):
+        span = self._span.pop(i, None)
+        if span is None:
+            return
+        if i in self.large:
+            self.large.discard(i)
+            return
+        for key in self._keys(*span):
+            ids = self.cells[key]
+            ids.discard(i)
+            if not ids:
+                del self.cells[key]
+
+    def update(self, ids, lo, hi):
+        """Insert or move boxes ids[k] = [lo[k], hi[k]]."""
+        a_all, b_all = self._range(lo, hi)
+        for i, a, b in zip(np.asarray(ids).tolist(), map(tuple, a_all.tolist()), map(tuple, b_all.tolist())):
+            if self._span.get(i) == (a, b):
+                continue
+            self._remove(i)
+            self._span[i] = (a, b)
+            if np.prod(np.subtract(b, a) + 1) > self.max_cells:
+                self.large.add(i)
+                continue
+            for key in self._keys(a, b):
+                self.cells.setdefault(key, set()).add(i)
+
+    def remove(self, ids):
+        for i in np.asarray(ids).tolist():
+            self._remove(i)
+
+    def query(self, lo, hi):
+        """Sorted array of ids whose cells touch the box [lo, hi] (candidates, not exact hits)."""
+        a, b = self._range(lo, hi)
+        found = set(self.large)
+        cells = self.cells
+        for key in self._keys(a, b):
+            ids = cells.get(key)
+            if ids:
+                found |= ids
+        return np.array(sorted(found), dtype=np.intp)
+
+    def __len__(self):
+        return len(self._span)
+
+
+def box_gap(lo_a, hi_a, lo_b, hi_b):
+    """Euclidean distance between pairs of boxes (0 where they overlap), (K, 3) inputs -> (K,)."""
+    gap = np.maximum(0.0, np.maximum(lo_b - hi_a, lo_a - hi_b))
+    return np.linalg.norm(gap, axis=-1)
+
+
+class PointGrid:
+    """
+    Uniform-grid index over points keyed by integer id (the caller keeps the coordinates).
+    update() only re-buckets points that changed cell.
+    """
+
+    def __init__(self, cell=25.0):
+        self.cell = float(cell)
+        self.cells = {}      # (ix, iy, iz) -> set of ids
+        self._key = {}       # id -> (ix, iy, iz)
+        self.lo = None       # cell-key bounds of every occupied cell (for search termination)
+        self.hi = None
+        self._flat = None    # (ids, keys) arrays of every point, rebuilt after a change
+
+    def update(self, ids, xyz):
+        keys = np.floor(np.asarray(xyz, dtype=float).reshape(-1, 3) / self.cell).astype(int)
+        changed = False
+        for i, key in zip(np.asarray(ids).tolist(), map(tuple, keys.tolist())):
+            old = self._key.get(i)
+            if old == key:
+                continue
+            changed = True
+            if old is not None:
+                bucket = self.cells[old]
+                bucket.discard(i)
+                if not bucket:
+                    del self.cells[old]
+            self.cells.setdefault(key, set()).add(i)
+            self._key[i] = key
+        if changed:
+            self._flat = None
+            occupied = np.array(list(self.cells))
+            self.lo, self.hi = occupied.min(0), occupied.max(0)
+
+    def _collect(self, a, b):
+        cells = self.cells
+        if len(cells) < np.prod(np.subtract(b, a) + 1):
+            # fewer occupied cells than cells in the range: test every point's key at once
+            if self._flat is None:
+                self._flat = (np.fromiter(self._key, dtype=np.intp, count=len(self._key)),
+                              np.array(list(self._key.values()), dtype=int).reshape(-1, 3))
+            ids, keys = self._flat
+            return np.sort(ids[np.all((keys >= a) & (keys <= b), axis=1)])
+        found = []
+        for key in BoxGrid._keys(a, b):
+            bucket = cells.get(key)
+            if bucket:
+                found.extend(bucket)
+        return np.array(sorted(found), dtype=np.intp)
+
+    def query_box(self, lo, hi):
+        """Ids of points in cells touching the box [lo, hi] (candidates, not exact hits)."""
+        a = np.floor(np.asarray(lo, dtype=float) / self.cell).astype(int)
+        b = np.floor(np.asarray(hi, dtype=float) / self.cell).astype(int)
+        return self._collect(tuple(a.tolist()), tuple(b.tolist()))
+
+    def query_ring(self, xyz, r):
+        """
+        Ids of points in the (2r+1)^3 cells around the cell of xyz. Every point within
+        r * cell of xyz is among them.
+        """
+        c = np.floor(np.asarray(xyz, dtype=float) / self.cell).astype(int)
+        return self._collect(tuple((c - r).tolist()), tuple((c + r).tolist()))
+
+    def max_ring(self, xyz):
+        """Smallest r for which query_ring(xyz, r) covers every occupied cell."""
+        if self.lo is None:
+            return 0
+        c = np.floor(np.asarray(xyz, dtype=float) / self.cell).astype(int)
+        return int(max(np.abs(self.lo - c).max(), np.abs(self.hi - c).max()))
@@ -0,0 +1,49 @@
+# workspace/trajectory.py
+import numpy as np
+
+
+class Trajectory:
+    """
+    Precomputed world poses of a joint trajectory, for previewing a program in the viewer
+    without a live robot (see Workspace.trajectory() / Workspace.preview()).
+
+    Only the solids that move with the robot are stored:
+        keys : "component_solid" names (as in compute_world_poses)
+        pose : (S, len(keys), 6) xyzabc per sample
+        dt   : sample period (s); None plays one sample per display frame
+    Every sample is a row of `pose`, so scrubbing (frame(i)) costs nothing.
+    """
+
+    def __init__(self, keys, pose, dt=None):
+        self.keys = list(keys)
+        self.pose = np.asarray(pose, dtype=float)
+        self.dt = None if dt is None else float(dt)
+
+    @classmethod
+    def compute(cls, scene, local_T, dt=None, world=None):
+        """
+        Batched FK over a compiled scene: local_T = {solid: (S, 4, 4)} local transforms per sample
+        (e.g. Core.joint_local_T()), world = the scene's world transforms to start from.
+        """
+        rows, W = scene.sweep({scene.index[id(s)]: T for s, T in local_T.items()}, world)
+        col = {i: c for c, i in enumerate(rows.tolist())}
+        keep = [k for k, i in enumerate(scene.key_idx.tolist()) if i in col]
+        cols = [col[i] for i in scene.key_idx[keep].tolist()]
+        S = W.shape[0]
+        pose = scene.xyzabc(W[:, cols].reshape(-1, 4, 4)).reshape(S, len(cols), 6)
+        return cls([scene.keys[k] for k in keep], pose, dt)
+
+    def __len__(self):
+        return len(self.pose)
+
+    @property
+    def duration(self):
+        return None if self.dt is None else len(self) * self.dt
+
+    def poses(self, i):
+        """{"component_solid": [x,y,z,a,b,c]} of sample i."""
+        return dict(zip(self.keys, self.pose[i].tolist()))
+
+    def frame(self, i):
+        """Pose frame of sample i, as sent by Display."""
+        return {name: {"pose": p, "visible": True} for name, p in zip(self.keys, self.pose[i].tolist())}
@@ -0,0 +1,56 @@
+# workspace/wire.py
+"""
+Binary pose frame format (little-endian), shared by Display, server.py and web/index.html.
+
+The name table {"version": int, "names": [...]} is sent once with each snapshot;
+frames then refer to solids by their index in that table:
+
+    header   <4sIII               magic b"WSPF", table version, entry count, flags
+    indices  uint32[count]        omitted when flags & FLAG_FULL (entries are 0..count-1)
+    poses    float32[count * 6]   x, y, z, a, b, c
+    visible  uint8[(count+7)//8]  visibility bitmask, LSB first
+"""
+import struct
+import numpy as np
+
+MAGIC = b"WSPF"
+FLAG_FULL = 1
+HEADER = struct.Struct("<4sIII")
+
+
+def pack_frame(version, poses, visible=None, indices=None):
+    """
+    Pack (count, 6) poses into a frame.
+    indices=None means a full frame (every entry of the table, in order).
+    visible defaults to all True.
+    """
+    poses = np.asarray(poses, dtype="<f4").reshape(-1, 6)
+    count = len(poses)
+    if visible is None:
+        visible = np.ones(count, dtype=bool)
+    bits = np.packbits(np.asarray(visible, dtype=bool), bitorder="little")
+
+    flags = FLAG_FULL if indices is None else 0
+    parts = [HEADER.pack(MAGIC, version, count, flags)]
+    if indices is not None:
+        parts.append(np.asarray(indices, dtype="<u4").tobytes())
+    parts.append(poses.tobytes())
+    parts.append(bits.tobytes())
+    return b"".join(parts)
+
+
+def unpack_frame(buf):
+    """Inverse of pack_frame -> (version, indices or None, poses (count, 6), visible (count,))."""
+    magic, version, count, flags = HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise ValueError("not a pose frame")
+    off = HEADER.size
+    indices = None
+    if not flags & FLAG_FULL:
+        indices = np.frombuffer(buf, dtype="<u4", count=count, offset=off)
+        off += 4 * count
+    poses = np.frombuffer(buf, dtype="<f4", count=6 * count, offset=off).reshape(count, 6)
+    off += 24 * count
+    bits = np.frombuffer(buf, dtype=np.uint8, count=(count + 7) // 8, offset=off)
+    visible = np.unpackbits(bits, count=count, bitorder="little").astype(bool)
+    return version, indices, poses, visible
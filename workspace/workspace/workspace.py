@@ -1,23 +1,93 @@
 # workspace/workspace.py
 from pathlib import Path
+import threading, time
 import yaml
 import numpy as np
 
 from workspace.display import Display
+from workspace.metrics import Metrics
+from workspace.connections import Connections
+from workspace.scene import CompiledScene
+from workspace.anchors import anchor_T
+from workspace.trajectory import Trajectory
 from workspace.components import factory as comp_factory
-from dorna2.pose import T_to_xyzabc
 
 
 class Workspace:
-    def __init__(self, config_path="config/config.yaml"):
-        comp_cfgs = yaml.safe_load(Path(config_path).read_text())
-        if "core" not in comp_cfgs:
-            raise ValueError("config must include a top-level 'core' component.")
+    def __init__(self, config_path="config/config.yaml", start_display=True, cell="default", display_hub=None,
+                 cache=False, cache_dir=None, connect_timeout=5.0, display_kwargs=None):
+        # wall time (s) of each startup phase, see scripts/run_workspace.py --profile
+        self.startup_profile = {}
+        # hot-path stage timers, shared with (and pushed to the server by) the Display
+        self.metrics = Metrics()
+        t0 = time.perf_counter()
 
-        # 1) build components
+        # compiled-scene cache (opt-in, workspace/cache.py): keyed by the config bytes + code version
+        config_bytes = Path(config_path).read_bytes()
+        hit = None
+        if cache:
+            from workspace.cache import WorkspaceCache, cache_key
+            self.cache = WorkspaceCache(cache_dir)
+            key = cache_key(config_bytes)
+            hit = self.cache.load(key)
+            t0 = self._profile("cache", t0)
+        else:
+            self.cache = None
+
+        if hit is not None:
+            comp_cfgs, arrays = hit
+        else:
+            comp_cfgs = yaml.safe_load(config_bytes)
+            if "core" not in comp_cfgs:
+                raise ValueError("config must include a top-level 'core' component.")
+            t0 = self._profile("config", t0)
+        t0 = self._build(comp_cfgs, t0)
+        scene = CompiledScene.from_arrays(self.components, arrays) if hit is not None else None
+        if scene is None:
+            scene = CompiledScene(self.components)
+            t0 = self._profile("scene", t0)
+            if cache:
+                arrays = scene.arrays(self.components)
+                if arrays is not None:
+                    self.cache.store(key, comp_cfgs, arrays)
+                t0 = self._profile("cache_store", t0)
+        else:
+            t0 = self._profile("scene_cached", t0)
+        self.config = comp_cfgs
+
+        # compiled (array-backed) pose graph, recompiled when a solid is re-parented
+        self._scene = scene
+        self._dirty = []                      # solids whose local["T"] changed in place (mark_dirty())
+        self._pose_lock = threading.Lock()    # Display thread + user calls share the cache
+        self.clearance = None                 # see enable_clearance()
+        self._anchor_plans = {}               # ref list -> (scene, solid indices, anchor matrices)
+        self._anchor_index = None             # see anchor_index()
+
+        # 3) start Display (it will pull poses from compute_world_poses()); `cell` names this
+        #    workspace on a relay shared by several robot cells. With a DisplayHub, many
+        #    workspaces share one event loop (and connection) instead of a thread each.
+        #    display_kwargs (fps, binary, delta, ...) go to the Display / AsyncDisplay.
+        display_kwargs = dict(display_kwargs or {}, cell=cell)
+        if display_hub is not None:
+            from workspace.async_display import AsyncDisplay
+            self.display = AsyncDisplay(self, display_hub, **display_kwargs)
+        else:
+            self.display = Display(self, **display_kwargs)
+        if start_display:
+            self.display.start()
+        t0 = self._profile("display", t0)
+
+        # 4) connect hardware (never cached) in the background, all devices at once, with
+        #    reconnect/backoff; each robot goes live on its first joint sample
+        self.connections = Connections(self.components, self.metrics, timeout=connect_timeout).start()
+        self._profile("connect", t0)
+
+    def _build(self, comp_cfgs, t0):
+        # 1) build components (component modules are imported on first use)
         self.components = {}
         for name, ccfg in comp_cfgs.items():
             self.components[name] = comp_factory.create_component(name, ccfg)
+            t0 = self._profile(f"component:{name}", t0)
 
         # 2) perform attachments (child-side offset)
         for child_name, ccfg in comp_cfgs.items():
@@ -34,10 +104,12 @@ class Workspace:
                 child_anchor=att["child_anchor"],
                 offset=att.get("offset", [0, 0, 0, 0, 0, 0]),
             )
+        return self._profile("attach", t0)
 
-        # 3) start Display (it will pull poses from compute_world_poses())
-        self.display = Display(self)
-        self.display.start()
+    def _profile(self, phase, t0):
+        t1 = time.perf_counter()
+        self.startup_profile[phase] = t1 - t0
+        return t1
 
     # ---------- pose calculation (the only thing Display needs) ----------
 
@@ -45,42 +117,174 @@ class Workspace:
         """
         Returns a dict mapping "component_solid" -> [x,y,z,a,b,c] in WORLD frame.
 
-        Fast: single DFS over the pose graph using cached local["T"] matrices.
-        Always calls core.update_pose() first (if present) to refresh joint locals.
+        Fast: the pose graph is compiled once into parent-index / transform arrays
+        (see CompiledScene) and world transforms are cached. Only the subtrees of
+        solids whose local transform changed are recomputed, so static labware costs
+        one identity check per frame. The scene is recompiled if a solid gets re-parented
+        or solids/components are added.
+
+        Always calls update_pose() first on driving components (core: robot and rail).
+        Any attach_to() (from update_pose() or anywhere else) is picked up by
+        CompiledScene.scan(); update_pose() returning None forces a full compare of every
+        local transform, and mark_dirty() reports a local["T"] modified in place.
+        """
+        return self._refresh(lambda scene: scene.poses())
+
+    def _refresh(self, read):
+        """
+        update_pose() + incremental scene update (see compute_world_poses), then
+        read(scene) under the pose lock; returns what read() returned.
         """
-        # first update the pose of all driving components including core (robot and rail)
+        metrics = self.metrics
+        t0 = time.perf_counter()
+        moved = []
+        full_scan = False
         for comp in self.components.values():
             if hasattr(comp, "update_pose"):
-                comp.update_pose()
+                m = comp.update_pose()
+                if m is None:
+                    full_scan = True
+                else:
+                    moved.extend(m)
+        t1 = time.perf_counter()
+        metrics.observe("update_pose", t1 - t0)
 
-        # find all roots
-        roots = []
-        seen = set()
-        for comp in self.components.values():
-            for solid in comp.assembly.values():
-                if solid.parent is None and id(solid) not in seen:
-                    seen.add(id(solid))
-                    roots.append(solid)
-
-        # DFS to compute world transforms
-        world_T = {}
-        stack = [(root, np.eye(4)) for root in roots]
-        while stack:
-            node, T_parent = stack.pop()
-            T_world = T_parent @ node.local["T"]
-            world_T[id(node)] = T_world
-            for child in node.children:
-                stack.append((child, T_world))
-
-        # build name->pose dict
-        poses = {}
-        for comp_name, comp in self.components.items():
-            for solid_name, solid in comp.assembly.items():
-                key = f"{comp_name}_{solid_name}"
-                T = world_T.get(id(solid), solid.local["T"])  # fallback if orphan
-                poses[key] = T_to_xyzabc(T)
-        return poses
+        with self._pose_lock:
+            moved.extend(self._dirty)
+            self._dirty = []
+            scene = self._scene
+            changed = None if scene is None else scene.scan(self.components)
+            if changed is None or scene.stale(moved):
+                self._scene = CompiledScene(self.components)
+                metrics.inc("scene_compiles")
+            else:
+                scene.update(None if full_scan else moved + changed)
+            t2 = time.perf_counter()
+            metrics.observe("compute_world_poses", t2 - t1)
+            if self.clearance is not None:
+                self.clearance.update(self.components, self._scene)
+                metrics.observe("clearance", time.perf_counter() - t2)
+            return read(self._scene)
+
+    # ---------- anchors ----------
 
+    def anchor_world_T(self, refs):
+        """
+        (R, 4, 4) world transforms of many anchors in one batched call.
+
+        refs: ("component", "solid", "anchor") tuples or "component.solid.anchor"
+        strings, e.g. ("microplate_1", "microplate", "C7"). The solid can be left out
+        ("tool_rack_1.tool_connection") if exactly one solid of the component has that
+        anchor. The anchor matrices of a ref list are resolved once and cached, so a
+        repeated pick list costs one update check and one (R, 4, 4) matmul.
+        """
+        def read(scene):
+            idx, A = self._anchor_plan(refs, scene)
+            return scene.world[idx] @ A
+        return self._refresh(read)
+
+    def anchor_world_xyzabc(self, refs):
+        """(R, 6) world [x, y, z, a, b, c] of many anchors (see anchor_world_T)."""
+        def read(scene):
+            idx, A = self._anchor_plan(refs, scene)
+            return scene.xyzabc(scene.world[idx] @ A)
+        return self._refresh(read)
+
+    def _anchor_plan(self, refs, scene):
+        """(scene index per ref, (R, 4, 4) anchor matrices), cached per ref list and scene."""
+        key = tuple(tuple(r) if isinstance(r, list) else r for r in refs)
+        plan = self._anchor_plans.get(key)
+        if plan is not None and plan[0] is scene:
+            return plan[1], plan[2]
+
+        solids, names = [], []
+        for ref in key:
+            comp_name, solid_name, anchor = self._parse_anchor_ref(ref)
+            solids.append(self.components[comp_name].assembly[solid_name])
+            names.append(anchor)
+        idx = np.array([scene.index[id(s)] for s in solids], dtype=np.intp)
+        A = anchor_T([s.anchors for s in solids], names)
+        if len(self._anchor_plans) >= 64:
+            self._anchor_plans.pop(next(iter(self._anchor_plans)))
+        self._anchor_plans[key] = (scene, idx, A)
+        return idx, A
+
+    def anchor_index(self, cell=25.0):
+        """
+        AnchorIndex over the world positions of every anchor, brought up to date (only the
+        anchors of moved solids are recomputed), e.g.
+            idx = ws.anchor_index()
+            dist, ids = idx.nearest(tcp_xyz, k=1, types={"microplate"})
+            idx.refs[ids[0, 0]]  -> ("microplate_1", "microplate", "C7")
+        """
+        from workspace.anchor_index import AnchorIndex
+        if self._anchor_index is None:
+            self._anchor_index = AnchorIndex(cell)
+        return self._refresh(lambda scene: self._anchor_index.update(self.components, scene))
+
+    def _parse_anchor_ref(self, ref):
+        parts = ref.split(".") if isinstance(ref, str) else list(ref)
+        if len(parts) == 3:
+            return parts
+        if len(parts) != 2:
+            raise ValueError(f"anchor ref must be (component, solid, anchor) or (component, anchor): {ref!r}")
+        comp_name, anchor = parts
+        owners = [name for name, solid in self.components[comp_name].assembly.items()
+                  if anchor in getattr(solid, "anchors", {})]
+        if len(owners) != 1:
+            raise KeyError(f"{comp_name}: anchor '{anchor}' is on {len(owners)} solids, name the solid")
+        return comp_name, owners[0], anchor
+
+    def enable_clearance(self, **kwargs):
+        """
+        Start tracking robot-vs-workspace clearance (see workspace/clearance.py); it is
+        refreshed on every compute_world_poses(), i.e. at the display rate. Returns the
+        Clearance, e.g. ws.enable_clearance().near(margin=10) -> [(link, obstacle, mm)].
+        """
+        from workspace.clearance import Clearance
+        if self.clearance is None:
+            self.clearance = Clearance(**kwargs)
+        self.compute_world_poses()
+        return self.clearance
+
+    def instance_world_T(self, comp_name, inst_name):
+        """(M, 4, 4) world transforms of every instance of an InstancedArray, in one batch."""
+        inst = self.components[comp_name].instances[inst_name]
+        parent_world = self._refresh(lambda scene: scene.world[scene.index[id(inst.parent)]].copy())
+        return inst.world_T(parent_world)
+
+    # ---------- trajectory preview ----------
+
+    def trajectory(self, joints, dt=None):
+        """
+        Trajectory (world poses of everything that moves with the robot, per sample) for
+        (S, 7+) core joint samples, in one batched FK pass; nothing in the scene is moved.
+        dt is the sample period in seconds (None: one sample per display frame).
+        """
+        local_T = self.components["core"].joint_local_T(joints)
+        scene, world = self._refresh(lambda scene: (scene, scene.world.copy()))
+        return Trajectory.compute(scene, local_T, dt, world)
+
+    def preview(self, joints, dt=None, speed=1.0, loop=False):
+        """Compute a Trajectory and play it in the viewer (see Display.play); returns it."""
+        traj = self.trajectory(joints, dt)
+        self.display.play(traj, speed=speed, loop=loop)
+        return traj
+
+    def mark_dirty(self, *solids):
+        """Report solids whose local["T"] array was modified in place (attach_to() needs no report)."""
+        with self._pose_lock:
+            self._dirty.extend(solids)
+
+    def invalidate_scene(self):
+        """Force the pose graph to be recompiled (e.g. after adding solids to an assembly)."""
+        with self._pose_lock:
+            self._scene = None
+
+
+    def wait_connected(self, timeout=None):
+        """Block until every hardware connection is live; False on timeout (see connections.status())."""
+        return self.connections.wait(timeout)
 
     def stop(self):
         """Cleanly stop background threads and close any resources."""
@@ -90,6 +294,9 @@ class Workspace:
         except Exception:
             pass
 
+        # stop reconnecting, close hardware
+        self.connections.stop()
+
         # give each component a chance to cleanup 
         for comp in self.components.values():
             if hasattr(comp, "stop"):